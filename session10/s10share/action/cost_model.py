@@ -0,0 +1,265 @@
+"""
+Static cost model for LLM-generated plans.
+
+analyze_plan() reads the AST once (cached with the compiled code) and counts MCP tool calls only —
+builtins like len/str/print are free. plan_rejection() refuses plans over the tool-call cap or with
+tool calls inside a while loop (no iteration count to budget). plan_budget() turns that shape into a time budget, a runtime
+tool-call cap and a concurrency limit using per-tool latency history (ToolLatencyStats, fed by
+MultiMCP.call_tool and persisted in memory/tool_latency.json).
+"""
+import ast
+import json
+import math
+from typing import Optional
+from pathlib import Path
+from collections import deque
+from dataclasses import dataclass, field
+
+MAX_TOOL_CALLS = 12           # estimated tool calls above this are rejected; also the runtime cap
+MAX_CONCURRENT_TOOL_CALLS = 4
+MAX_BATCH_SIZE = 64           # matches mcp_servers/batching.py
+BATCH_ITEM_FACTOR = 0.25      # each extra batch item costs this share of a call (transport is paid once)
+DEFAULT_LOOP_ITERATIONS = 5   # for loops whose length can't be read from the code
+DEFAULT_TOOL_SECONDS = 10.0   # tools with no history yet
+BASE_SECONDS = 3.0
+SAFETY_FACTOR = 3.0
+MIN_TIMEOUT = 5.0
+MAX_TIMEOUT = 180.0
+
+STATS_PATH = "memory/tool_latency.json"
+TRACE_DIR = "memory/traces"
+SAMPLES_PER_TOOL = 50
+SAVE_EVERY = 10
+
+
+# ───────────────────────────────────────────────────────────────
+# STATIC ANALYSIS
+# ───────────────────────────────────────────────────────────────
+@dataclass
+class PlanShape:
+    tool_calls: dict[str, int] = field(default_factory=dict)    # sequential calls per tool (loops multiplied out)
+    parallel_groups: list[list[str]] = field(default_factory=list)  # parallel(...) batches, run concurrently
+    batches: list[tuple[str, int]] = field(default_factory=list)   # [tool(...) for ...] sent as one batch: (tool, ~items)
+    unbounded_loop: bool = False                                # a while loop issues tool calls
+
+    @property
+    def total_tool_calls(self) -> int:
+        """Tool round-trips: a batch counts once, however many items it carries."""
+        return sum(self.tool_calls.values()) + sum(len(g) for g in self.parallel_groups) + len(self.batches)
+
+
+def _is_tool_call(node: ast.AST, tool_names) -> bool:
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and (node.func.id in tool_names or node.func.id == "parallel")
+
+
+def batched_tool(node: ast.AST, tool_names) -> Optional[str]:
+    """Tool name if `node` is `[tool(args) for ...]` whose args make no tool calls (executor sends it as one batch)."""
+    if not isinstance(node, ast.ListComp) or not _is_tool_call(node.elt, tool_names) or node.elt.func.id == "parallel":
+        return None
+    arg_nodes = [*node.elt.args, *(kw.value for kw in node.elt.keywords)]
+    if any(_is_tool_call(sub, tool_names) for arg in arg_nodes for sub in ast.walk(arg)):
+        return None
+    return node.elt.func.id
+
+
+def _loop_iterations(node: ast.AST) -> int:
+    """Best guess at how often a loop body runs: range(N) / literal sequences, else a default."""
+    if isinstance(node, ast.While):
+        return DEFAULT_LOOP_ITERATIONS
+    iterable = node.iter if isinstance(node, (ast.For, ast.AsyncFor, ast.comprehension)) else None
+    if isinstance(iterable, (ast.List, ast.Tuple, ast.Set)):
+        return max(1, len(iterable.elts))
+    if (
+        isinstance(iterable, ast.Call) and isinstance(iterable.func, ast.Name) and iterable.func.id == "range"
+        and iterable.args and all(isinstance(a, ast.Constant) and isinstance(a.value, int) for a in iterable.args)
+    ):
+        try:
+            return max(1, len(range(*(a.value for a in iterable.args))))
+        except (TypeError, ValueError):
+            pass
+    return DEFAULT_LOOP_ITERATIONS
+
+
+class _ShapeVisitor(ast.NodeVisitor):
+    def __init__(self, tool_names):
+        self.tool_names = set(tool_names)
+        self.shape = PlanShape()
+        self.multiplier = 1
+        self.in_while = False
+
+    def _loop(self, node, body_nodes):
+        outer, outer_while = self.multiplier, self.in_while
+        self.multiplier *= _loop_iterations(node)
+        self.in_while = self.in_while or isinstance(node, ast.While)
+        for child in body_nodes:
+            self.visit(child)
+        self.multiplier, self.in_while = outer, outer_while
+
+    def visit_For(self, node):
+        self.visit(node.iter)
+        self._loop(node, [node.target, *node.body])
+        for child in node.orelse:
+            self.visit(child)
+
+    visit_AsyncFor = visit_For
+
+    def visit_While(self, node):
+        self._loop(node, [node.test, *node.body])
+        for child in node.orelse:
+            self.visit(child)
+
+    def _comprehension(self, node):
+        outer = self.multiplier
+        for gen in node.generators:
+            self.visit(gen.iter)
+            self.multiplier *= _loop_iterations(gen)
+            for cond in gen.ifs:
+                self.visit(cond)
+        batched = batched_tool(node, self.tool_names)
+        if batched:
+            self.shape.batches.extend([(batched, self.multiplier // outer)] * outer)
+            self.shape.unbounded_loop = self.shape.unbounded_loop or self.in_while
+            children = [*node.elt.args, *(kw.value for kw in node.elt.keywords)]
+        else:
+            children = [node.key, node.value] if isinstance(node, ast.DictComp) else [node.elt]
+        for child in children:
+            self.visit(child)
+        self.multiplier = outer
+
+    visit_ListComp = visit_SetComp = visit_GeneratorExp = visit_DictComp = _comprehension
+
+    def visit_Call(self, node):
+        name = node.func.id if isinstance(node.func, ast.Name) else None
+        if name == "parallel":
+            group = [
+                arg.elts[0].value for arg in node.args
+                if isinstance(arg, ast.Tuple) and arg.elts
+                and isinstance(arg.elts[0], ast.Constant) and arg.elts[0].value in self.tool_names
+            ]
+            self.shape.parallel_groups.extend([group] * self.multiplier)
+        elif name in self.tool_names:
+            self.shape.tool_calls[name] = self.shape.tool_calls.get(name, 0) + self.multiplier
+        if name == "parallel" or name in self.tool_names:
+            self.shape.unbounded_loop = self.shape.unbounded_loop or self.in_while
+        self.generic_visit(node)
+
+
+def analyze_plan(tree: ast.AST, tool_names) -> PlanShape:
+    visitor = _ShapeVisitor(tool_names)
+    visitor.visit(tree)
+    return visitor.shape
+
+
+def plan_rejection(shape: PlanShape) -> Optional[str]:
+    """Error message if the plan must not run at all, else None."""
+    if shape.unbounded_loop:
+        return "Plan calls tools inside a while loop; use a for loop over known items or split it into steps"
+    if shape.total_tool_calls > MAX_TOOL_CALLS:
+        return f"Plan needs ~{shape.total_tool_calls} tool calls (> {MAX_TOOL_CALLS}); split it into smaller steps"
+    return None
+
+
+# ───────────────────────────────────────────────────────────────
+# LATENCY HISTORY
+# ───────────────────────────────────────────────────────────────
+class ToolLatencyStats:
+    def __init__(self, path: str = STATS_PATH, trace_dir: str = TRACE_DIR):
+        self.path = Path(path)
+        self.trace_dir = Path(trace_dir)
+        self.samples: dict[str, deque] = {}
+        self._loaded = False
+        self._unsaved = 0
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        data = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (json.JSONDecodeError, OSError):
+                data = {}
+        else:
+            data = self._from_traces()
+        for tool, values in data.items():
+            self.samples[tool] = deque(values[-SAMPLES_PER_TOOL:], maxlen=SAMPLES_PER_TOOL)
+
+    def _from_traces(self) -> dict[str, list[float]]:
+        """First run with no stats file: seed from mcp.call_tool spans in exported traces."""
+        data: dict[str, list[float]] = {}
+        for file in sorted(self.trace_dir.glob("*.json")) if self.trace_dir.exists() else []:
+            try:
+                trace = json.loads(file.read_text(encoding="utf-8"))
+                for scope in trace["resourceSpans"][0]["scopeSpans"]:
+                    for span in scope["spans"]:
+                        if span["name"] != "mcp.call_tool":
+                            continue
+                        attrs = {a["key"]: a["value"].get("stringValue") for a in span["attributes"]}
+                        seconds = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e9
+                        data.setdefault(attrs.get("tool"), []).append(round(seconds, 4))
+            except (json.JSONDecodeError, OSError, KeyError, IndexError, TypeError, ValueError):
+                continue
+        data.pop(None, None)
+        return data
+
+    def record(self, tool: str, seconds: float) -> None:
+        self._load()
+        self.samples.setdefault(tool, deque(maxlen=SAMPLES_PER_TOOL)).append(round(seconds, 4))
+        self._unsaved += 1
+        if self._unsaved >= SAVE_EVERY:
+            self.save()
+
+    def save(self) -> None:
+        if not self._unsaved:
+            return
+        self._unsaved = 0
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps({t: list(s) for t, s in self.samples.items()}), encoding="utf-8")
+        except OSError as e:
+            print(f"⚠️ Could not save tool latency stats: {e}")
+
+    def expected(self, tool: str) -> float:
+        """p90 of the recent samples, so budgets cover the slow tail rather than the average."""
+        self._load()
+        values = sorted(self.samples.get(tool) or [])
+        if not values:
+            return DEFAULT_TOOL_SECONDS
+        return values[min(len(values) - 1, math.ceil(0.9 * len(values)) - 1)]
+
+    def snapshot(self, tools) -> dict[str, float]:
+        return {tool: self.expected(tool) for tool in tools}
+
+    def load_snapshot(self, expected: dict[str, float]) -> None:
+        """Used by sandbox workers, which get the parent's numbers instead of reading the file."""
+        self._loaded = True
+        self.samples = {tool: deque([seconds], maxlen=SAMPLES_PER_TOOL) for tool, seconds in expected.items()}
+
+
+TOOL_STATS = ToolLatencyStats()
+
+
+# ───────────────────────────────────────────────────────────────
+# BUDGET
+# ───────────────────────────────────────────────────────────────
+@dataclass
+class PlanBudget:
+    estimated_seconds: float
+    timeout: float
+    max_tool_calls: int
+    max_concurrency: int
+
+
+def plan_budget(shape: PlanShape, stats: ToolLatencyStats = TOOL_STATS) -> PlanBudget:
+    estimated = sum(stats.expected(tool) * n for tool, n in shape.tool_calls.items())
+    estimated += sum(max((stats.expected(t) for t in group), default=0.0) for group in shape.parallel_groups)
+    estimated += sum(stats.expected(tool) * (1 + BATCH_ITEM_FACTOR * (n - 1)) for tool, n in shape.batches)
+    timeout = min(MAX_TIMEOUT, max(MIN_TIMEOUT, BASE_SECONDS + SAFETY_FACTOR * estimated))
+    widest = max((len(g) for g in shape.parallel_groups), default=1)
+    return PlanBudget(
+        estimated_seconds=round(estimated, 3),
+        timeout=round(timeout, 1),
+        max_tool_calls=MAX_TOOL_CALLS,
+        max_concurrency=max(1, min(MAX_CONCURRENT_TOOL_CALLS, widest)),
+    )
@@ -5,7 +5,16 @@ import time
 import builtins
 import textwrap
 import re
+import hashlib
+import json
+import weakref
+import contextvars
+import contextlib
+from types import MappingProxyType
+from collections import OrderedDict
 from datetime import datetime
+from mcp_servers.spill import LargeResult
+from action.cost_model import MAX_BATCH_SIZE, TOOL_STATS, PlanShape, analyze_plan, plan_budget, plan_rejection, batched_tool
 
 # ───────────────────────────────────────────────────────────────
 # CONFIG
@@ -13,8 +22,10 @@ from datetime import datetime
 ALLOWED_MODULES = {
     "math", "cmath", "decimal", "fractions", "random", "statistics", "itertools", "functools", "operator", "string", "re", "datetime", "calendar", "time", "collections", "heapq", "bisect", "types", "copy", "enum", "uuid", "dataclasses", "typing", "pprint", "json", "base64", "hashlib", "hmac", "secrets", "struct", "zlib", "gzip", "bz2", "lzma", "io", "pathlib", "tempfile", "textwrap", "difflib", "unicodedata", "html", "html.parser", "xml", "xml.etree.ElementTree", "csv", "sqlite3", "contextlib", "traceback", "ast", "tokenize", "token", "builtins"
 }
-MAX_FUNCTIONS = 5
-TIMEOUT_PER_FUNCTION = 500  # seconds
+SAFE_BUILTINS = ("range", "len", "int", "float", "str", "list", "dict", "print", "sum", "__import__")
+CODE_CACHE_SIZE = 256
+BATCH_FUNC = "__batch__"  # injected helper that sends one tool over many argument tuples as a single batch
+SANDBOX_GRACE_SECONDS = 5  # worker gets its in-process timeout plus this before the pool kills it
 
 class KeywordStripper(ast.NodeTransformer):
     """Rewrite all function calls to remove keyword args and keep only values as positional."""
@@ -28,6 +39,26 @@ class KeywordStripper(ast.NodeTransformer):
         return node
 
 
+# ───────────────────────────────────────────────────────────────
+# AST TRANSFORMER: [tool(x) for x in xs] → one batched call
+# ───────────────────────────────────────────────────────────────
+class BatchTransformer(ast.NodeTransformer):
+    """Rewrite `[tool(a, b) for ...]` into `__batch__("tool", [(a, b) for ...])` (see MultiMCP.call_tools_batch)."""
+    def __init__(self, tool_names):
+        self.tool_names = set(tool_names)
+
+    def visit_ListComp(self, node):
+        self.generic_visit(node)
+        tool_name = batched_tool(node, self.tool_names)
+        if not tool_name:
+            return node
+        arg_tuples = ast.ListComp(
+            elt=ast.Tuple(elts=node.elt.args, ctx=ast.Load()),
+            generators=node.generators,
+        )
+        return ast.Call(func=ast.Name(id=BATCH_FUNC, ctx=ast.Load()), args=[ast.Constant(tool_name), arg_tuples], keywords=[])
+
+
 # ───────────────────────────────────────────────────────────────
 # AST TRANSFORMER: auto-await known async MCP tools
 # ───────────────────────────────────────────────────────────────
@@ -41,69 +72,141 @@ class AwaitTransformer(ast.NodeTransformer):
             return ast.Await(value=node)
         return node
 
+    def visit_Await(self, node):
+        # Already awaited by the LLM (e.g. `await parallel(...)`): transform the arguments, don't wrap again
+        if isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Name) and node.value.func.id in self.async_funcs:
+            self.generic_visit(node.value)
+            return node
+        self.generic_visit(node)
+        return node
+
 # ───────────────────────────────────────────────────────────────
 # UTILITY FUNCTIONS
 # ───────────────────────────────────────────────────────────────
-def count_function_calls(code: str) -> int:
-    tree = ast.parse(code)
-    return sum(isinstance(node, ast.Call) for node in ast.walk(tree))
+_BASE_GLOBALS = None
+
+
+def base_globals() -> MappingProxyType:
+    """Builtins + allowed modules, imported once per process and shared read-only by every run."""
+    global _BASE_GLOBALS
+    if _BASE_GLOBALS is None:
+        namespace = {"__builtins__": {k: getattr(builtins, k) for k in SAFE_BUILTINS}}
+        for module in ALLOWED_MODULES:
+            namespace[module] = __import__(module)
+        _BASE_GLOBALS = MappingProxyType(namespace)
+    return _BASE_GLOBALS
+
 
 def build_safe_globals(mcp_funcs: dict, multi_mcp=None) -> dict:
+    base = base_globals()
     safe_globals = {
-        "__builtins__": {
-            k: getattr(builtins, k)
-            for k in ("range", "len", "int", "float", "str", "list", "dict", "print", "sum", "__import__")
-        },
+        **base,
+        "__builtins__": dict(base["__builtins__"]),  # exec needs a real dict; keep the shared one pristine
         **mcp_funcs,
     }
 
-    for module in ALLOWED_MODULES:
-        safe_globals[module] = __import__(module)
-
     # Store LLM-style result
     safe_globals["final_answer"] = lambda x: safe_globals.setdefault("result_holder", x)
 
     # Optional: add parallel execution
-    if multi_mcp:
-        async def parallel(*tool_calls):
-            coros = [
-                multi_mcp.function_wrapper(tool_name, *args)
-                for tool_name, *args in tool_calls
-            ]
-            return await asyncio.gather(*coros)
-
-        safe_globals["parallel"] = parallel
+    if multi_mcp and "parallel" not in safe_globals:
+        safe_globals["parallel"] = make_parallel(multi_mcp)
 
     return safe_globals
 
 
+def make_parallel(multi_mcp):
+    async def parallel(*tool_calls):
+        calls = [(tool_name, args) for tool_name, *args in tool_calls]
+        return await call_tools_guarded_batch(multi_mcp, calls, round_trips=len(calls))
+    return parallel
+
+
+def make_batch(multi_mcp):
+    async def batch(tool_name, arg_tuples):
+        return await call_tools_guarded_batch(multi_mcp, [(tool_name, args) for args in arg_tuples], round_trips=1)
+    return batch
+
+
+async def function_wrapper_many(multi_mcp, calls) -> list:
+    """Batched function_wrapper when the MCP client supports it, else concurrent single calls."""
+    batch_fn = getattr(multi_mcp, "function_wrapper_batch", None)
+    if batch_fn is not None:
+        return await batch_fn(calls)
+    return list(await asyncio.gather(*(multi_mcp.function_wrapper(tool_name, *args) for tool_name, args in calls)))
+
+
 # ───────────────────────────────────────────────────────────────
-# MAIN EXECUTOR
+# PER-RUN LIMITS (tool proxies are shared, so the limits ride on a contextvar)
 # ───────────────────────────────────────────────────────────────
-async def run_user_code(code: str, multi_mcp) -> dict:
-    start_time = time.perf_counter()
-    start_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+class RunGuard:
+    def __init__(self, max_tool_calls: int, max_concurrency: int):
+        self.max_tool_calls = max_tool_calls
+        self.calls = 0
+        self.slots = asyncio.Semaphore(max_concurrency)
+
+
+_RUN_GUARD: contextvars.ContextVar = contextvars.ContextVar("run_guard", default=None)
+
+
+async def call_tool_guarded(multi_mcp, tool_name, args):
+    guard = _RUN_GUARD.get()
+    if guard is None:
+        return await multi_mcp.function_wrapper(tool_name, *args)
+    guard.calls += 1
+    if guard.calls > guard.max_tool_calls:
+        raise RuntimeError(f"Exceeded max tool calls ({guard.max_tool_calls}) in one plan")
+    async with guard.slots:
+        return await multi_mcp.function_wrapper(tool_name, *args)
+
+
+async def call_tools_guarded_batch(multi_mcp, calls, round_trips: int):
+    guard = _RUN_GUARD.get()
+    if guard is not None:
+        if len(calls) > MAX_BATCH_SIZE:
+            raise RuntimeError(f"Batch of {len(calls)} tool calls exceeds {MAX_BATCH_SIZE}")
+        guard.calls += round_trips
+        if guard.calls > guard.max_tool_calls:
+            raise RuntimeError(f"Exceeded max tool calls ({guard.max_tool_calls}) in one plan")
+    async with guard.slots if guard else contextlib.nullcontext():
+        return await function_wrapper_many(multi_mcp, calls)
+
+
+# Tool proxies (+ parallel) per MultiMCP, rebuilt only when its tool_map changes
+_TOOL_PROXIES = weakref.WeakKeyDictionary()
+
+
+def get_tool_funcs(multi_mcp) -> dict:
+    version = getattr(multi_mcp, "tool_map_version", None)
+    cached = _TOOL_PROXIES.get(multi_mcp)
+    if cached and version is not None and cached[0] == version:
+        return cached[1]
+    tool_funcs = {
+        tool.name: make_tool_proxy(tool.name, multi_mcp)
+        for tool in multi_mcp.get_all_tools()
+    }
+    tool_funcs["parallel"] = make_parallel(multi_mcp)
+    tool_funcs[BATCH_FUNC] = make_batch(multi_mcp)
+    _TOOL_PROXIES[multi_mcp] = (version, MappingProxyType(tool_funcs))
+    return _TOOL_PROXIES[multi_mcp][1]
 
-    try:
-        func_count = count_function_calls(code)
-        if func_count > MAX_FUNCTIONS:
-            return {
-                "status": "error",
-                "error": f"Too many functions ({func_count} > {MAX_FUNCTIONS})",
-                "execution_time": start_timestamp,
-                "total_time": str(round(time.perf_counter() - start_time, 3))
-            }
 
-        tool_funcs = {
-            tool.name: make_tool_proxy(tool.name, multi_mcp)
-            for tool in multi_mcp.get_all_tools()
-        }
+# Compiled `__main` wrappers keyed by source + tool names (AwaitTransformer depends on both)
+_CODE_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
 
-        sandbox = build_safe_globals(tool_funcs, multi_mcp)
-        local_vars = {}
 
-        cleaned_code = textwrap.dedent(code.strip())
-        tree = ast.parse(cleaned_code)
+def compile_user_code(code: str, tool_names) -> tuple:
+    """Return (PlanShape, code_object) for the LLM code, compiling each distinct source once."""
+    key = hashlib.sha256("\0".join([code, *sorted(tool_names)]).encode("utf-8")).hexdigest()
+    if key in _CODE_CACHE:
+        _CODE_CACHE.move_to_end(key)
+        return _CODE_CACHE[key]
+
+    cleaned_code = textwrap.dedent(code.strip())
+    tree = ast.parse(cleaned_code)
+    shape = analyze_plan(tree, tool_names)
+    compiled = None
+    if plan_rejection(shape) is None:
 
         has_return = any(isinstance(node, ast.Return) for node in tree.body)
         has_result = any(
@@ -116,7 +219,8 @@ async def run_user_code(code: str, multi_mcp) -> dict:
             tree.body.append(ast.Return(value=ast.Name(id="result", ctx=ast.Load())))
 
         tree = KeywordStripper().visit(tree) # strip "key" = "value" cases to only "value"
-        tree = AwaitTransformer(set(tool_funcs)).visit(tree)
+        tree = BatchTransformer(tool_names).visit(tree)
+        tree = AwaitTransformer({*tool_names, "parallel", BATCH_FUNC}).visit(tree)
         ast.fix_missing_locations(tree)
 
         func_def = ast.AsyncFunctionDef(
@@ -127,13 +231,109 @@ async def run_user_code(code: str, multi_mcp) -> dict:
         )
         wrapper = ast.Module(body=[func_def], type_ignores=[])
         ast.fix_missing_locations(wrapper)
-
         compiled = compile(wrapper, filename="<user_code>", mode="exec")
+
+    _CODE_CACHE[key] = (shape, compiled)
+    if len(_CODE_CACHE) > CODE_CACHE_SIZE:
+        _CODE_CACHE.popitem(last=False)
+    return _CODE_CACHE[key]
+
+
+# ───────────────────────────────────────────────────────────────
+# PROCESS SANDBOX (optional, see action/sandbox_pool.py)
+# ───────────────────────────────────────────────────────────────
+_SANDBOX_POOL = None
+
+
+def set_sandbox_pool(pool) -> None:
+    """Route run_user_code through a started SandboxPool (None = run in-process)."""
+    global _SANDBOX_POOL
+    _SANDBOX_POOL = pool
+
+
+def _tool_result_for_worker(value):
+    """Tool results cross the pipe as JSON; MCP error results keep their error-ness."""
+    if isinstance(value, LargeResult):
+        return {"__large_result__": value.to_handle()}  # the worker reopens the spill file itself
+    if getattr(value, "isError", False):
+        try:
+            text = value.content[0].text.strip()
+        except Exception:
+            text = str(value)
+        return {"__tool_error__": True, "text": text}
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return str(value)
+
+
+async def run_in_sandbox_pool(code: str, multi_mcp, pool) -> dict:
+    from action.sandbox_pool import SandboxError
+
+    start_time = time.perf_counter()
+    start_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    async def on_tool_call(tool_name, args):
+        if tool_name == BATCH_FUNC:
+            values = await function_wrapper_many(multi_mcp, [(name, call_args) for name, call_args in args])
+            return [_tool_result_for_worker(value) for value in values]
+        return _tool_result_for_worker(await multi_mcp.function_wrapper(tool_name, *args))
+
+    tool_names = [tool.name for tool in multi_mcp.get_all_tools()]
+    try:
+        shape, _ = compile_user_code(code, tool_names)
+    except SyntaxError:
+        shape = PlanShape()  # the worker reports the syntax error itself
+
+    job = {
+        "code": code,
+        "tools": tool_names,
+        "tool_map_version": getattr(multi_mcp, "tool_map_version", None),
+        "tool_latency": TOOL_STATS.snapshot(tool_names),  # worker derives the same budget
+    }
+    try:
+        result = await pool.run(job, on_tool_call, timeout=plan_budget(shape).timeout + SANDBOX_GRACE_SECONDS)
+    except SandboxError as e:
+        result = {"status": "error", "error": str(e), "execution_time": start_timestamp}
+    result["total_time"] = str(round(time.perf_counter() - start_time, 3))
+    return result
+
+
+# ───────────────────────────────────────────────────────────────
+# MAIN EXECUTOR
+# ───────────────────────────────────────────────────────────────
+async def run_user_code(code: str, multi_mcp) -> dict:
+    if _SANDBOX_POOL is not None:
+        return await run_in_sandbox_pool(code, multi_mcp, _SANDBOX_POOL)
+
+    start_time = time.perf_counter()
+    start_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    try:
+        tool_funcs = get_tool_funcs(multi_mcp)
+        shape, compiled = compile_user_code(code, [name for name in tool_funcs if name not in ("parallel", BATCH_FUNC)])
+        if compiled is None:
+            return {
+                "status": "error",
+                "error": plan_rejection(shape),
+                "execution_time": start_timestamp,
+                "total_time": str(round(time.perf_counter() - start_time, 3))
+            }
+
+        sandbox = build_safe_globals(tool_funcs, multi_mcp)
+        local_vars = {}
+
         exec(compiled, sandbox, local_vars)
 
+        budget = plan_budget(shape)
         try:
-            timeout = max(3, func_count * TIMEOUT_PER_FUNCTION)  # minimum 3s even for plain returns
-            returned = await asyncio.wait_for(local_vars["__main"](), timeout=timeout)
+            # wait_for runs __main in a task that copies this context, guard included
+            token = _RUN_GUARD.set(RunGuard(budget.max_tool_calls, budget.max_concurrency))
+            try:
+                returned = await asyncio.wait_for(local_vars["__main"](), timeout=budget.timeout)
+            finally:
+                _RUN_GUARD.reset(token)
 
             result_value = returned if returned is not None else sandbox.get("result_holder", "None")
 
@@ -162,7 +362,13 @@ async def run_user_code(code: str, multi_mcp) -> dict:
                 "total_time": str(round(time.perf_counter() - start_time, 3))
             }
 
-
+        except asyncio.TimeoutError:
+            return {
+                "status": "error",
+                "error": f"Execution timed out after {budget.timeout} seconds (estimated {budget.estimated_seconds}s)",
+                "execution_time": start_timestamp,
+                "total_time": str(round(time.perf_counter() - start_time, 3))
+            }
         except Exception as e:
             return {
                 "status": "error",
@@ -172,13 +378,6 @@ async def run_user_code(code: str, multi_mcp) -> dict:
             }
 
 
-    except asyncio.TimeoutError:
-        return {
-            "status": "error",
-            "error": f"Execution timed out after {func_count * TIMEOUT_PER_FUNCTION} seconds",
-            "execution_time": start_timestamp,
-            "total_time": str(round(time.perf_counter() - start_time, 3))
-        }
     except Exception as e:
         return {
             "status": "error",
@@ -192,5 +391,5 @@ async def run_user_code(code: str, multi_mcp) -> dict:
 # ───────────────────────────────────────────────────────────────
 def make_tool_proxy(tool_name: str, mcp):
     async def _tool_fn(*args):
-        return await mcp.function_wrapper(tool_name, *args)
+        return await call_tool_guarded(mcp, tool_name, args)
     return _tool_fn
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+Sandbox worker process for action/executor.py (started by SandboxPool as `python -m action.sandbox_worker`).
+
+Runs the same run_user_code() as the in-process path, against a MultiMCP look-alike whose tool
+calls are forwarded to the parent over the pool's pipe.
+"""
+from types import SimpleNamespace
+
+from action.executor import run_user_code, base_globals, BATCH_FUNC
+from action.cost_model import TOOL_STATS
+from mcp_servers.spill import LargeResult
+from action.sandbox_pool import run_worker
+
+TOOL_ERROR_KEY = "__tool_error__"
+
+
+class ToolErrorResult:
+    """Stands in for an MCP CallToolResult with isError=True (run_user_code reports it as an error)."""
+
+    isError = True
+
+    def __init__(self, text: str):
+        self.content = [SimpleNamespace(text=text)]
+
+
+class ParentMCP:
+    def __init__(self, call_tool):
+        self._call_tool = call_tool
+        self.tool_names: list[str] = []
+        self.tool_map_version = None
+
+    def get_all_tools(self):
+        return [SimpleNamespace(name=name) for name in self.tool_names]
+
+    async def function_wrapper(self, tool_name, *args):
+        return self._from_parent(await self._call_tool(tool_name, list(args)))
+
+    async def function_wrapper_batch(self, calls):
+        values = await self._call_tool(BATCH_FUNC, [[tool_name, list(args)] for tool_name, args in calls])
+        return [self._from_parent(value) for value in values]
+
+    @staticmethod
+    def _from_parent(value):
+        if isinstance(value, dict) and value.get(TOOL_ERROR_KEY):
+            return ToolErrorResult(value["text"])
+        if isinstance(value, dict) and "__large_result__" in value:
+            return LargeResult.from_handle(value["__large_result__"])
+        return value
+
+
+_parent_mcp = None
+
+
+async def execute(job: dict, call_tool) -> dict:
+    global _parent_mcp
+    if _parent_mcp is None:
+        _parent_mcp = ParentMCP(call_tool)
+    _parent_mcp.tool_names = job["tools"]
+    _parent_mcp.tool_map_version = job["tool_map_version"]
+    TOOL_STATS.load_snapshot(job["tool_latency"])
+    return await run_user_code(job["code"], _parent_mcp)
+
+
+if __name__ == "__main__":
+    run_worker(execute, warm_up=base_globals)
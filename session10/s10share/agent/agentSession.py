@@ -66,6 +66,7 @@ class AgentSession:
         self.original_query = original_query
         self.perception: Optional[PerceptionSnapshot] = None
         self.plan_versions: list[dict[str, Any]] = []
+        self.trace = None  # agent.tracing.Tracer for the run that produced this session
         self.state = {
             "original_goal_achieved": False,
             "final_answer": None,
@@ -1,38 +1,57 @@
 import uuid
 import json
+import asyncio
 import datetime
 from perception.perception import Perception
 from decision.decision import Decision
+from decision.context_builder import DecisionContextBuilder
 from action.executor import run_user_code
 from agent.agentSession import AgentSession, PerceptionSnapshot, Step, ToolCode
 from memory.session_log import live_update_session
 from memory.memory_search import MemorySearch
+from memory.plan_cache import PlanCache
+from agent.tracing import start_trace, finish_trace, get_tracer
 from mcp_servers.multiMCP import MultiMCP
 
 
 GLOBAL_PREVIOUS_FAILURE_STEPS = 3
 
 class AgentLoop:
-    def __init__(self, perception_prompt_path: str, decision_prompt_path: str, multi_mcp: MultiMCP, strategy: str = "exploratory"):
-        self.perception = Perception(perception_prompt_path)
-        self.decision = Decision(decision_prompt_path, multi_mcp)
+    def __init__(self, perception_prompt_path: str, decision_prompt_path: str, multi_mcp: MultiMCP, strategy: str = "exploratory", llm_client=None, use_plan_cache: bool = True):
+        self.perception = Perception(perception_prompt_path, client=llm_client)
+        self.decision = Decision(decision_prompt_path, multi_mcp, client=llm_client)
         self.multi_mcp = multi_mcp
         self.strategy = strategy
+        self.plan_cache = PlanCache() if use_plan_cache else None
+        self.context_builder = DecisionContextBuilder()
+        self._early_execution = None  # (code, future) started while the decision was still streaming
 
     async def run(self, query: str):
         session = AgentSession(session_id=str(uuid.uuid4()), original_query=query)
+        tracer = start_trace(session.session_id)
+        session.trace = tracer
+        try:
+            with tracer.span("agent.session", query=query):
+                return await self.run_session(session, query)
+        finally:
+            finish_trace(tracer)
+
+    async def run_session(self, session, query: str):
         session_memory= []
         self.log_session_start(session, query)
 
         memory_results = self.search_memory(query)
-        perception_result = self.run_perception(query, memory_results, memory_results)
+        perception_result = await self.run_perception(query, memory_results, memory_results)
         session.add_perception(PerceptionSnapshot(**perception_result))
 
         if perception_result.get("original_goal_achieved"):
             self.handle_perception_completion(session, perception_result)
             return session
 
-        decision_output = self.make_initial_decision(query, perception_result)
+        if await self.replay_cached_plan(session, query, perception_result):
+            return session
+
+        decision_output = await self.make_initial_decision(query, perception_result)
         step = session.add_plan_version(decision_output["plan_text"], [self.create_step(decision_output)])
         live_update_session(session)
         print(f"\n[Decision Plan Text: V{len(session.plan_versions)}]:")
@@ -43,8 +62,11 @@ class AgentLoop:
             step_result = await self.execute_step(step, session, session_memory)
             if step_result is None:
                 break  # 🔐 protect against CONCLUDE/NOP cases
-            step = self.evaluate_step(step_result, session, query)
+            step = await self.evaluate_step(step_result, session, query)
 
+        if self.plan_cache:
+            with get_tracer().span("plan_cache.store"):
+                self.plan_cache.store(session)
         return session
 
     def log_session_start(self, session, query):
@@ -54,8 +76,10 @@ class AgentLoop:
 
     def search_memory(self, query):
         print("Searching Recent Conversation History")
-        searcher = MemorySearch()
-        results = searcher.search_memory(query)
+        with get_tracer().span("memory.search") as span:
+            searcher = MemorySearch()
+            results = searcher.search_memory(query)
+            span.set(matches=len(results))
         if not results:
             print("❌ No matching memory entries found.\n")
         else:
@@ -64,7 +88,7 @@ class AgentLoop:
                 print(f"[{i}] File: {res['file']}\nQuery: {res['query']}\nResult Requirement: {res['result_requirement']}\nSummary: {res['solution_summary']}\n")
         return results
 
-    def run_perception(self, query, memory_results, session_memory=None, snapshot_type="user_query", current_plan=None):
+    async def run_perception(self, query, memory_results, session_memory=None, snapshot_type="user_query", current_plan=None):
         combined_memory = (memory_results or []) + (session_memory or [])
         perception_input = self.perception.build_perception_input(
             raw_input=query, 
@@ -72,7 +96,9 @@ class AgentLoop:
             current_plan=current_plan, 
             snapshot_type=snapshot_type
         )
-        perception_result = self.perception.run(perception_input)
+        with get_tracer().span("perception", snapshot_type=snapshot_type):
+            # the model client is synchronous; keep it off the event loop so concurrent sessions overlap
+            perception_result = await asyncio.to_thread(self.perception.run, perception_input)
         print("\n[Perception Result]:")
         print(json.dumps(perception_result, indent=2, ensure_ascii=False))
         return perception_result
@@ -88,16 +114,99 @@ class AgentLoop:
         })
         live_update_session(session)
 
-    def make_initial_decision(self, query, perception_result):
+    async def replay_cached_plan(self, session, query, perception_result):
+        """
+        Replay the code of a past successful session with a matching query shape.
+        All cached steps run back to back and a single perception call verifies the final result.
+        Returns True if the session was completed from cache, False to fall back to the decision LLM.
+        """
+        cached = self.plan_cache.lookup(query, perception_result.get("entities", [])) if self.plan_cache else None
+        if not cached:
+            return False
+
+        print(f"\n♻️ Replaying cached plan from session {cached['source_session']} (shape: {cached['shape']})")
+        steps = [
+            Step(
+                index=i,
+                description=f"Replay cached step {i}",
+                type="CODE",
+                code=ToolCode(tool_name="raw_code_block", tool_arguments={"code": code}),
+            )
+            for i, code in enumerate(cached["codes"])
+        ]
+        session.add_plan_version(cached["plan_text"], steps)
+
+        for step in steps:
+            print("-" * 50, "\n[EXECUTING CACHED CODE]\n", step.code.tool_arguments["code"])
+            with get_tracer().span("executor.run_user_code", step_index=step.index, cached=True):
+                step.execution_result = await run_user_code(step.code.tool_arguments["code"], self.multi_mcp)
+            step.status = "completed"
+            if step.execution_result.get("status") != "success":
+                print("\n⚠️ Cached plan failed during replay. Falling back to decision.")
+                step.status = "failed"
+                live_update_session(session)
+                return False
+
+        last = steps[-1]
+        perception_result = await self.run_perception(
+            query=last.execution_result.get("result", "Tool Failed"),
+            memory_results=[],
+            current_plan=cached["plan_text"],
+            snapshot_type="step_result"
+        )
+        last.perception = PerceptionSnapshot(**perception_result)
+        if not last.perception.original_goal_achieved:
+            print("\n⚠️ Cached plan result not accepted by perception. Falling back to decision.")
+            live_update_session(session)
+            return False
+
+        print("\n✅ Goal achieved from cached plan.")
+        session.mark_complete(last.perception)
+        live_update_session(session)
+        return True
+
+    async def make_initial_decision(self, query, perception_result):
         decision_input = {
             "plan_mode": "initial",
             "planning_strategy": self.strategy,
             "original_query": query,
             "perception": perception_result
         }
-        decision_output = self.decision.run(decision_input)
+        decision_output = await self.run_decision(decision_input)
+        return decision_output
+
+    async def run_decision(self, decision_input):
+        """
+        The decision streams in a worker thread. As soon as the "code" field of a CODE step closes,
+        run_user_code starts on the event loop while the rest of the object (plan_text, ...) arrives;
+        execute_step then awaits that run instead of starting the code again.
+        """
+        loop = asyncio.get_running_loop()
+        fields = {}
+
+        def on_field(key, value):
+            fields[key] = value
+            if key == "code" and value and fields.get("type") == "CODE" and "execution" not in fields:
+                fields["execution"] = asyncio.run_coroutine_threadsafe(run_user_code(value, self.multi_mcp), loop)
+
+        with get_tracer().span("decision", plan_mode=decision_input["plan_mode"]) as span:
+            decision_output = await asyncio.to_thread(self.decision.run, decision_input, on_field)
+            span.set(step_type=decision_output.get("type", "NOP"), early_execution="execution" in fields,
+                     **{f"tokens.{k}": v for k, v in self.decision.last_token_counts.items() if v is not None})
+
+        self._discard_early_execution()
+        if "execution" in fields:
+            if decision_output.get("type") == "CODE" and decision_output.get("code") == fields["code"]:
+                self._early_execution = (fields["code"], asyncio.wrap_future(fields["execution"]))
+            else:
+                fields["execution"].cancel()  # final object disagrees with the streamed field
         return decision_output
 
+    def _discard_early_execution(self):
+        if self._early_execution:
+            self._early_execution[1].cancel()
+            self._early_execution = None
+
     def create_step(self, decision_output):
         return Step(
             index=decision_output["step_index"],
@@ -112,12 +221,22 @@ class AgentLoop:
 
         if step.type == "CODE":
             print("-" * 50, "\n[EXECUTING CODE]\n", step.code.tool_arguments["code"])
-            executor_response = await run_user_code(step.code.tool_arguments["code"], self.multi_mcp)
+            code = step.code.tool_arguments["code"]
+            early, self._early_execution = self._early_execution, None
+            with get_tracer().span("executor.run_user_code", step_index=step.index) as span:
+                if early and early[0] == code:
+                    executor_response = await early[1]  # started while the decision streamed
+                    span.set(early=True)
+                else:
+                    if early:
+                        early[1].cancel()
+                    executor_response = await run_user_code(code, self.multi_mcp)
+                span.set(status=executor_response.get("status"))
             step.execution_result = executor_response
             #import pdb; pdb.set_trace()
             step.status = "completed"
 
-            perception_result = self.run_perception(
+            perception_result = await self.run_perception(
                 query=executor_response.get('result', 'Tool Failed'),
                 memory_results=session_memory,
                 current_plan=session.plan_versions[-1]["plan_text"],
@@ -144,7 +263,7 @@ class AgentLoop:
             step.execution_result = step.conclusion
             step.status = "completed"
 
-            perception_result = self.run_perception(
+            perception_result = await self.run_perception(
                 query=step.conclusion,
                 memory_results=session_memory,
                 current_plan=session.plan_versions[-1]["plan_text"],
@@ -161,25 +280,33 @@ class AgentLoop:
             live_update_session(session)
             return None
 
-    def evaluate_step(self, step, session, query):
+    def build_mid_session_input(self, session, query, step):
+        completed_steps = [
+            s for version in session.plan_versions for s in version["steps"] if s.status == "completed"
+        ]
+        step_context = self.context_builder.build(completed_steps, step)
+        print(f"📏 Step context ≈{self.context_builder.last_token_estimate} tokens "
+              f"(budget {self.context_builder.token_budget}, {step_context.get('omitted_steps', 0)} steps omitted)")
+        return {
+            "plan_mode": "mid_session",
+            "planning_strategy": self.strategy,
+            "original_query": query,
+            "current_plan_version": len(session.plan_versions),
+            "current_plan": session.plan_versions[-1]["plan_text"],
+            **step_context
+        }
+
+    async def evaluate_step(self, step, session, query):
         if step.perception.original_goal_achieved:
             print("\n✅ Goal achieved.")
             session.mark_complete(step.perception)
             live_update_session(session)
             return None
         elif step.perception.local_goal_achieved:
-            return self.get_next_step(session, query, step)
+            return await self.get_next_step(session, query, step)
         else:
             print("\n🔁 Step unhelpful. Replanning.")
-            decision_output = self.decision.run({
-                "plan_mode": "mid_session",
-                "planning_strategy": self.strategy,
-                "original_query": query,
-                "current_plan_version": len(session.plan_versions),
-                "current_plan": session.plan_versions[-1]["plan_text"],
-                "completed_steps": [s.to_dict() for s in session.plan_versions[-1]["steps"] if s.status == "completed"],
-                "current_step": step.to_dict()
-            })
+            decision_output = await self.run_decision(self.build_mid_session_input(session, query, step))
             step = session.add_plan_version(decision_output["plan_text"], [self.create_step(decision_output)])
 
             print(f"\n[Decision Plan Text: V{len(session.plan_versions)}]:")
@@ -188,19 +315,11 @@ class AgentLoop:
 
             return step
 
-    def get_next_step(self, session, query, step):
+    async def get_next_step(self, session, query, step):
         next_index = step.index + 1
         total_steps = len(session.plan_versions[-1]["plan_text"])
         if next_index < total_steps:
-            decision_output = self.decision.run({
-                "plan_mode": "mid_session",
-                "planning_strategy": self.strategy,
-                "original_query": query,
-                "current_plan_version": len(session.plan_versions),
-                "current_plan": session.plan_versions[-1]["plan_text"],
-                "completed_steps": [s.to_dict() for s in session.plan_versions[-1]["steps"] if s.status == "completed"],
-                "current_step": step.to_dict()
-            })
+            decision_output = await self.run_decision(self.build_mid_session_input(session, query, step))
             step = session.add_plan_version(decision_output["plan_text"], [self.create_step(decision_output)])
 
             print(f"\n[Decision Plan Text: V{len(session.plan_versions)}]:")
@@ -0,0 +1,117 @@
+import json
+from typing import Any, Callable, Optional
+
+
+class StreamingJsonParser:
+    """
+    Incrementally scan streamed LLM text for the first JSON object (inside a ```json fence if present).
+    Each top-level field is reported as soon as its value closes, and `done` flips as soon as the
+    object itself closes, so callers can stop generation instead of paying for trailing prose.
+    """
+
+    def __init__(self, on_field: Optional[Callable[[str, Any], None]] = None):
+        self.on_field = on_field
+        self.buffer = ""
+        self.fields: dict[str, Any] = {}
+        self.done = False
+        self.usage = None
+        self._start = None        # index of the opening "{"
+        self._pos = 0             # next char to scan
+        self._field_start = None  # start of the current top-level "key": value segment
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def _find_start(self) -> None:
+        fence = self.buffer.find("```json")
+        search_from = fence + len("```json") if fence != -1 else 0
+        brace = self.buffer.find("{", search_from)
+        if brace != -1:
+            self._start = brace
+            self._pos = brace
+
+    def _emit(self, end: int) -> None:
+        segment = self.buffer[self._field_start:end].strip()
+        self._field_start = end + 1
+        if not segment:
+            return
+        try:
+            key, value = next(iter(json.loads("{" + segment + "}").items()))
+        except (json.JSONDecodeError, StopIteration):
+            return
+        self.fields[key] = value
+        if self.on_field:
+            self.on_field(key, value)
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk of streamed text. Returns True once the JSON object has closed."""
+        if self.done:
+            return True
+        self.buffer += chunk
+        if self._start is None:
+            self._find_start()
+            if self._start is None:
+                return False
+
+        buf = self.buffer
+        for i in range(self._pos, len(buf)):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._field_start = i + 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(i)
+                    self._pos = i + 1
+                    self.done = True
+                    return True
+            elif ch == "," and self._depth == 1:
+                self._emit(i)
+
+        self._pos = len(buf)
+        return False
+
+    def json_text(self) -> Optional[str]:
+        """Raw text of the completed JSON object, or None if it has not closed yet."""
+        if not self.done:
+            return None
+        return self.buffer[self._start:self._pos]
+
+    def result(self) -> dict:
+        return json.loads(self.json_text())
+
+
+def generate_json_stream(client, model: str, contents: str, on_field: Optional[Callable[[str, Any], None]] = None) -> tuple[str, StreamingJsonParser]:
+    """
+    Stream a Gemini completion into a StreamingJsonParser and stop reading as soon as the
+    JSON object closes. Returns the raw text received so far together with the parser;
+    parser.usage holds the latest usage_metadata reported by the stream, if any.
+    """
+    parser = StreamingJsonParser(on_field=on_field)
+    raw_parts = []
+    stream = client.models.generate_content_stream(model=model, contents=contents)
+    try:
+        for chunk in stream:
+            parser.usage = getattr(chunk, "usage_metadata", None) or parser.usage
+            text = chunk.text or ""
+            raw_parts.append(text)
+            if parser.feed(text):
+                break
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            close()  # abort generation, trailing prose is never requested
+    return "".join(raw_parts), parser
@@ -1,9 +1,13 @@
 import os
 import json
+import time
 import yaml
-import requests
+import asyncio
+import httpx
 from pathlib import Path
+from functools import lru_cache
 from google import genai
+from google.genai.errors import ClientError, ServerError
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,32 +16,90 @@ ROOT = Path(__file__).parent.parent
 MODELS_JSON = ROOT / "config" / "models.json"
 PROFILE_YAML = ROOT / "config" / "profiles.yaml"
 
-class ModelManager:
-    def __init__(self):
-        self.config = json.loads(MODELS_JSON.read_text())
-        self.profile = yaml.safe_load(PROFILE_YAML.read_text())
+DEFAULT_MAX_CONCURRENCY = {"gemini": 4, "ollama": 2}
+DEFAULT_REQUESTS_PER_MINUTE = {"gemini": 60, "ollama": 0}  # 0 = unlimited
+OLLAMA_TIMEOUT = httpx.Timeout(120.0, connect=5.0)
+BACKEND_COOLDOWN = 30.0  # seconds a backend that failed or was rate-limited goes to the back of the route
 
-        self.text_model_key = self.profile["llm"]["text_generation"]
-        self.model_info = self.config["models"][self.text_model_key]
-        self.model_type = self.model_info["type"]
 
-        # ✅ Gemini initialization (your style)
-        if self.model_type == "gemini":
-            api_key = os.getenv("GEMINI_API_KEY")
-            self.client = genai.Client(api_key=api_key)
+@lru_cache(maxsize=1)
+def load_model_config() -> tuple[dict, dict]:
+    """Read models.json + profiles.yaml once per process instead of once per ModelManager."""
+    config = json.loads(MODELS_JSON.read_text())
+    profile = yaml.safe_load(PROFILE_YAML.read_text())
+    return config, profile
 
-    async def generate_text(self, prompt: str) -> str:
-        if self.model_type == "gemini":
-            return self._gemini_generate(prompt)
 
-        elif self.model_type == "ollama":
-            return self._ollama_generate(prompt)
+class _Backend:
+    """
+    Shared state for one configured model: connection pool, concurrency limit and rate limit.
+    Instances live for the whole process (see _BACKENDS), so every ModelManager shares them.
+    """
+
+    def __init__(self, key: str, info: dict):
+        self.key = key
+        self.info = info
+        self.type = info["type"]
+        self.max_concurrency = info.get("max_concurrency", DEFAULT_MAX_CONCURRENCY.get(self.type, 2))
+        rpm = info.get("requests_per_minute", DEFAULT_REQUESTS_PER_MINUTE.get(self.type, 0))
+        self.min_interval = 60.0 / rpm if rpm else 0.0
+        self._loop = None
+        self._client = None
+        self.cooldown_until = 0.0
+
+    async def _bind(self):
+        # asyncio primitives and httpx pools belong to one event loop; rebuild if asyncio.run() is called again
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        stale = self._client
+        self._loop = loop
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.rate_lock = asyncio.Lock()
+        self.next_slot = 0.0
+        if self.type == "ollama":
+            self._client = httpx.AsyncClient(
+                timeout=OLLAMA_TIMEOUT,
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+            )
+        elif self.type == "gemini":
+            api_key = os.getenv(self.info.get("api_key_env", "GEMINI_API_KEY"))
+            self._client = genai.Client(api_key=api_key).aio
+        if stale is not None:
+            await self._close_client(stale)  # after rebinding, so concurrent callers see the new pool
+
+    def saturated(self) -> bool:
+        if self._loop is not asyncio.get_running_loop():
+            return False  # not used on this loop yet, so nothing is in flight
+        # every slot busy, or callers already queued behind the rate limit
+        return self.semaphore.locked() or self.next_slot - time.monotonic() > self.min_interval
+
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    async def _throttle(self):
+        if not self.min_interval:
+            return
+        async with self.rate_lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.min_interval
+        if wait > 0:
+            await asyncio.sleep(wait)
 
-        raise NotImplementedError(f"Unsupported model type: {self.model_type}")
+    async def generate(self, prompt: str) -> str:
+        await self._bind()
+        await self._throttle()  # before taking a slot, so rate-limited callers don't pin concurrency
+        async with self.semaphore:
+            if self.type == "gemini":
+                return await self._gemini_generate(prompt)
+            elif self.type == "ollama":
+                return await self._ollama_generate(prompt)
+        raise NotImplementedError(f"Unsupported model type: {self.type}")
 
-    def _gemini_generate(self, prompt: str) -> str:
-        response = self.client.models.generate_content(
-            model=self.model_info["model"],
+    async def _gemini_generate(self, prompt: str) -> str:
+        response = await self._client.models.generate_content(
+            model=self.info["model"],
             contents=prompt
         )
 
@@ -50,10 +112,93 @@ class ModelManager:
             except Exception:
                 return str(response)
 
-    def _ollama_generate(self, prompt: str) -> str:
-        response = requests.post(
-            self.model_info["url"]["generate"],
-            json={"model": self.model_info["model"], "prompt": prompt, "stream": False}
+    async def _ollama_generate(self, prompt: str) -> str:
+        response = await self._client.post(
+            self.info["url"]["generate"],
+            json={"model": self.info["model"], "prompt": prompt, "stream": False}
         )
         response.raise_for_status()
         return response.json()["response"].strip()
+
+    async def _close_client(self, client):
+        if self.type == "ollama" and client is not None:
+            try:
+                await client.aclose()
+            except Exception as e:  # pool created on an event loop that has since closed
+                print(f"⚠️ {self.key}: closing previous connection pool failed ({e})")
+
+    async def aclose(self):
+        client, self._client, self._loop = self._client, None, None
+        await self._close_client(client)
+
+
+_BACKENDS: dict[str, _Backend] = {}
+
+
+def _fallback_eligible(error: Exception) -> bool:
+    """Transport/server failures and rate limiting (429) are worth another backend; bad requests aren't."""
+    if isinstance(error, (httpx.TransportError, httpx.HTTPStatusError, ServerError)):
+        return True
+    return isinstance(error, ClientError) and error.code == 429
+
+
+def get_backend(model_key: str) -> _Backend:
+    if model_key not in _BACKENDS:
+        config, _ = load_model_config()
+        _BACKENDS[model_key] = _Backend(model_key, config["models"][model_key])
+    return _BACKENDS[model_key]
+
+
+class ModelManager:
+    """
+    Async text generation routed across configured backends.
+
+    `role` selects a route from profiles.yaml, e.g.
+
+        llm:
+          text_generation: gemini
+          routing:
+            perception: [gemini, phi4]   # local model takes over while Gemini is saturated
+            decision: [gemini]
+
+    Candidates are tried in order; a backend whose concurrency or rate limit is reached is skipped
+    in favour of the next one. If every candidate is saturated the primary one is awaited
+    (backpressure). A transport failure, server error or 429 falls through to the next candidate
+    and puts the failing backend at the back of the route for BACKEND_COOLDOWN seconds.
+    """
+
+    def __init__(self, role: str | None = None):
+        self.config, self.profile = load_model_config()
+        self.role = role
+
+        self.text_model_key = self.profile["llm"]["text_generation"]
+        routing = self.profile["llm"].get("routing") or {}
+        self.route = [k for k in routing.get(role, [self.text_model_key]) if k in self.config["models"]] or [self.text_model_key]
+
+        self.model_info = self.config["models"][self.route[0]]
+        self.model_type = self.model_info["type"]
+
+    def _ordered_backends(self) -> list[_Backend]:
+        backends = [get_backend(key) for key in self.route]
+        healthy = [b for b in backends if not b.cooling_down()]
+        free = [b for b in healthy if not b.saturated()]
+        return free + [b for b in healthy if b not in free] + [b for b in backends if b not in healthy]
+
+    async def generate_text(self, prompt: str) -> str:
+        last_error = None
+        for backend in self._ordered_backends():
+            try:
+                return await backend.generate(prompt)
+            except Exception as e:
+                if not _fallback_eligible(e):
+                    raise
+                print(f"⚠️ {backend.key} failed ({e}), trying next backend")
+                backend.cooldown_until = time.monotonic() + BACKEND_COOLDOWN
+                last_error = e
+        raise last_error
+
+    @staticmethod
+    async def shutdown():
+        """Close pooled connections of every backend."""
+        for backend in _BACKENDS.values():
+            await backend.aclose()
@@ -0,0 +1,178 @@
+import json
+import time
+import secrets
+import contextvars
+from pathlib import Path
+from contextlib import contextmanager
+from collections import defaultdict
+from typing import Any, Optional
+
+SERVICE_NAME = "s10-agent"
+TRACE_DIR = "memory/traces"
+
+_current_tracer: contextvars.ContextVar[Optional["Tracer"]] = contextvars.ContextVar("tracer", default=None)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("span", default=None)
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+        self._token = _current_span.set(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            pass  # ended from a different context than it was started in
+        self.tracer.spans.append(self)
+
+    def to_otlp(self, trace_id: str) -> dict:
+        span = {
+            "traceId": trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class Tracer:
+    """
+    Collects timing spans for one agent session and exports them as OTLP/JSON
+    (the format accepted by the OpenTelemetry collector's file receiver and most trace viewers).
+    """
+
+    def __init__(self, session_id: str, trace_dir: str = TRACE_DIR):
+        self.session_id = session_id
+        self.trace_id = secrets.token_hex(16)
+        self.trace_dir = Path(trace_dir)
+        self.spans: list[Span] = []
+
+    def start_span(self, name: str, **attributes) -> Span:
+        """Start a span that must be closed with span.end(); use span() where a with-block fits."""
+        return Span(self, name, _current_span.get(), attributes)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        span = self.start_span(name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(error=e)
+            raise
+        span.end()
+
+    def to_otlp(self) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": SERVICE_NAME}},
+                    {"key": "session.id", "value": {"stringValue": self.session_id}},
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "agent.tracing"},
+                    "spans": [s.to_otlp(self.trace_id) for s in sorted(self.spans, key=lambda s: s.start_ns)],
+                }],
+            }]
+        }
+
+    def export(self) -> Path:
+        self.trace_dir.mkdir(parents=True, exist_ok=True)
+        path = self.trace_dir / f"{self.session_id}.json"
+        path.write_text(json.dumps(self.to_otlp(), indent=2), encoding="utf-8")
+        return path
+
+    def summary(self) -> dict[str, dict]:
+        stats = defaultdict(list)
+        for span in self.spans:
+            stats[span.name].append(span.duration_ms)
+        return {
+            name: {"count": len(d), "total_ms": round(sum(d), 1), "avg_ms": round(sum(d) / len(d), 1), "max_ms": round(max(d), 1)}
+            for name, d in stats.items()
+        }
+
+    def print_summary(self) -> None:
+        print("\n[Latency Summary]:")
+        rows = sorted(self.summary().items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+        for name, s in rows:
+            print(f"  {name:<28} n={s['count']:<3} total={s['total_ms']:>9.1f}ms  avg={s['avg_ms']:>8.1f}ms  max={s['max_ms']:>8.1f}ms")
+
+
+class _NoopSpan:
+    def set(self, **attributes) -> None:
+        pass
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        pass
+
+
+class _NoopTracer:
+    """Used when no session trace is active, so instrumented code never has to check."""
+
+    def start_span(self, name: str, **attributes) -> _NoopSpan:
+        return _NoopSpan()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        yield _NoopSpan()
+
+
+_NOOP = _NoopTracer()
+
+
+def start_trace(session_id: str) -> Tracer:
+    tracer = Tracer(session_id)
+    _current_tracer.set(tracer)
+    return tracer
+
+
+def get_tracer():
+    return _current_tracer.get() or _NOOP
+
+
+def finish_trace(tracer: Tracer) -> None:
+    """Export and summarize; called from a finally, so it must never replace the session's own outcome."""
+    _current_tracer.set(None)
+    try:
+        path = tracer.export()
+    except Exception as e:
+        print(f"⚠️ Could not export trace for session {tracer.session_id}: {e}")
+        path = None
+    tracer.print_summary()
+    if path:
+        print(f"🧭 Trace exported: {path}")
@@ -0,0 +1,99 @@
+"""
+HTML → text benchmark: the budgeted streaming extractor (mcp_servers/html_text.py) against the
+BeautifulSoup path fetch_and_parse used before.
+
+    python benchmarks/bench_html_extract.py --pages saved_pages/ --repeat 5
+
+--pages takes .html files (e.g. saved with `curl -o`). Without it a few synthetic pages of growing
+size are generated. The BeautifulSoup column is skipped when bs4 is not installed.
+"""
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "mcp_servers"))
+
+from html_text import html_to_text, MAX_TEXT_CHARS
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+
+def legacy_extract(html: str, max_chars: int = MAX_TEXT_CHARS) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    for element in soup(["script", "style", "nav", "header", "footer"]):
+        element.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    text = " ".join(chunk for chunk in chunks if chunk)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text[:max_chars]
+
+
+def streaming_extract(html: str, max_chars: int = MAX_TEXT_CHARS) -> str:
+    return html_to_text(html, max_chars)[0]
+
+
+def synthetic_page(paragraphs: int) -> str:
+    body = "".join(
+        f"<div class='c'><h2>Section {i}</h2><p>Lorem <b>ipsum</b> dolor sit amet, "
+        f"consectetur &amp; adipiscing elit {i}.</p><script>var x{i} = '{i}';</script></div>\n"
+        for i in range(paragraphs)
+    )
+    return f"<html><head><style>p{{}}</style></head><body><nav>menu</nav>{body}<footer>f</footer></body></html>"
+
+
+def measure(extract, html: str, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(html)
+        times.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    extract(html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"ms_p50": round(statistics.median(times), 2), "peak_kb": round(peak / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML to text extraction benchmark")
+    parser.add_argument("--pages", help="directory of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-chars", type=int, default=MAX_TEXT_CHARS)
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = {p.name: p.read_text(encoding="utf-8", errors="replace") for p in sorted(Path(args.pages).glob("*.htm*"))}
+    else:
+        pages = {f"synthetic_{n}": synthetic_page(n) for n in (100, 2_000, 20_000)}
+
+    extractors = {"streaming": streaming_extract}
+    if BeautifulSoup is not None:
+        extractors["beautifulsoup"] = legacy_extract
+    else:
+        print("⚠️ bs4 not installed, only the streaming extractor is measured")
+
+    report = {}
+    for name, html in pages.items():
+        report[name] = {"html_kb": round(len(html) / 1024, 1)}
+        for label, extract in extractors.items():
+            report[name][label] = measure(lambda h: extract(h, args.max_chars), html, args.repeat)
+        print(f"{name:30} {json.dumps(report[name])}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
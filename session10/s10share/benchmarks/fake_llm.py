@@ -0,0 +1,138 @@
+import re
+import json
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Dict
+
+
+def _fenced(payload: dict) -> str:
+    return f"```json\n{json.dumps(payload, indent=2)}\n```"
+
+
+def scenario_from_session(session: dict) -> Dict:
+    """
+    Turn one stored session log (memory/session_logs/**/<id>.json) into the exact sequence of
+    perception and decision responses the agent received, so the run can be replayed offline.
+    """
+    perceptions = [session["perception"]] if session.get("perception") else []
+    decisions = []
+    for version in session.get("plan_versions", []):
+        for step in version["steps"]:
+            code = (step.get("code") or {}).get("tool_arguments", {}).get("code", "")
+            decisions.append({
+                "step_index": step["index"],
+                "description": step["description"],
+                "type": step["type"],
+                "code": code,
+                "conclusion": step.get("conclusion") or "",
+                "plan_text": version["plan_text"],
+            })
+            if step.get("perception"):
+                perceptions.append(step["perception"])
+    return {"query": session["original_query"], "perceptions": perceptions, "decisions": decisions}
+
+
+def load_scenarios(logs_path: str) -> List[Dict]:
+    scenarios = []
+    for file in sorted(Path(logs_path).rglob("*.json")):
+        try:
+            session = json.loads(file.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            continue
+        if isinstance(session, dict) and session.get("original_query") and session.get("perception"):
+            scenario = scenario_from_session(session)
+            if scenario["decisions"] or scenario["perceptions"][0].get("original_goal_achieved"):
+                scenarios.append(scenario)
+    return scenarios
+
+
+# Used when no session logs are available: one two-tool CODE step followed by success.
+BUILTIN_SCENARIOS = [{
+    "query": "What is the factorial of 5 plus 10?",
+    "perceptions": [
+        {
+            "entities": ["5", "10"], "result_requirement": "A single number.",
+            "original_goal_achieved": False, "reasoning": "Needs computation.",
+            "local_goal_achieved": False, "local_reasoning": "Tools required.",
+            "last_tooluse_summary": "None", "solution_summary": "Not ready yet", "confidence": "0.9"
+        },
+        {
+            "entities": ["130"], "result_requirement": "A single number.",
+            "original_goal_achieved": True, "reasoning": "5! + 10 = 130.",
+            "local_goal_achieved": True, "local_reasoning": "Tool output is the answer.",
+            "last_tooluse_summary": "factorial, add", "solution_summary": "The answer is 130.", "confidence": "0.95"
+        },
+    ],
+    "decisions": [{
+        "step_index": 0,
+        "description": "Compute factorial of 5 and add 10.",
+        "type": "CODE",
+        "code": "x = factorial(5)\nresult = add(x, 10)\nreturn result",
+        "conclusion": "",
+        "plan_text": ["Step 0: Compute factorial(5) + 10 with tools."],
+    }],
+}]
+
+
+# Raw step results the executor hands perception when the code or a tool call failed
+FAILED_STEP_RESULT = re.compile(r"^(Tool Failed|Error\b)|isError=True", re.IGNORECASE)
+
+# Answered once the recorded decisions run out (the replay diverged from the recording): stop the session
+EXHAUSTED_DECISION = {
+    "step_index": 0,
+    "description": "Replay has no more recorded decisions.",
+    "type": "NOP",
+    "code": "",
+    "conclusion": "",
+    "plan_text": ["Step 0: Recording exhausted."],
+}
+
+
+def _perception_input(contents: str) -> dict:
+    """The JSON block Perception.run appends to its prompt."""
+    try:
+        return json.loads(contents.rsplit("```json", 1)[1].rsplit("```", 1)[0])
+    except (IndexError, json.JSONDecodeError):
+        return {}
+
+
+class _ReplayModels:
+    def __init__(self, scenario: Dict, latency: float):
+        self.perceptions = list(scenario["perceptions"])
+        self.decisions = list(scenario["decisions"])
+        self.latency = latency
+        self.calls = {"perception": 0, "decision": 0}
+
+    def _next(self, contents: str) -> str:
+        kind = "decision" if '"plan_mode"' in contents else "perception"
+        index = self.calls[kind]
+        self.calls[kind] += 1
+        if kind == "decision":
+            payload = self.decisions[index] if index < len(self.decisions) else EXHAUSTED_DECISION
+        else:
+            # Past the end of the recording, keep answering with the last perception
+            payload = self.perceptions[min(index, len(self.perceptions) - 1)]
+            step = _perception_input(contents)
+            if step.get("snapshot_type") == "step_result" and FAILED_STEP_RESULT.search(str(step.get("raw_input", ""))):
+                # The recording saw this step succeed; this run's tools didn't, so neither goal is met
+                payload = {**payload, "original_goal_achieved": False, "local_goal_achieved": False,
+                           "reasoning": "Replayed step failed.", "local_reasoning": "Tool call failed in this run."}
+        if self.latency:
+            time.sleep(self.latency)  # the agent calls the model from a worker thread
+        return _fenced(payload)
+
+    def generate_content_stream(self, model: str, contents: str):
+        text = self._next(contents)
+        for i in range(0, len(text), 64):
+            yield SimpleNamespace(text=text[i:i + 64], usage_metadata=None)
+
+    def generate_content(self, model: str, contents: str):
+        return SimpleNamespace(text=self._next(contents))
+
+
+class ReplayClient:
+    """Deterministic stand-in for google.genai.Client that replays one recorded scenario."""
+
+    def __init__(self, scenario: Dict, latency: float = 0.0):
+        self.models = _ReplayModels(scenario, latency)
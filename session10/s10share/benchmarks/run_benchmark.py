@@ -0,0 +1,145 @@
+"""
+Offline benchmark for the agent loop.
+
+Replays recorded perception/decision responses from stored session logs through a deterministic
+fake model (benchmarks/fake_llm.py) and serves tools from a local stub MCP server, so the numbers
+reflect AgentLoop / MultiMCP / executor overhead only. The plan cache is off unless --plan-cache is
+given, so repeated queries still go through decision; with it, replayed sessions are counted separately.
+
+    python benchmarks/run_benchmark.py --sessions 20 --concurrency 4 --tool-latency-ms 5
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+import contextlib
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")  # clients are created at import time, never used
+
+from mcp_servers.multiMCP import MultiMCP
+from agent.agent_loop2 import AgentLoop
+from benchmarks.fake_llm import ReplayClient, load_scenarios, BUILTIN_SCENARIOS
+
+
+def distribution(values: list[float]) -> dict:
+    if not values:
+        return {"n": 0}
+    ordered = sorted(values)
+    pct = lambda p: ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+    return {
+        "n": len(ordered),
+        "mean": round(statistics.fmean(ordered), 2),
+        "p50": round(pct(50), 2),
+        "p90": round(pct(90), 2),
+        "p99": round(pct(99), 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+async def run_session(scenario: dict, multi_mcp: MultiMCP, llm_latency: float, plan_cache: bool) -> dict:
+    loop = AgentLoop(
+        perception_prompt_path=str(ROOT / "prompts" / "perception_prompt.txt"),
+        decision_prompt_path=str(ROOT / "prompts" / "decision_prompt.txt"),
+        multi_mcp=multi_mcp,
+        llm_client=ReplayClient(scenario, latency=llm_latency),
+        use_plan_cache=plan_cache,
+    )
+    start = time.perf_counter()
+    session = await loop.run(scenario["query"])
+    wall = time.perf_counter() - start
+
+    spans = session.trace.spans
+    by_name = lambda name: [s.duration_ms for s in spans if s.name == name]
+    return {
+        "query": scenario["query"],
+        "wall_s": wall,
+        "steps": sum(len(v["steps"]) for v in session.plan_versions),
+        "goal_achieved": bool(session.state["original_goal_achieved"]),
+        "plan_cache_replay": any(s.attributes.get("cached") for s in spans if s.name == "executor.run_user_code"),
+        "tool_ms": by_name("mcp.call_tool"),
+        "spawn_ms": by_name("mcp.spawn"),
+        "execute_ms": by_name("mcp.execute"),
+    }
+
+
+async def benchmark(args) -> dict:
+    scenarios = load_scenarios(args.logs) or BUILTIN_SCENARIOS
+    print(f"Loaded {len(scenarios)} scenario(s){' (built-in)' if scenarios is BUILTIN_SCENARIOS else ''}")
+
+    # Keep session logs, traces and the plan cache of benchmark runs out of the real memory/ folder
+    workdir = Path(tempfile.mkdtemp(prefix="s10-bench-"))
+    os.chdir(workdir)
+    print(f"Working directory: {workdir}")
+
+    multi_mcp = MultiMCP(server_configs=[{
+        "id": "stub",
+        "script": str(ROOT / "benchmarks" / "stub_mcp_server.py"),
+        "cwd": str(ROOT / "benchmarks"),
+        "args": ["--latency-ms", str(args.tool_latency_ms)],
+    }])
+    limiter = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(i):
+        async with limiter:
+            return await run_session(scenarios[i % len(scenarios)], multi_mcp, args.llm_latency_ms / 1000, args.plan_cache)
+
+    # The agent prints heavily; silence it once around the whole run (sessions interleave)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+        await multi_mcp.initialize()
+        start = time.perf_counter()
+        results = await asyncio.gather(*(bounded(i) for i in range(args.sessions)))
+        total = time.perf_counter() - start
+
+    report = {
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "total_s": round(total, 3),
+        "throughput_sessions_per_s": round(args.sessions / total, 3),
+        "goal_achieved": sum(r["goal_achieved"] for r in results),
+        "plan_cache_replays": sum(r["plan_cache_replay"] for r in results),
+        "session_wall_ms": distribution([r["wall_s"] * 1000 for r in results]),
+        "steps": distribution([r["steps"] for r in results]),
+        "tool_call_ms": distribution([t for r in results for t in r["tool_ms"]]),
+        "tool_spawn_ms": distribution([t for r in results for t in r["spawn_ms"]]),
+        "tool_execute_ms": distribution([t for r in results for t in r["execute_ms"]]),
+        "tool_cache": multi_mcp.cache.summary(),
+        "per_query": {},
+    }
+    for r in results:
+        entry = report["per_query"].setdefault(r["query"], {"runs": 0, "wall_ms": [], "steps": r["steps"]})
+        entry["runs"] += 1
+        entry["wall_ms"].append(round(r["wall_s"] * 1000, 1))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline agent loop benchmark")
+    parser.add_argument("--logs", default=str(ROOT / "memory" / "session_logs"), help="session logs to replay")
+    parser.add_argument("--sessions", type=int, default=10, help="total sessions to run")
+    parser.add_argument("--concurrency", type=int, default=1, help="sessions in flight at once")
+    parser.add_argument("--llm-latency-ms", type=float, default=0, help="simulated latency per LLM call")
+    parser.add_argument("--tool-latency-ms", type=float, default=0, help="simulated latency per stub tool call")
+    parser.add_argument("--plan-cache", action="store_true", help="let repeated queries replay cached plans")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--verbose", action="store_true", help="show agent output")
+    args = parser.parse_args()
+    args.logs = str(Path(args.logs).resolve())
+    args.output = args.output and Path(args.output).resolve()  # benchmark() changes the working directory
+
+    report = asyncio.run(benchmark(args))
+    print(json.dumps({k: v for k, v in report.items() if k != "per_query"}, indent=2))
+    for query, entry in report["per_query"].items():
+        print(f"  {statistics.fmean(entry['wall_ms']):8.1f}ms  steps={entry['steps']}  runs={entry['runs']}  {query[:60]}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
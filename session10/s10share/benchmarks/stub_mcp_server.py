@@ -0,0 +1,93 @@
+from mcp.server.fastmcp import FastMCP
+from pathlib import Path
+import math
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "mcp_servers"))
+from batching import register_batch_tool
+
+# Stand-in for the real MCP servers: same tool names the recorded plans use, deterministic
+# results, no network/Ollama/FAISS. `--latency-ms N` adds a fixed delay per call.
+TOOL_LATENCY = float(sys.argv[sys.argv.index("--latency-ms") + 1]) / 1000 if "--latency-ms" in sys.argv else 0.0
+
+mcp = FastMCP("Benchmark Stub")
+
+
+def _delay():
+    if TOOL_LATENCY:
+        time.sleep(TOOL_LATENCY)
+
+
+@mcp.tool()
+def add(a: int, b: int) -> int:
+    """Add two numbers. """
+    _delay()
+    return a + b
+
+
+@mcp.tool()
+def subtract(a: int, b: int) -> int:
+    """Subtract one number from another. """
+    _delay()
+    return a - b
+
+
+@mcp.tool()
+def multiply(a: int, b: int) -> int:
+    """Multiply two integers. """
+    _delay()
+    return a * b
+
+
+@mcp.tool()
+def factorial(a: int) -> int:
+    """Compute the factorial of a number. """
+    _delay()
+    return math.factorial(a)
+
+
+@mcp.tool()
+def fibonacci_numbers(n: int) -> list[int]:
+    """Generate first n Fibonacci numbers. """
+    _delay()
+    seq = [0, 1]
+    while len(seq) < n:
+        seq.append(seq[-1] + seq[-2])
+    return seq[:max(n, 0)]
+
+
+@mcp.tool()
+def strings_to_chars_to_int(string: str) -> list[int]:
+    """Convert characters to ASCII values. """
+    _delay()
+    return [ord(c) for c in string]
+
+
+@mcp.tool()
+def int_list_to_exponential_sum(numbers: list[int]) -> float:
+    """Sum exponentials of int list. """
+    _delay()
+    return sum(math.exp(i) for i in numbers)
+
+
+@mcp.tool()
+def search_stored_documents_rag(query: str) -> list[str]:
+    """Search old stored documents like PDF, DOCX, TXT, etc. to get relevant extracts. """
+    _delay()
+    return [f"Stub extract {i} for '{query}'\n[Source: stub.md, ID: stub_{i}]" for i in range(5)]
+
+
+@mcp.tool()
+def duckduckgo_search_results(query: str, max_results: int) -> str:
+    """Search DuckDuckGo. """
+    _delay()
+    return "\n".join(f"{i}. Result {i} for {query}\n   URL: https://example.com/{i}" for i in range(1, max_results + 1))
+
+
+register_batch_tool(mcp)
+
+
+if __name__ == "__main__":
+    mcp.run(transport="stdio")
+    print("\nShutting down...", file=sys.stderr)
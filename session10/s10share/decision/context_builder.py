@@ -0,0 +1,107 @@
+import json
+from typing import Optional
+
+CHARS_PER_TOKEN = 4  # rough Gemini/Llama average, good enough for budgeting
+
+
+def estimate_tokens(payload) -> int:
+    text = payload if isinstance(payload, str) else compact_json(payload)
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def compact_json(payload) -> str:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _clip(text, limit: int) -> str:
+    text = "" if text is None else str(text)
+    return text if len(text) <= limit else text[:limit] + f"...[+{len(text) - limit} chars]"
+
+
+class DecisionContextBuilder:
+    """
+    Build the completed_steps/current_step part of a mid-session decision input under a token budget.
+
+    The most recent steps keep their code, a clipped execution result and the perception verdict;
+    older steps collapse to a one-line summary. If the payload is still over budget, the oldest
+    summaries are dropped first and then result excerpts are shortened.
+    """
+
+    def __init__(self, token_budget: int = 3000, recent_steps: int = 2, result_chars: int = 1500, summary_chars: int = 200):
+        self.token_budget = token_budget
+        self.recent_steps = recent_steps
+        self.result_chars = result_chars
+        self.summary_chars = summary_chars
+        self.last_token_estimate = 0
+
+    def _result_excerpt(self, step, limit: int) -> dict:
+        result = step.execution_result
+        if isinstance(result, dict):
+            status = result.get("status")
+            body = result.get("result") if status == "success" else result.get("error")
+            return {"status": status, "output": _clip(body, limit)}
+        return {"status": step.status, "output": _clip(result, limit)}
+
+    def detailed_step(self, step, result_chars: Optional[int] = None) -> dict:
+        limit = self.result_chars if result_chars is None else result_chars
+        entry = {
+            "index": step.index,
+            "description": step.description,
+            "type": step.type,
+            "status": step.status,
+            "result": self._result_excerpt(step, limit),
+        }
+        if step.code:
+            entry["code"] = step.code.tool_arguments.get("code")
+        if step.conclusion:
+            entry["conclusion"] = step.conclusion
+        if step.perception:
+            entry["perception"] = {
+                "local_goal_achieved": step.perception.local_goal_achieved,
+                "local_reasoning": step.perception.local_reasoning,
+                "solution_summary": _clip(step.perception.solution_summary, self.summary_chars),
+            }
+        return entry
+
+    def summary_step(self, step) -> dict:
+        return {
+            "index": step.index,
+            "description": step.description,
+            "status": step.status,
+            "summary": self._result_excerpt(step, self.summary_chars)["output"],
+        }
+
+    def build(self, completed_steps: list, current_step) -> dict:
+        """
+        Return {"completed_steps": [...], "current_step": {...}} fitted to the token budget;
+        recent_steps counts detailed steps besides current_step.
+        """
+        self.last_token_estimate = 0
+        # current_step is usually also the last completed one; never send it twice
+        previous = [s for s in completed_steps if s is not current_step]
+        older = previous[:-self.recent_steps] if self.recent_steps else previous
+        recent = previous[len(older):]
+
+        summaries = [self.summary_step(s) for s in older]
+        result_chars = self.result_chars
+
+        while True:
+            payload = {
+                "completed_steps": summaries + [self.detailed_step(s, result_chars) for s in recent],
+                "current_step": self.detailed_step(current_step, result_chars),
+            }
+            tokens = estimate_tokens(payload)
+            if tokens <= self.token_budget:
+                break
+            if summaries:
+                summaries.pop(0)
+            elif result_chars > self.summary_chars:
+                result_chars //= 2
+            else:
+                break  # nothing left to trim, send the minimal form
+
+        omitted = len(older) - len(summaries)
+        if omitted:
+            payload["omitted_steps"] = omitted
+        self.last_token_estimate = tokens
+        return payload
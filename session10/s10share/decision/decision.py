@@ -6,6 +6,8 @@ from google import genai
 from google.genai.errors import ServerError
 import re
 from mcp_servers.multiMCP import MultiMCP
+from agent.json_stream import generate_json_stream
+from decision.context_builder import compact_json, estimate_tokens
 import ast
 
 
@@ -14,28 +16,41 @@ api_key = os.getenv("GEMINI_API_KEY")
 client = genai.Client(api_key=api_key)
 
 class Decision:
-    def __init__(self, decision_prompt_path: str, multi_mcp: MultiMCP, api_key: str | None = None, model: str = "gemini-2.0-flash",  ):
+    def __init__(self, decision_prompt_path: str, multi_mcp: MultiMCP, api_key: str | None = None, model: str = "gemini-2.0-flash", client=None):
         load_dotenv()
         self.decision_prompt_path = decision_prompt_path
         self.multi_mcp = multi_mcp
 
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
+        if client is None and not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment or explicitly provided.")
-        self.client = genai.Client(api_key=self.api_key)
+        self.client = client or genai.Client(api_key=self.api_key)
+        self.last_token_counts = {}
         
 
-    def run(self, decision_input: dict) -> dict:
+    def run(self, decision_input: dict, on_field=None) -> dict:
+        """
+        Stream the plan from the LLM and stop generation as soon as the JSON step object closes.
+        on_field(key, value) fires per completed top-level field, e.g. "code" before plan_text arrives.
+        """
         prompt_template = Path(self.decision_prompt_path).read_text(encoding="utf-8")
         function_list_text = self.multi_mcp.tool_description_wrapper()
         tool_descriptions = "\n".join(f"- `{desc.strip()}`" for desc in function_list_text)
         tool_descriptions = "\n\n### The ONLY Available Tools\n\n---\n\n" + tool_descriptions
-        full_prompt = f"{prompt_template.strip()}\n{tool_descriptions}\n\n```json\n{json.dumps(decision_input, indent=2)}\n```"
+        input_json = compact_json(decision_input)
+        full_prompt = f"{prompt_template.strip()}\n{tool_descriptions}\n\n```json\n{input_json}\n```"
+        # Reset per call: the ServerError path must not report the previous call's usage
+        self.last_token_counts = {
+            "input_estimate": estimate_tokens(input_json),
+            "prompt_estimate": estimate_tokens(full_prompt),
+        }
 
         try:
-            response = self.client.models.generate_content(
+            raw_text, parser = generate_json_stream(
+                self.client,
                 model="gemini-2.0-flash",
-                contents=full_prompt
+                contents=full_prompt,
+                on_field=on_field
             )
         except ServerError as e:
             print(f"🚫 Decision LLM ServerError: {e}")
@@ -49,14 +64,20 @@ class Decision:
                 "raw_text": str(e)
             }
 
-        raw_text = response.candidates[0].content.parts[0].text.strip()
+        raw_text = raw_text.strip()
+        self.last_token_counts.update({
+            "prompt_tokens": getattr(parser.usage, "prompt_token_count", None),
+            "output_tokens": getattr(parser.usage, "candidates_token_count", None),
+        })
+        print(f"📏 Decision tokens: {self.last_token_counts}")
 
         try:
-            match = re.search(r"```json\s*(\{.*?\})\s*```", raw_text, re.DOTALL)
-            if not match:
-                raise ValueError("No JSON block found")
-
-            json_block = match.group(1)
+            json_block = parser.json_text()
+            if json_block is None:
+                match = re.search(r"```json\s*(\{.*?\})\s*```", raw_text, re.DOTALL)
+                if not match:
+                    raise ValueError("No JSON block found")
+                json_block = match.group(1)
             try:
                 output = json.loads(json_block)
             except json.JSONDecodeError as e:
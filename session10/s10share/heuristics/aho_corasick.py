@@ -0,0 +1,64 @@
+"""
+Aho–Corasick automaton: finds every occurrence of a set of words in one pass over the text,
+however many words there are. Used by QueryHeuristics for the blacklist.
+"""
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+
+def fold_case(text: str) -> str:
+    """Lower-case `text` without changing its length, so match offsets stay valid for the original."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+
+
+class AhoCorasick:
+    def __init__(self, words: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[str]] = [[]]
+        for word in {fold_case(w) for w in words if w}:
+            self._add(word)
+        self._link()
+
+    def _add(self, word: str) -> None:
+        node = 0
+        for ch in word:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(word)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_all(self, text: str, folded: bool = False) -> List[Tuple[int, int, str]]:
+        """(start, end, word) for every match, case-insensitive; pass folded=True if `text` already is."""
+        if not folded:
+            text = fold_case(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for word in out[node]:
+                matches.append((i + 1 - len(word), i + 1, word))
+        return matches
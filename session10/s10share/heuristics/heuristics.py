@@ -1,8 +1,56 @@
 import re
 import os
+import time
 from urllib.parse import urlparse
 import requests
-from typing import List, Tuple, Callable
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, NamedTuple, Optional, Tuple, Callable
+from heuristics.aho_corasick import AhoCorasick, fold_case
+
+URL_CHECK_TIMEOUT = 5          # seconds per HEAD request
+URL_CHECK_TTL = 300            # reachability results are reused for this long
+RULES_TIME_BUDGET = 8          # seconds for a whole run_rules() pass
+MAX_URL_CHECKS = 8             # concurrent HEAD requests
+
+# One scan: full URLs first, bare domains otherwise (so "https://a.com/x" is not found twice)
+URL_PATTERN = re.compile(
+    r'(?P<full>http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+)'
+    r'|(?P<domain>(?:www\.)?[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+(?:/[^\s]*)?)'
+)
+
+PATH_PATTERN = re.compile(r'(?:\/[\w.-]+)+|(?:[A-Za-z]:\\(?:[^\\/:*?"<>|\r\n]+\\)*[^\\/:*?"<>|\r\n]*)')
+SENTENCE_SPLIT = re.compile(r'[.!?]+')
+MAX_SENTENCE_LENGTH = 100
+
+
+class QueryAnalysis(NamedTuple):
+    """Everything the rules need from a query, computed once (see QueryHeuristics.analyze)"""
+    query: str
+    blacklist_hits: List[Tuple[int, int, str]]   # (start, end, word), case-insensitive
+    urls: List[Tuple[str, str]]                  # (original_url, processed_url)
+    paths: List[str]
+    sentences: List[str]
+
+# Shared by every QueryHeuristics: pooled connections, worker threads and url -> (expires, ok, message)
+_session = requests.Session()
+_session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=MAX_URL_CHECKS, pool_maxsize=MAX_URL_CHECKS))
+_session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=MAX_URL_CHECKS, pool_maxsize=MAX_URL_CHECKS))
+_url_pool = ThreadPoolExecutor(max_workers=MAX_URL_CHECKS, thread_name_prefix="url-check")
+_url_cache: Dict[str, Tuple[float, bool, str]] = {}
+
+
+def _head(url: str, timeout: float) -> Tuple[bool, str]:
+    try:
+        response = _session.head(url, timeout=timeout)
+        if response.status_code >= 400:
+            result = (False, f"URL {url} is not accessible")
+        else:
+            result = (True, "")
+    except requests.RequestException:
+        result = (False, f"Failed to connect to {url}")
+    _url_cache[url] = (time.monotonic() + URL_CHECK_TTL, *result)
+    return result
+
 
 class QueryHeuristics:
     def __init__(self):
@@ -20,57 +68,94 @@ class QueryHeuristics:
             ("Blacklist Check", self._check_blacklist),
             ("URL Protocol Check", self._check_url_protocol)
         ]
+        self._deadline: Optional[float] = None  # set by run_rules() for the whole pass
+        self._matcher: Optional[AhoCorasick] = None
+        self._matcher_words: frozenset = frozenset()
+        self._last_analysis: Optional[Tuple[AhoCorasick, QueryAnalysis]] = None  # (matcher used, analysis)
+
+    def _blacklist_matcher(self) -> AhoCorasick:
+        # Rebuilt only when the blacklist changes (add_blacklist_words or direct edits)
+        if self._matcher is None or self._matcher_words != self.blacklist:
+            self._matcher_words = frozenset(self.blacklist)
+            self._matcher = AhoCorasick(self._matcher_words)
+            self._last_analysis = None
+        return self._matcher
+
+    def analyze(self, query: str) -> QueryAnalysis:
+        """One pass over the query shared by all rules; the last result is reused while the blacklist is unchanged"""
+        matcher = self._blacklist_matcher()
+        if self._last_analysis is not None:
+            last_matcher, last = self._last_analysis
+            if last_matcher is matcher and last.query == query:
+                return last
+        analysis = QueryAnalysis(
+            query=query,
+            blacklist_hits=matcher.find_all(fold_case(query), folded=True),
+            urls=self._extract_urls_from_text(query),
+            paths=PATH_PATTERN.findall(query),
+            sentences=[s.strip() for s in SENTENCE_SPLIT.split(query) if s.strip()],
+        )
+        self._last_analysis = (matcher, analysis)
+        return analysis
 
     def _extract_urls_from_text(self, text: str) -> List[Tuple[str, str]]:
         """
         Extract URLs from natural language text
         Returns list of (original_url, processed_url) tuples
         """
-        # Match both full URLs and domain-like patterns
-        url_patterns = [
-            # Full URLs with protocol
-            r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+',
-            # Domain-like patterns (e.g., www.example.com or example.com)
-            r'(?:www\.)?[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+(?:/[^\s]*)?'
-        ]
-        
         found_urls = []
-        for pattern in url_patterns:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                url = match.group()
-                # Skip if already has protocol
-                if url.startswith(('http://', 'https://')):
-                    found_urls.append((url, url))
-                else:
-                    # Add https:// for security
-                    processed_url = f'https://{url}' if not url.startswith('www.') else f'https://{url[4:]}'
-                    found_urls.append((url, processed_url))
+        seen = set()
+        for match in URL_PATTERN.finditer(text):
+            url = match.group()
+            # Skip if already has protocol
+            if match.group('full'):
+                processed_url = url
+            else:
+                # Add https:// for security
+                processed_url = f'https://{url}' if not url.startswith('www.') else f'https://{url[4:]}'
+            if processed_url not in seen:
+                seen.add(processed_url)
+                found_urls.append((url, processed_url))
         
         return found_urls
 
     def _check_url(self, query: str) -> Tuple[bool, str]:
         """Enhanced URL validation for natural language queries"""
-        urls = self._extract_urls_from_text(query)
+        urls = self.analyze(query).urls
         
         if not urls:
             return True, "No URLs found in query"
             
+        # Cached results first; the rest are checked concurrently
+        now = time.monotonic()
+        pending = {}
+        out_of_time = False
         for _, processed_url in urls:
-            try:
-                response = requests.head(processed_url, timeout=5)
-                if response.status_code >= 400:
-                    return False, f"URL {processed_url} is not accessible"
-            except requests.RequestException:
-                return False, f"Failed to connect to {processed_url}"
+            cached = _url_cache.get(processed_url)
+            if cached and cached[0] > now:
+                if not cached[1]:
+                    return False, cached[2]
+            elif processed_url not in pending:
+                budget = self._deadline - now if self._deadline else URL_CHECK_TIMEOUT
+                if budget <= 0:
+                    out_of_time = True
+                    break
+                pending[processed_url] = _url_pool.submit(_head, processed_url, min(URL_CHECK_TIMEOUT, budget))
         
+        budget = self._deadline - now if self._deadline else URL_CHECK_TIMEOUT + 1
+        done, not_done = wait(pending.values(), timeout=max(0, budget))
+        for future in done:
+            ok, message = future.result()
+            if not ok:
+                return False, message
+        
+        if not_done or out_of_time:
+            return True, "URLs could not all be verified within the time budget"
         return True, "All URLs in query are valid and accessible"
 
     def _check_file_path(self, query: str) -> Tuple[bool, str]:
         """Check if file paths in the query are valid"""
-        # Match common file path patterns
-        path_pattern = r'(?:\/[\w.-]+)+|(?:[A-Za-z]:\\(?:[^\\/:*?"<>|\r\n]+\\)*[^\\/:*?"<>|\r\n]*)'
-        paths = re.findall(path_pattern, query)
+        paths = self.analyze(query).paths
         
         if not paths:
             return True, "No file paths found"
@@ -83,9 +168,8 @@ class QueryHeuristics:
 
     def _check_sentence_length(self, query: str) -> Tuple[bool, str]:
         """Check if sentences are within length limit"""
-        # Split by common sentence terminators and remove empty strings
-        sentences = [s.strip() for s in re.split(r'[.!?]+', query) if s.strip()]
-        max_length = 100
+        sentences = self.analyze(query).sentences
+        max_length = MAX_SENTENCE_LENGTH
         
         for sentence in sentences:
             if len(sentence) > max_length:
@@ -102,8 +186,7 @@ class QueryHeuristics:
 
     def _check_blacklist(self, query: str) -> Tuple[bool, str]:
         """Check for blacklisted words"""
-        query_lower = query.lower()
-        found_words = [word for word in self.blacklist if word in query_lower]
+        found_words = list(dict.fromkeys(word for _, _, word in self.analyze(query).blacklist_hits))
         
         if found_words:
             return False, f"Found blacklisted words: {', '.join(found_words)}"
@@ -112,7 +195,7 @@ class QueryHeuristics:
 
     def _check_url_protocol(self, query: str) -> Tuple[bool, str]:
         """Enhanced URL protocol check for natural language queries"""
-        urls = self._extract_urls_from_text(query)
+        urls = self.analyze(query).urls
         modified_query = query
         
         if not urls:
@@ -130,14 +213,15 @@ class QueryHeuristics:
         return True, "All URLs have proper protocols"
 
     def _sanitize_blacklisted_words(self, text: str) -> str:
-        """Replace blacklisted words with XXXX"""
-        sanitized = text.lower()
-        for word in self.blacklist:
-            if word in sanitized:
-                # Replace with XXXX of same length as the word
-                text = text.replace(word, 'X' * len(word))
-                text = text.replace(word.upper(), 'X' * len(word))
-        return text
+        """Replace blacklisted words (any case) with XXXX"""
+        hits = self.analyze(text).blacklist_hits
+        if not hits:
+            return text
+        chars = list(text)
+        for start, end, _ in hits:
+            # Replace with XXXX of same length as the word
+            chars[start:end] = 'X' * (end - start)
+        return ''.join(chars)
 
     def process(self, query: str) -> Tuple[bool, str, str]:
         """
@@ -152,6 +236,35 @@ class QueryHeuristics:
         
         return True, "", query
 
+    def run_rules(self, query: str, time_budget: float = RULES_TIME_BUDGET) -> List[Tuple[str, bool, str]]:
+        """
+        Run every registered rule within one overall time budget
+        Returns: [(rule_name, passed, message), ...]
+        """
+        self._deadline = time.monotonic() + time_budget
+        try:
+            return [(name, *rule(query)) for name, rule in self.rules]
+        finally:
+            self._deadline = None
+
+    def screen_batch(self, queries: List[str], check_urls: bool = False) -> List[Tuple[bool, List[str], str]]:
+        """
+        Cheap pre-screen of many queries (e.g. inbound messages); URL reachability is skipped unless check_urls
+        Returns per query: (passed_all, failed_rule_messages, sanitized_query)
+        """
+        self._blacklist_matcher()
+        results = []
+        for query in queries:
+            failed = [
+                message
+                for name, rule in self.rules
+                if check_urls or rule != self._check_url
+                for passed, message in [rule(query)]
+                if not passed
+            ]
+            results.append((not failed, failed, self._sanitize_blacklisted_words(query)))
+        return results
+
     def add_rule(self, name: str, rule_func: Callable[[str], Tuple[bool, str]]):
         """Add a new heuristic rule"""
         self.rules.append((name, rule_func))
@@ -159,3 +272,5 @@ class QueryHeuristics:
     def add_blacklist_words(self, words: List[str]):
         """Add new words to blacklist"""
         self.blacklist.update(words)
+        self._matcher = None
+        self._last_analysis = None
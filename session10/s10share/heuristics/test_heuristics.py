@@ -0,0 +1,29 @@
+"""
+Regression checks for QueryHeuristics' cached analysis.
+
+    python -m heuristics.test_heuristics      (or pytest heuristics/test_heuristics.py)
+"""
+from heuristics.heuristics import QueryHeuristics
+
+
+def test_blacklist_change_invalidates_cached_analysis():
+    h = QueryHeuristics()
+    assert h.screen_batch(['hello world']) == [(True, [], 'hello world')]
+
+    h.add_blacklist_words(['world'])
+    passed, failed, sanitized = h.screen_batch(['hello world'])[0]
+    assert not passed and failed and sanitized == 'hello XXXXX'
+    assert h.process('hello world') == (False, "Sanitized blacklisted words", 'hello XXXXX')
+
+
+def test_direct_blacklist_edit_invalidates_cached_analysis():
+    h = QueryHeuristics()
+    assert h.process('hello world')[0]
+    h.blacklist.add('hello')
+    assert h.process('hello world') == (False, "Sanitized blacklisted words", 'XXXXX world')
+
+
+if __name__ == "__main__":
+    test_blacklist_change_invalidates_cached_analysis()
+    test_direct_blacklist_edit_invalidates_cached_analysis()
+    print("✅ heuristics checks passed")
@@ -1,6 +1,9 @@
+import os
 import asyncio
 import yaml
 from mcp_servers.multiMCP import MultiMCP
+from action.executor import set_sandbox_pool
+from action.sandbox_pool import SandboxPool
 
 from dotenv import load_dotenv
 # from agent.agent_loop import AgentLoop
@@ -26,6 +29,12 @@ async def interactive() -> None:
     # Initialize MCP + Dispatcher
     multi_mcp = MultiMCP(server_configs=configs)
     await multi_mcp.initialize()
+
+    # Generated code runs in pre-warmed worker processes, not in this one
+    sandbox_pool = SandboxPool("action.sandbox_worker", cwd=os.path.dirname(os.path.abspath(__file__)))
+    await sandbox_pool.start()
+    set_sandbox_pool(sandbox_pool)
+
     loop = AgentLoop(
         perception_prompt_path="prompts/perception_prompt.txt",
         decision_prompt_path="prompts/decision_prompt.txt",
@@ -50,5 +59,7 @@ async def interactive() -> None:
             print("👋  Goodbye!")
             break
 
+    await sandbox_pool.shutdown()
+
 if __name__ == "__main__":
     asyncio.run(interactive())
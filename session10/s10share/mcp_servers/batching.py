@@ -0,0 +1,38 @@
+"""
+Server half of MultiMCP.call_tools_batch.
+
+register_batch_tool(mcp) adds a `batch_call` tool that runs many calls of the server's own tools
+inside one MCP request, so a plan that calls `add` 30 times pays for one round-trip instead of 30.
+MultiMCP hides `batch_call` from the tool list and only uses it for batches.
+"""
+import asyncio
+from mcp.server.fastmcp import FastMCP
+
+BATCH_TOOL = "batch_call"
+MAX_BATCH_SIZE = 64
+
+
+def _blocks(result) -> list[dict]:
+    """Content blocks as JSON dicts, whatever their type (text, image, audio, embedded resource...)."""
+    # FastMCP.call_tool returns content blocks (newer versions: a (content, structured) tuple)
+    if isinstance(result, tuple):
+        result = result[0]
+    return [
+        block.model_dump(mode="json", exclude_none=True) if hasattr(block, "model_dump") else {"type": "text", "text": str(block)}
+        for block in result
+    ]
+
+
+def register_batch_tool(mcp: FastMCP) -> None:
+    async def run_one(call: dict) -> dict:
+        try:
+            return {"ok": True, "content": _blocks(await mcp.call_tool(call["tool"], call.get("arguments", {})))}
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    @mcp.tool(name=BATCH_TOOL)
+    async def batch_call(calls: list[dict]) -> dict:
+        """Run several tool calls in one request. Each call is {"tool": name, "arguments": {...}}; results keep call order."""
+        if len(calls) > MAX_BATCH_SIZE:
+            raise ValueError(f"Batch of {len(calls)} calls exceeds {MAX_BATCH_SIZE}")
+        return {"results": await asyncio.gather(*(run_one(call) for call in calls))}
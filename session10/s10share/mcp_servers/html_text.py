@@ -0,0 +1,76 @@
+"""
+Budgeted HTML → text for the web search server (mcp_server_3.fetch_and_parse).
+
+html_to_text() feeds the page to the stdlib HTMLParser in chunks and stops as soon as `max_chars`
+of visible text have been collected, so a 5 MB page costs about as much as its first few KB.
+Script/style/nav/header/footer content is skipped and whitespace is collapsed as it streams,
+instead of parsing the whole document into a tree and making several full-text passes afterwards.
+"""
+from html.parser import HTMLParser
+
+MAX_TEXT_CHARS = 8000
+FEED_CHUNK_CHARS = 16_384
+SKIP_TAGS = {"script", "style", "nav", "header", "footer", "noscript", "template", "svg"}
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "tr", "td", "th", "table", "section", "article",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "hr", "dd", "dt", "main", "aside",
+}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts: list[str] = []
+        self.chars = 0
+        self.skip_depth = 0
+        self.space = False
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.space = True
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.space = True
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.space = True
+
+    def handle_data(self, data):
+        if self.done or self.skip_depth:
+            return
+        words = data.split()
+        if not words:
+            self.space = self.space or bool(data)
+            return
+        if self.chars and (self.space or data[0].isspace()):
+            self.parts.append(" ")
+            self.chars += 1
+        text = " ".join(words)
+        self.parts.append(text)
+        self.chars += len(text)
+        self.space = data[-1].isspace()
+        if self.chars > self.max_chars:
+            self.done = True
+
+
+def html_to_text(html: str, max_chars: int = MAX_TEXT_CHARS) -> tuple[str, bool]:
+    """Visible text of `html`, at most `max_chars` long; second value is True if it was cut."""
+    parser = _TextExtractor(max_chars)
+    for start in range(0, len(html), FEED_CHUNK_CHARS):
+        parser.feed(html[start:start + FEED_CHUNK_CHARS])
+        if parser.done:
+            break
+    else:
+        parser.close()
+    text = "".join(parser.parts)
+    if len(text) > max_chars:
+        return text[:max_chars].rstrip(), True
+    return text, False
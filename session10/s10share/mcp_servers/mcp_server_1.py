@@ -1,6 +1,6 @@
 from mcp.server.fastmcp import FastMCP, Image
 from mcp.server.fastmcp.prompts import base
-from mcp.types import TextContent
+from mcp.types import TextContent, ToolAnnotations
 from mcp import types
 from PIL import Image as PILImage
 import math
@@ -18,6 +18,7 @@ from tqdm import tqdm
 import hashlib
 
 # Models
+from batching import register_batch_tool
 from models import (
     AddInput, AddOutput,
     SubtractInput, SubtractOutput,
@@ -41,75 +42,78 @@ from models import (
 
 mcp = FastMCP("Calculator")
 
+# Deterministic, side-effect free: MultiMCP memoizes these (mcp_servers/tool_cache.py)
+PURE = ToolAnnotations(readOnlyHint=True, idempotentHint=True, openWorldHint=False)
+
 # ------------------- Tools -------------------
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def add(input: AddInput) -> AddOutput:
     """Add two numbers. """
     print("CALLED: add(AddInput) -> AddOutput")
     return AddOutput(result=input.a + input.b)
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def subtract(input: SubtractInput) -> SubtractOutput:
     """Subtract one number from another. """
     print("CALLED: subtract(SubtractInput) -> SubtractOutput")
     return SubtractOutput(result=input.a - input.b)
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def multiply(input: MultiplyInput) -> MultiplyOutput:
     """Multiply two integers. """
     print("CALLED: multiply(MultiplyInput) -> MultiplyOutput")
     return MultiplyOutput(result=input.a * input.b)
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def divide(input: DivideInput) -> DivideOutput:
     """Divide one number by another. """
     print("CALLED: divide(DivideInput) -> DivideOutput")
     return DivideOutput(result=input.a / input.b)
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def power(input: PowerInput) -> PowerOutput:
     """Compute a raised to the power of b. """
     print("CALLED: power(PowerInput) -> PowerOutput")
     return PowerOutput(result=input.a ** input.b)
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def cbrt(input: CbrtInput) -> CbrtOutput:
     """Compute the cube root of a number. """
     print("CALLED: cbrt(CbrtInput) -> CbrtOutput")
     return CbrtOutput(result=input.a ** (1/3))
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def factorial(input: FactorialInput) -> FactorialOutput:
     """Compute the factorial of a number. """
     print("CALLED: factorial(FactorialInput) -> FactorialOutput")
     return FactorialOutput(result=math.factorial(input.a))
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def remainder(input: RemainderInput) -> RemainderOutput:
     """Compute the remainder of a divided by b. """
     print("CALLED: remainder(RemainderInput) -> RemainderOutput")
     return RemainderOutput(result=input.a % input.b)
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def sin(input: SinInput) -> SinOutput:
     """Compute sine of an angle in radians. """
     print("CALLED: sin(SinInput) -> SinOutput")
     return SinOutput(result=math.sin(input.a))
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def cos(input: CosInput) -> CosOutput:
     """Compute cosine of an angle in radians. """
     print("CALLED: cos(CosInput) -> CosOutput")
     return CosOutput(result=math.cos(input.a))
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def tan(input: TanInput) -> TanOutput:
     """Compute tangent of an angle in radians. """
     print("CALLED: tan(TanInput) -> TanOutput")
     return TanOutput(result=math.tan(input.a))
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def mine(input: MineInput) -> MineOutput:
     """Special mining tool. """
     print("CALLED: mine(MineInput) -> MineOutput")
@@ -123,7 +127,7 @@ def create_thumbnail(input: CreateThumbnailInput) -> ImageOutput:
     img.thumbnail((100, 100))
     return ImageOutput(data=img.tobytes(), format="png")
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def strings_to_chars_to_int(input: StringsToIntsInput) -> StringsToIntsOutput:
     """Convert characters to ASCII values. """
     print("CALLED: strings_to_chars_to_int(StringsToIntsInput) -> StringsToIntsOutput")
@@ -132,14 +136,14 @@ def strings_to_chars_to_int(input: StringsToIntsInput) -> StringsToIntsOutput:
 
 
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def int_list_to_exponential_sum(input: ExpSumInput) -> ExpSumOutput:
     """Sum exponentials of int list. """
     print("CALLED: int_list_to_exponential_sum(ExpSumInput) -> ExpSumOutput")
     result = sum(math.exp(i) for i in input.numbers)
     return ExpSumOutput(result=result)
 
-@mcp.tool()
+@mcp.tool(annotations=PURE)
 def fibonacci_numbers(input: FibonacciInput) -> FibonacciOutput:
     """Generate first n Fibonacci numbers. """
     print("CALLED: fibonacci_numbers(FibonacciInput) -> FibonacciOutput")
@@ -231,6 +235,8 @@ def debug_error(error: str) -> list:
         base.AssistantMessage("I'll help debug that. What have you tried so far?"),
     ]
 
+register_batch_tool(mcp)
+
 # ------------------- Main -------------------
 
 if __name__ == "__main__":
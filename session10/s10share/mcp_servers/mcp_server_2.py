@@ -13,7 +13,9 @@ from pathlib import Path
 import requests
 from markitdown import MarkItDown
 import time
-from models import AddInput, AddOutput, SqrtInput, SqrtOutput, StringsToIntsInput, StringsToIntsOutput, ExpSumInput, ExpSumOutput, PythonCodeInput, PythonCodeOutput, UrlInput, FilePathInput, MarkdownInput, MarkdownOutput, ChunkListOutput, SearchDocumentsInput
+from batching import register_batch_tool
+from spill import SpillWriter, spill_text, register_spill_resource, read_spilled
+from models import AddInput, AddOutput, SqrtInput, SqrtOutput, StringsToIntsInput, StringsToIntsOutput, ExpSumInput, ExpSumOutput, PythonCodeInput, PythonCodeOutput, UrlInput, FilePathInput, MarkdownInput, MarkdownOutput, ChunkListOutput, SearchDocumentsInput, SpillSliceInput
 from tqdm import tqdm
 import hashlib
 from pydantic import BaseModel
@@ -203,7 +205,8 @@ def convert_webpage_url_into_markdown(input: UrlInput) -> MarkdownOutput:
     ) or ""
 
     markdown = replace_images_with_captions(markdown)
-    return MarkdownOutput(markdown=markdown)
+    markdown, handle = spill_text("webpage", markdown)
+    return MarkdownOutput(markdown=markdown, spill=handle)
 
 @mcp.tool()
 def extract_pdf(input: FilePathInput) -> MarkdownOutput:
@@ -217,22 +220,34 @@ def extract_pdf(input: FilePathInput) -> MarkdownOutput:
     global_image_dir = ROOT / "documents" / "images"
     global_image_dir.mkdir(parents=True, exist_ok=True)
 
-    # Actual markdown with relative image paths
-    markdown = pymupdf4llm.to_markdown(
+    # Actual markdown with relative image paths, one chunk per page so large PDFs stream to disk
+    pages = pymupdf4llm.to_markdown(
         input.file_path,
         write_images=True,
-        image_path=str(global_image_dir)
+        image_path=str(global_image_dir),
+        page_chunks=True
     )
 
-    # Re-point image links in the markdown
-    markdown = re.sub(
-        r'!\[\]\((.*?/images/)([^)]+)\)',
-        r'![](images/\2)',
-        markdown.replace("\\", "/")
-    )
+    writer = SpillWriter("pdf")
+    for page in pages:
+        # Re-point image links in the markdown
+        page_markdown = re.sub(
+            r'!\[\]\((.*?/images/)([^)]+)\)',
+            r'![](images/\2)',
+            page["text"].replace("\\", "/")
+        )
+        writer.write(replace_images_with_captions(page_markdown))
 
-    markdown = replace_images_with_captions(markdown)
-    return MarkdownOutput(markdown=markdown)
+    markdown, handle = writer.finish()
+    return MarkdownOutput(markdown=markdown, spill=handle)
+
+@mcp.tool()
+def read_spill(input: SpillSliceInput) -> MarkdownOutput:
+    """Read `length` characters from `offset` of a large document result spilled in an earlier step, by its name. """
+    try:
+        return MarkdownOutput(markdown=read_spilled(input.name, input.offset, input.length))
+    except FileNotFoundError as e:
+        return MarkdownOutput(markdown=str(e))
 
 
 def semantic_merge(text: str) -> list[str]:
@@ -401,6 +416,10 @@ def ensure_faiss_ready():
         mcp_log("INFO", "Index already exists. Skipping regeneration.")
 
 
+register_batch_tool(mcp)
+register_spill_resource(mcp)
+
+
 if __name__ == "__main__":
     print("STARTING THE SERVER AT AMAZING LOCATION")
 
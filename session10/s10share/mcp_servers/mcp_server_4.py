@@ -18,6 +18,7 @@ from tqdm import tqdm
 import hashlib
 
 # Models
+from batching import register_batch_tool
 from models import (
     AddInput, AddOutput,
     SubtractInput, SubtractOutput,
@@ -74,6 +75,8 @@ def strings_to_chars_to_int(input: StringsToIntsInput) -> StringsToIntsOutput:
     ascii_values = [ord(char) for char in input.string]
     return StringsToIntsOutput(ascii_values=ascii_values)
 
+register_batch_tool(mcp)
+
 # ------------------- Main -------------------
 
 if __name__ == "__main__":
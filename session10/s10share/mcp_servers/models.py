@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 # --- Math Tools ---
 
@@ -143,6 +143,12 @@ class MarkdownInput(BaseModel):
 
 class MarkdownOutput(BaseModel):
     markdown: str
+    spill: Optional[dict] = Field(default=None, serialization_alias="__spill__")  # set when the markdown was spilled to disk; `markdown` is then a preview (spill.SPILL_KEY)
+
+class SpillSliceInput(BaseModel):
+    name: str    # "name" from a large-result handle
+    offset: int
+    length: int
 
 class ChunkListOutput(BaseModel):
     chunks: List[str]
@@ -172,3 +178,4 @@ class FilePathInput(BaseModel):
 
 class MarkdownOutput(BaseModel):
     markdown: str
+    spill: Optional[dict] = Field(default=None, serialization_alias="__spill__")  # set when the markdown was spilled to disk; `markdown` is then a preview (spill.SPILL_KEY)
@@ -6,7 +6,15 @@ from typing import Optional, Any, List, Dict
 from inspect import signature
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from mcp.types import CallToolResult
 import ast
+import time
+from agent.tracing import get_tracer
+from action.cost_model import TOOL_STATS
+from mcp_servers.tool_cache import ToolResultCache, policy_for
+from mcp_servers.spill import LargeResult
+
+BATCH_TOOL = "batch_call"  # see mcp_servers/batching.py
 
 class MCP:
     def __init__(
@@ -47,6 +55,9 @@ class MultiMCP:
         self.server_configs = server_configs
         self.tool_map: Dict[str, Dict[str, Any]] = {}
         self.server_tools: Dict[str, List[Any]] = {}
+        self.tool_map_version = 0  # bumped whenever tool_map changes; executor caches tool proxies per version
+        self.batch_servers: set[str] = set()  # servers exposing BATCH_TOOL
+        self.cache = ToolResultCache()  # results of pure tools, see mcp_servers/tool_cache.py
 
     async def initialize(self):
         print("in MultiMCP initialize")
@@ -54,7 +65,7 @@ class MultiMCP:
             try:
                 params = StdioServerParameters(
                     command=sys.executable,
-                    args=[config["script"]],
+                    args=[config["script"], *config.get("args", [])],
                     cwd=config.get("cwd", os.getcwd())
                 )
                 print(f"→ Scanning tools from: {config['script']} in {params.cwd}")
@@ -68,10 +79,14 @@ class MultiMCP:
                             tools = await session.list_tools()
                             print(f"\n→ Tools received: {[tool.name for tool in tools.tools]}")
                             for tool in tools.tools:
+                                if tool.name == BATCH_TOOL:
+                                    self.batch_servers.add(config["id"])
+                                    continue
                                 self.tool_map[tool.name] = {
                                     "config": config,
                                     "tool": tool
                                 }
+                                self.cache.set_policy(tool.name, policy_for(tool, config))
                                 server_key = config["id"]
                                 if server_key not in self.server_tools:
                                     self.server_tools[server_key] = []
@@ -80,6 +95,15 @@ class MultiMCP:
                         print(f"❌ Session error: {se}")
             except Exception as e:
                 print(f"❌ Error initializing MCP server {config['script']}: {e}")
+        self.tool_map_version += 1
+
+    @staticmethod
+    def _server_params(config: dict) -> StdioServerParameters:
+        return StdioServerParameters(
+            command=sys.executable,
+            args=[config["script"], *config.get("args", [])],
+            cwd=config.get("cwd", os.getcwd())
+        )
 
     async def call_tool(self, tool_name: str, arguments: dict) -> Any:
         entry = self.tool_map.get(tool_name)
@@ -87,16 +111,97 @@ class MultiMCP:
             raise ValueError(f"Tool '{tool_name}' not found on any server.")
 
         config = entry["config"]
-        params = StdioServerParameters(
-            command=sys.executable,
-            args=[config["script"]],
-            cwd=config.get("cwd", os.getcwd())
-        )
+        params = self._server_params(config)
 
-        async with stdio_client(params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                return await session.call_tool(tool_name, arguments)
+        tracer = get_tracer()
+        cache_key = self.cache.key(tool_name, arguments)
+        hit, cached = self.cache.get(tool_name, cache_key)
+        if hit:
+            with tracer.span("mcp.cache_hit", tool=tool_name):
+                return cached
+
+        start = time.perf_counter()
+        try:
+            with tracer.span("mcp.call_tool", tool=tool_name, server=config["id"]):
+                spawn = tracer.start_span("mcp.spawn", server=config["id"])
+                try:
+                    async with stdio_client(params) as (read, write):
+                        async with ClientSession(read, write) as session:
+                            await session.initialize()
+                            spawn.end()
+                            with tracer.span("mcp.execute", tool=tool_name):
+                                result = await session.call_tool(tool_name, arguments)
+                                self.cache.put(tool_name, cache_key, result)
+                                return result
+                except BaseException as e:
+                    spawn.end(error=e)  # no-op once the server is up; records a failed spawn otherwise
+                    raise
+        finally:
+            TOOL_STATS.record(tool_name, time.perf_counter() - start)  # feeds the executor's plan budgets
+
+    async def call_tools_batch(self, calls: List[tuple]) -> List[Any]:
+        """
+        Run many (tool_name, arguments) calls with one MCP session per server, and one request per
+        server where it exposes BATCH_TOOL. Servers are handled concurrently; results keep call order.
+        """
+        results: List[Any] = [None] * len(calls)
+        cache_keys: List[Optional[str]] = [None] * len(calls)
+        by_server: Dict[str, List[int]] = {}
+        for i, (tool_name, arguments) in enumerate(calls):
+            entry = self.tool_map.get(tool_name)
+            if not entry:
+                raise ValueError(f"Tool '{tool_name}' not found on any server.")
+            cache_keys[i] = self.cache.key(tool_name, arguments)
+            hit, cached = self.cache.get(tool_name, cache_keys[i])
+            if hit:
+                results[i] = cached
+                continue
+            by_server.setdefault(entry["config"]["id"], []).append(i)
+
+        tracer = get_tracer()
+
+        async def run_server(indexes: List[int]):
+            config = self.tool_map[calls[indexes[0]][0]]["config"]
+            start = time.perf_counter()
+            with tracer.span("mcp.call_tools_batch", server=config["id"], calls=len(indexes)):
+                async with stdio_client(self._server_params(config)) as (read, write):
+                    async with ClientSession(read, write) as session:
+                        await session.initialize()
+                        if config["id"] in self.batch_servers and len(indexes) > 1:
+                            batch = [{"tool": calls[i][0], "arguments": calls[i][1]} for i in indexes]
+                            for i, item in zip(indexes, self._unpack_batch(await session.call_tool(BATCH_TOOL, {"calls": batch}), len(batch))):
+                                results[i] = item
+                        else:
+                            for i in indexes:
+                                results[i] = await session.call_tool(*calls[i])
+            per_call = (time.perf_counter() - start) / len(indexes)
+            for i in indexes:
+                TOOL_STATS.record(calls[i][0], per_call)
+                self.cache.put(calls[i][0], cache_keys[i], results[i])
+
+        await asyncio.gather(*(run_server(indexes) for indexes in by_server.values()))
+        return results
+
+    @staticmethod
+    def _unpack_batch(result: Any, size: int) -> List[CallToolResult]:
+        """Split a BATCH_TOOL response back into one CallToolResult per call."""
+        try:
+            items = json.loads(result.content[0].text)["results"]
+        except Exception:
+            error = str(result)
+            if getattr(result, "content", None):
+                error = getattr(result.content[0], "text", error)
+            items = [{"ok": False, "error": error}] * size
+        return [
+            CallToolResult.model_validate({
+                "content": [
+                    {"type": "text", "text": block} if isinstance(block, str) else block
+                    for block in (item["content"] if item["ok"] else [item["error"]])
+                ],
+                "isError": not item["ok"],
+            })
+            for item in items
+        ]
 
 
 
@@ -120,6 +225,15 @@ class MultiMCP:
                     raise ValueError(f"Failed to parse function string '{tool_name}': {e}")
 
 
+        params = self._build_params(tool_name, args)
+        return self._normalize_result(await self.call_tool(tool_name, params))
+
+    async def function_wrapper_batch(self, calls: List[tuple]) -> List[Any]:
+        """function_wrapper for many (tool_name, args) pairs at once, sent through call_tools_batch."""
+        batch = [(tool_name, self._build_params(tool_name, list(args))) for tool_name, args in calls]
+        return [self._normalize_result(result) for result in await self.call_tools_batch(batch)]
+
+    def _build_params(self, tool_name: str, args) -> dict:
         # ── Look up tool ─────────────────────────────────────
         tool_entry = self.tool_map.get(tool_name)
         if not tool_entry:
@@ -142,15 +256,19 @@ class MultiMCP:
             if len(param_names) != len(args):
                 raise ValueError(f"{tool_name} expects {len(param_names)} args, got {len(args)}")
             params = dict(zip(param_names, args))
+        return params
 
-        # ── Call and Normalize Output ────────────────────────
-        result = await self.call_tool(tool_name, params)
-
+    @staticmethod
+    def _normalize_result(result: Any) -> Any:
+        # ── Normalize Output ─────────────────────────────────
         try:
             content_text = getattr(result, "content", [])[0].text.strip()
             parsed = json.loads(content_text)
 
             if isinstance(parsed, dict):
+                large = LargeResult.from_payload(parsed)  # spilled to disk by the server (mcp_servers/spill.py)
+                if large is not None:
+                    return large
                 if "result" in parsed:
                     return parsed["result"]
                 if len(parsed) == 1:
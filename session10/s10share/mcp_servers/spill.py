@@ -0,0 +1,224 @@
+"""
+Large tool results: spilled to disk by the server, read in slices by the client.
+
+Server side (inside an MCP server script):
+
+    writer = SpillWriter("extract_pdf")
+    for page in pages:
+        writer.write(page)                      # streamed to disk once the result passes LARGE_RESULT_CHARS
+    text, handle = writer.finish()              # full text if small, else (preview, handle)
+    return MarkdownOutput(markdown=text, spill=handle)   # serialized under SPILL_KEY
+
+A handle carries the spill file's `name` and `uri` = spill://{name}/0/{chars} (the whole result).
+register_spill_resource(mcp) serves slices as MCP resources: replace the last two URI segments
+with spill://{name}/{offset}/{length}. Agents that only call tools read the same slices through
+read_spilled(name, offset, length), which servers expose as a read_spill tool.
+
+Client side: MultiMCP turns a payload carrying a handle under SPILL_KEY into a LargeResult; payloads
+without that key (including ones with an ordinary `handle` field) are left alone. str() of it is the preview
+plus a pointer, so prompts never receive the whole document; plan code pulls what it needs with
+.read(start, length), .search(term) or slicing.
+"""
+import os
+import time
+import uuid
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+SPILL_DIR = Path(os.environ.get("MCP_SPILL_DIR", Path(tempfile.gettempdir()) / "mcp_spill"))
+LARGE_RESULT_CHARS = 32_000
+PREVIEW_CHARS = 2_000
+CHECKPOINT_CHARS = 64_000     # char → byte offsets recorded this often, so reads can seek
+SPILL_TTL_SECONDS = 24 * 3600
+READ_BLOCK_CHARS = 64_000
+SPILL_KEY = "__spill__"       # payload key that carries a handle; nothing else is unwrapped
+
+
+# ───────────────────────────────────────────────────────────────
+# SERVER SIDE
+# ───────────────────────────────────────────────────────────────
+def _cleanup_old_spills() -> None:
+    cutoff = time.time() - SPILL_TTL_SECONDS
+    for file in SPILL_DIR.glob("*.md"):
+        try:
+            if file.stat().st_mtime < cutoff:
+                file.unlink()
+        except OSError:
+            pass
+
+
+class SpillWriter:
+    def __init__(self, name: str):
+        self.name = name
+        self._parts: list[str] = []   # held in memory until the result turns out to be large
+        self._chars = 0
+        self._bytes = 0
+        self._preview = ""
+        self._checkpoints: list[list[int]] = [[0, 0]]
+        self._file = None
+        self.path: Optional[Path] = None
+
+    def _open(self) -> None:
+        SPILL_DIR.mkdir(parents=True, exist_ok=True)
+        _cleanup_old_spills()
+        self.path = SPILL_DIR / f"{self.name}-{uuid.uuid4().hex[:12]}.md"
+        self._file = open(self.path, "w", encoding="utf-8", newline="")
+        parts, self._parts = self._parts, []
+        self._chars = self._bytes = 0
+        for part in parts:
+            self._append(part)
+
+    def _append(self, text: str) -> None:
+        if self._chars - self._checkpoints[-1][0] >= CHECKPOINT_CHARS:
+            self._checkpoints.append([self._chars, self._bytes])
+        self._file.write(text)
+        self._chars += len(text)
+        self._bytes += len(text.encode("utf-8"))
+
+    def write(self, text: str) -> None:
+        if not text:
+            return
+        if len(self._preview) < PREVIEW_CHARS:
+            self._preview += text[:PREVIEW_CHARS - len(self._preview)]
+        if self._file is not None:
+            self._append(text)
+            return
+        self._parts.append(text)
+        self._chars += len(text)
+        if self._chars > LARGE_RESULT_CHARS:
+            self._open()
+
+    def finish(self) -> tuple[str, Optional[dict]]:
+        """(full text, None) for small results, else (preview, handle)."""
+        if self._file is None:
+            return "".join(self._parts), None
+        self._file.close()
+        return self._preview, {
+            "path": str(self.path),
+            "name": self.path.name,
+            "uri": f"spill://{self.path.name}/0/{self._chars}",  # matches the resource template
+            "chars": self._chars,
+            "checkpoints": self._checkpoints,
+        }
+
+
+def spill_text(name: str, text: str) -> tuple[str, Optional[dict]]:
+    writer = SpillWriter(name)
+    for start in range(0, len(text), CHECKPOINT_CHARS):
+        writer.write(text[start:start + CHECKPOINT_CHARS])
+    return writer.finish()
+
+
+def read_spilled(name: str, offset: int = 0, length: int = PREVIEW_CHARS) -> str:
+    """A slice of a spilled tool result, by the `name` in its handle."""
+    path = SPILL_DIR / Path(name).name  # no path traversal out of SPILL_DIR
+    if not path.exists():
+        raise FileNotFoundError(f"No spilled result named {name!r} (expired after {SPILL_TTL_SECONDS // 3600}h?)")
+    return read_slice(path, int(offset), int(length))
+
+
+def register_spill_resource(mcp) -> None:
+    @mcp.resource("spill://{name}/{offset}/{length}")
+    def read_spilled_result(name: str, offset: str, length: str) -> str:
+        """A slice of a spilled tool result."""
+        return read_spilled(name, offset, length)
+
+
+# ───────────────────────────────────────────────────────────────
+# CLIENT SIDE
+# ───────────────────────────────────────────────────────────────
+def read_slice(path, start: int, length: int, checkpoints=((0, 0),)) -> str:
+    """Read `length` chars from char offset `start` without loading the file."""
+    char_pos, byte_pos = max((cp for cp in checkpoints if cp[0] <= start), default=(0, 0))
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        f.seek(byte_pos)
+        to_skip = start - char_pos
+        while to_skip > 0:
+            skipped = len(f.read(min(to_skip, READ_BLOCK_CHARS)))
+            if not skipped:
+                return ""
+            to_skip -= skipped
+        return f.read(max(0, length))
+
+
+class LargeResult:
+    """Client handle for a spilled tool result (see module docstring)."""
+
+    def __init__(self, preview: str, handle: dict):
+        self.preview = preview
+        self.handle = handle
+        self.path = Path(handle["path"])
+        self.chars = handle["chars"]
+
+    @classmethod
+    def from_payload(cls, payload: dict):
+        """Pop the SPILL_KEY a spilling tool adds; a LargeResult if it holds a handle, else None."""
+        if SPILL_KEY not in payload:
+            return None
+        handle = payload.pop(SPILL_KEY)
+        if not isinstance(handle, dict) or "path" not in handle:
+            return None
+        preview = next((v for v in payload.values() if isinstance(v, str)), "")
+        return cls(preview, handle)
+
+    def to_handle(self) -> dict:
+        return {"preview": self.preview, **self.handle}
+
+    @classmethod
+    def from_handle(cls, data: dict) -> "LargeResult":
+        data = dict(data)
+        return cls(data.pop("preview", ""), data)
+
+    def read(self, start: int = 0, length: int = PREVIEW_CHARS) -> str:
+        return read_slice(self.path, start, length, self.handle.get("checkpoints", ((0, 0),)))
+
+    def search(self, term: str, context: int = 300, max_hits: int = 5) -> list[str]:
+        """Snippets around case-insensitive matches of `term`, streamed block by block."""
+        hits, needle, last = [], term.lower(), -1
+        offset, carry = 0, ""
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            while len(hits) < max_hits:
+                block = f.read(READ_BLOCK_CHARS)
+                if not block:
+                    break
+                window = (carry + block).lower()
+                base = offset - len(carry)
+                pos = window.find(needle)
+                while pos != -1 and len(hits) < max_hits:
+                    if base + pos > last:  # matches inside the carried overlap were already reported
+                        last = base + pos
+                        hits.append(self.read(max(0, last - context), len(term) + 2 * context))
+                    pos = window.find(needle, pos + 1)
+                offset += len(block)
+                carry = block[-(len(needle) - 1):] if len(needle) > 1 else ""  # matches spanning blocks
+        return hits
+
+    def text(self) -> str:
+        """The whole result; only for when a slice really won't do."""
+        return self.path.read_text(encoding="utf-8")
+
+    def __len__(self) -> int:
+        return self.chars
+
+    def __getitem__(self, item):
+        if isinstance(item, slice) and item.step in (None, 1):
+            start, stop, _ = item.indices(self.chars)
+            return self.read(start, stop - start)
+        if isinstance(item, int):
+            return self.read(item % self.chars if item < 0 else item, 1)
+        raise TypeError("LargeResult supports [start:stop] slices and int indexes")
+
+    def __contains__(self, term: str) -> bool:
+        return bool(self.search(term, context=0, max_hits=1))
+
+    def __str__(self) -> str:
+        remaining = self.chars - len(self.preview)
+        name = self.handle.get("name", self.path.name)
+        return (
+            f"{self.preview}\n\n[… {remaining} more characters ({self.chars} total). In this step use "
+            f".read(start, length), .search(term) or [start:stop]; in a later step call "
+            f"read_spill(\"{name}\", offset, length).]"
+        )
+
+    __repr__ = __str__
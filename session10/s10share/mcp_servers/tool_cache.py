@@ -0,0 +1,129 @@
+"""
+Client-side memoization of pure MCP tool calls (used by MultiMCP.call_tool / call_tools_batch).
+
+A tool is cacheable when its server marks it pure through MCP annotations
+(readOnlyHint + idempotentHint, openWorldHint=False) or when config/mcp_server_config.yaml says so:
+
+    cache:
+      search_stored_documents_rag: {ttl: 3600, version_files: [faiss_index/index.bin]}
+      fibonacci_numbers: true      # cache without expiry
+      add: false                   # never cache, whatever the annotations say
+
+Entries are keyed on (tool, canonical JSON arguments, server version). The server version is the
+mtime of the server script plus any `version_files` (relative to the server cwd), so rebuilding
+the FAISS index or editing a server invalidates its results without a restart.
+"""
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+MAX_ENTRIES = 1024
+
+
+@dataclass
+class CachePolicy:
+    ttl: Optional[float] = None              # seconds; None = until evicted
+    version_paths: list[str] = field(default_factory=list)
+
+
+def is_pure(tool) -> bool:
+    annotations = getattr(tool, "annotations", None)
+    return bool(
+        annotations
+        and annotations.readOnlyHint
+        and annotations.idempotentHint
+        and annotations.openWorldHint is False
+    )
+
+
+def policy_for(tool, config: dict) -> Optional[CachePolicy]:
+    """Cache policy for one tool of the server described by `config`, or None if it must not be cached."""
+    setting = (config.get("cache") or {}).get(tool.name)
+    if setting is False:
+        return None
+    cwd = config.get("cwd", os.getcwd())
+    version_paths = [os.path.join(cwd, config["script"])]
+    if isinstance(setting, dict):
+        version_paths += [os.path.join(cwd, path) for path in setting.get("version_files", [])]
+        return CachePolicy(ttl=setting.get("ttl"), version_paths=version_paths)
+    if setting is True or is_pure(tool):
+        return CachePolicy(version_paths=version_paths)
+    return None
+
+
+def _server_version(policy: CachePolicy) -> str:
+    stamps = []
+    for path in policy.version_paths:
+        try:
+            stamps.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            stamps.append(0)
+    return ",".join(map(str, stamps))
+
+
+class ToolResultCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.policies: dict[str, CachePolicy] = {}
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        self.tool_hits: dict[str, int] = {}
+
+    def set_policy(self, tool_name: str, policy: Optional[CachePolicy]) -> None:
+        if policy is None:
+            self.policies.pop(tool_name, None)
+        else:
+            self.policies[tool_name] = policy
+
+    def key(self, tool_name: str, arguments: dict) -> Optional[str]:
+        """Cache key for a call, or None when the tool isn't cacheable."""
+        policy = self.policies.get(tool_name)
+        if policy is None:
+            return None
+        try:
+            canonical = json.dumps(arguments, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        except (TypeError, ValueError):
+            return None
+        raw = f"{tool_name}\0{canonical}\0{_server_version(policy)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, tool_name: str, key: Optional[str]) -> tuple[bool, Any]:
+        if key is None:
+            return False, None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return False, None
+        expires, value = entry
+        if expires and expires < time.monotonic():
+            del self._entries[key]
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        self.tool_hits[tool_name] = self.tool_hits.get(tool_name, 0) + 1
+        return True, value
+
+    def put(self, tool_name: str, key: Optional[str], result: Any) -> None:
+        if key is None or getattr(result, "isError", False):
+            return
+        ttl = self.policies[tool_name].ttl
+        self._entries[key] = (time.monotonic() + ttl if ttl else 0.0, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def summary(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "by_tool": dict(self.tool_hits),
+        }
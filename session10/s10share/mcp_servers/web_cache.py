@@ -0,0 +1,176 @@
+"""
+Shared HTTP plumbing for the web search server (mcp_server_3.py).
+
+get_client() is one pooled httpx.AsyncClient per server process (keep-alive, HTTP/2 when the `h2`
+package is installed), instead of a new client and TCP/TLS handshake per request.
+
+ResponseCache keeps response bodies on disk across server processes (MultiMCP starts one per call):
+  - only 200 responses are stored, and only if the caller's `cacheable(text)` accepts the body, so a
+    bot-challenge or error page (e.g. DuckDuckGo's 202) is never replayed from cache
+  - entries younger than their TTL are served without touching the network
+  - older entries with an ETag / Last-Modified are revalidated with a conditional request (304 = reuse)
+  - entries older than CACHE_MAX_AGE_SECONDS are deleted, then the oldest ones until the directory is
+    under CACHE_MAX_BYTES (checked at most every EVICT_EVERY_SECONDS, on write)
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import tempfile
+import importlib.util
+from pathlib import Path
+from urllib.parse import urlparse
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import httpx
+
+HTTP_CACHE_DIR = Path(os.environ.get("MCP_HTTP_CACHE_DIR", Path(tempfile.gettempdir()) / "mcp_http_cache"))
+SEARCH_TTL_SECONDS = 3600     # search result pages carry no validators; reuse them for an hour
+PAGE_TTL_SECONDS = 300        # pages are revalidated after this (ETag / Last-Modified) or re-fetched
+REQUEST_TIMEOUT = 30.0
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+CACHE_MAX_AGE_SECONDS = 7 * 24 * 3600
+EVICT_EVERY_SECONDS = 600
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=30.0),
+            timeout=REQUEST_TIMEOUT,
+        )
+    return _client
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    text: str
+    source: str  # "network", "cache" or "revalidated"
+
+
+class ResponseCache:
+    def __init__(self, cache_dir: Path = HTTP_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.stats = {"network": 0, "cache": 0, "revalidated": 0}
+
+    def _path(self, method: str, url: str, data: Optional[dict]) -> Path:
+        raw = json.dumps([method, url, data or {}], sort_keys=True)
+        return self.cache_dir / f"{hashlib.sha256(raw.encode('utf-8')).hexdigest()}.json"
+
+    def _load(self, path: Path) -> Optional[dict]:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _store(self, path: Path, entry: dict) -> None:
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(entry), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"⚠️ HTTP cache write failed: {e}", file=sys.stderr)
+            return
+        self._maybe_evict()
+
+    def _maybe_evict(self) -> None:
+        marker = self.cache_dir / ".last_evict"
+        try:
+            if time.time() - marker.stat().st_mtime < EVICT_EVERY_SECONDS:
+                return
+        except OSError:
+            pass
+        marker.touch()
+        self.evict()
+
+    def evict(self, max_bytes: int = CACHE_MAX_BYTES, max_age: float = CACHE_MAX_AGE_SECONDS) -> int:
+        """Delete expired entries, then the least recently stored ones until under max_bytes. Returns files removed."""
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith((".json", ".tmp")):
+                try:
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+                except OSError:
+                    continue
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        cutoff = time.time() - max_age
+        removed = 0
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+                total -= size
+            except OSError:
+                pass
+        return removed
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        data: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        ttl: float = PAGE_TTL_SECONDS,
+        rate_limiter=None,
+        follow_redirects: bool = True,
+        cacheable: Optional[Callable[[str], bool]] = None,
+    ) -> CachedResponse:
+        """
+        Cached request; raises httpx errors like client.request + raise_for_status would.
+        `cacheable(text)` decides whether a 200 body is worth storing (default: always).
+        """
+        path = self._path(method, url, data)
+        entry = self._load(path)
+        if entry and time.time() - entry["stored_at"] < ttl:
+            self.stats["cache"] += 1
+            return CachedResponse(entry["url"], entry["status_code"], entry["text"], "cache")
+
+        request_headers = dict(headers or {})
+        if entry and entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        if rate_limiter is not None:
+            # only requests that actually hit the network count, per host
+            await rate_limiter.acquire(urlparse(url).netloc)
+        response = await get_client().request(
+            method, url, data=data, headers=request_headers, follow_redirects=follow_redirects
+        )
+
+        if response.status_code == 304 and entry:
+            entry["stored_at"] = time.time()
+            self._store(path, entry)
+            self.stats["revalidated"] += 1
+            return CachedResponse(entry["url"], entry["status_code"], entry["text"], "revalidated")
+
+        response.raise_for_status()
+        self.stats["network"] += 1
+        if (
+            response.status_code == 200
+            and "no-store" not in response.headers.get("Cache-Control", "")
+            and (cacheable is None or cacheable(response.text))
+        ):
+            self._store(path, {
+                "url": str(response.url),
+                "status_code": response.status_code,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "stored_at": time.time(),
+                "text": response.text,
+            })
+        return CachedResponse(str(response.url), response.status_code, response.text, "network")
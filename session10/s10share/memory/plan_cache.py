@@ -0,0 +1,215 @@
+import io
+import os
+import re
+import ast
+import json
+import atexit
+import tokenize
+from pathlib import Path
+from typing import List, Dict, Optional
+
+
+PLACEHOLDER = "__ENTITY_{}__"
+_PLACEHOLDER_RE = re.compile(r"__ENTITY_(\d+)__")
+
+
+def _entity_pattern(entity: str) -> re.Pattern:
+    """Match an entity literally, without bleeding into neighbouring words/digits (4 must not match 40)."""
+    left = r"(?<![\w.])" if entity[:1].isalnum() else ""
+    right = r"(?![\w])" if entity[-1:].isalnum() else ""
+    return re.compile(left + re.escape(entity) + right, re.IGNORECASE)
+
+
+def query_shape(query: str, entities: List[str]) -> tuple[str, List[str]]:
+    """
+    Replace every entity found in the query with an ordered placeholder.
+    Returns (shape, ordered_entities) where ordered_entities follow their position in the query,
+    so two queries with the same wording but different values share the same shape.
+    """
+    spans = []
+    for entity in sorted({e.strip() for e in entities if isinstance(e, str) and e.strip()}, key=len, reverse=True):
+        for match in _entity_pattern(entity).finditer(query):
+            if not any(s < match.end() and match.start() < e for s, e, _ in spans):
+                spans.append((match.start(), match.end(), match.group()))
+
+    spans.sort()
+    shape, ordered, cursor = [], [], 0
+    for start, end, text in spans:
+        shape.append(query[cursor:start])
+        shape.append(PLACEHOLDER.format(len(ordered)))
+        ordered.append(text)
+        cursor = end
+    shape.append(query[cursor:])
+    return " ".join("".join(shape).lower().split()).rstrip(" ?.!"), ordered
+
+
+def parameterize_code(code: str, entities: List[str]) -> Optional[str]:
+    """
+    Swap string literals whose value is exactly an entity for that entity's placeholder.
+    Returns None if an entity is still used some other way (a number, part of a name or of a longer
+    string): the plan can't be replayed safely with other values then.
+    """
+    index = {entity: i for i, entity in enumerate(entities)}
+    try:
+        tokens = list(tokenize.generate_tokens(io.StringIO(code).readline))
+    except (tokenize.TokenError, SyntaxError):
+        return None
+    lines = code.splitlines(keepends=True)
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+
+    pieces, cursor = [], 0
+    for tok in tokens:
+        if tok.type != tokenize.STRING:
+            continue
+        try:
+            value = ast.literal_eval(tok.string)
+        except (ValueError, SyntaxError):
+            continue  # f-strings and the like stay as written
+        if not isinstance(value, str) or value not in index:
+            continue
+        start = offsets[tok.start[0] - 1] + tok.start[1]
+        end = offsets[tok.end[0] - 1] + tok.end[1]
+        pieces += [code[cursor:start], PLACEHOLDER.format(index[value])]
+        cursor = end
+    template = "".join(pieces) + code[cursor:]
+
+    if any(_entity_pattern(entity).search(template) for entity in entities):
+        return None
+    return template
+
+
+def substitute_code(template: str, entities: List[str]) -> str:
+    """Fill placeholders with the new entities as Python string literals (never as raw source)."""
+    return _PLACEHOLDER_RE.sub(lambda m: repr(entities[int(m.group(1))]), template)
+
+
+def _goal_steps(session) -> list:
+    """
+    Steps of the plan that reached the goal: everything perception accepted after the last step it
+    rejected. Rejected steps, failed cached replays and plans abandoned by a replan are left out.
+    """
+    steps = []
+    for version in session.plan_versions:
+        for step in version["steps"]:
+            if step.status != "completed":
+                continue
+            perception = step.perception
+            if not perception or not (perception.local_goal_achieved or perception.original_goal_achieved):
+                steps = []
+                continue
+            steps.append(step)
+    return steps
+
+
+class PlanCache:
+    """
+    Stores the executed code of sessions whose original goal was achieved, keyed by query shape.
+    A new query with exactly the same shape replays the cached steps with its own entities
+    substituted as string literals, skipping the decision LLM entirely.
+    """
+
+    def __init__(self, cache_path: str = "memory/plan_cache.json"):
+        self.cache_path = Path(cache_path)
+        self._mtime = None
+        self.entries: List[Dict] = self._load()
+        self._stored: Dict[str, Dict] = {}   # shape -> entry written by this instance since the last save
+        self._hits: Dict[str, int] = {}      # shape -> lookups since the last save
+        atexit.register(self.flush)
+
+    def _load(self) -> List[Dict]:
+        if not self.cache_path.exists():
+            return []
+        try:
+            self._mtime = self.cache_path.stat().st_mtime_ns
+            return json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️ Ignoring unreadable plan cache '{self.cache_path}': {e}")
+            return []
+
+    def _save(self) -> None:
+        # Merge with what other PlanCache instances (other agents, other processes) wrote meanwhile
+        merged = {e["shape"]: e for e in self._load()}
+        merged.update(self._stored)
+        for shape, hits in self._hits.items():
+            if shape in merged:
+                merged[shape]["hits"] = merged[shape].get("hits", 0) + hits
+        self.entries = list(merged.values())
+        self._stored, self._hits = {}, {}
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2), encoding="utf-8")
+        os.replace(tmp, self.cache_path)
+        self._mtime = self.cache_path.stat().st_mtime_ns
+
+    def flush(self) -> None:
+        """Persist hit counts from lookups (written on the next store() or at exit otherwise)."""
+        if self._hits or self._stored:
+            self._save()
+
+    def store(self, session) -> bool:
+        """Record the CODE steps of a successful session. Returns True if an entry was written."""
+        if not session.state.get("original_goal_achieved") or not session.perception:
+            return False
+
+        codes = [
+            s.code.tool_arguments["code"]
+            for s in _goal_steps(session)
+            if s.type == "CODE" and s.code
+            and isinstance(s.execution_result, dict) and s.execution_result.get("status") == "success"
+        ]
+        if not codes:
+            return False
+
+        shape, entities = query_shape(session.original_query, session.perception.entities)
+        templates = [parameterize_code(code, entities) for code in codes]
+        if None in templates:
+            print("🗂️ Plan not cached: its code uses query values in ways that can't be swapped safely")
+            return False
+
+        entry = {
+            "shape": shape,
+            "entity_count": len(entities),
+            "query": session.original_query,
+            "plan_text": session.plan_versions[-1]["plan_text"],
+            "code_templates": templates,
+            "source_session": session.session_id,
+            "hits": 0,
+        }
+
+        # Latest successful plan for a shape wins
+        self.entries = [e for e in self.entries if e["shape"] != shape]
+        self.entries.append(entry)
+        self._stored[shape] = entry
+        self._hits.pop(shape, None)
+        self._save()
+        print(f"🗂️ Plan cached for query shape: {shape}")
+        return True
+
+    def lookup(self, query: str, entities: List[str]) -> Optional[Dict]:
+        """
+        Return {"plan_text", "codes", "shape", "source_session"} for a cached entry with exactly this
+        query shape, or None. Near misses never replay: "send X" and "do not send X" differ by a word.
+        """
+        try:
+            if self.cache_path.stat().st_mtime_ns != self._mtime:
+                self.entries = self._load()  # another instance stored a plan
+        except OSError:
+            pass
+        if not self.entries:
+            return None
+
+        shape, ordered = query_shape(query, entities)
+        entry = next((e for e in self.entries if e["shape"] == shape and e["entity_count"] == len(ordered)), None)
+        if not entry:
+            return None
+
+        self._hits[shape] = self._hits.get(shape, 0) + 1  # no rewrite on the read path; flushed by store() or at exit
+        return {
+            "plan_text": entry["plan_text"],
+            "codes": [substitute_code(t, ordered) for t in entry["code_templates"]],
+            "shape": shape,
+            "source_session": entry["source_session"],
+        }
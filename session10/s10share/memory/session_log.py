@@ -1,6 +1,7 @@
 import json
 from pathlib import Path
 from datetime import datetime
+from agent.tracing import get_tracer
 
 
 def get_store_path(session_id: str, base_dir: str = "memory/session_logs") -> Path:
@@ -53,7 +54,8 @@ def live_update_session(session_obj, base_dir: str = "memory/session_logs") -> N
     In per-file format, this is identical to append.
     """
     try:
-        append_session_to_store(session_obj, base_dir)
+        with get_tracer().span("session.persist"):
+            append_session_to_store(session_obj, base_dir)
         print("📝 Session live-updated.")
     except Exception as e:
         print(f"❌ Failed to update session: {e}")
@@ -6,18 +6,19 @@ from pathlib import Path
 from dotenv import load_dotenv
 from google import genai
 from google.genai.errors import ServerError
+from agent.json_stream import generate_json_stream
 
 load_dotenv()
 api_key = os.getenv("GEMINI_API_KEY")
 client = genai.Client(api_key=api_key)
 
 class Perception:
-    def __init__(self, perception_prompt_path: str, api_key: str | None = None, model: str = "gemini-2.0-flash"):
+    def __init__(self, perception_prompt_path: str, api_key: str | None = None, model: str = "gemini-2.0-flash", client=None):
         load_dotenv()
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
+        if client is None and not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment or explicitly provided.")
-        self.client = genai.Client(api_key=self.api_key)
+        self.client = client or genai.Client(api_key=self.api_key)
         self.perception_prompt_path = perception_prompt_path
 
     def build_perception_input(self, raw_input: str, memory: list, current_plan = "", snapshot_type: str = "user_query") -> dict:
@@ -44,15 +45,21 @@ class Perception:
             "current_plan" : current_plan or "Inain Query Mode, plan not created"
         }
     
-    def run(self, perception_input: dict) -> dict:
-        """Run perception on given input using the specified prompt file."""
+    def run(self, perception_input: dict, on_field=None) -> dict:
+        """
+        Run perception on given input using the specified prompt file.
+        The completion is streamed and generation stops once the JSON object closes;
+        on_field(key, value) is called as each top-level field completes.
+        """
         prompt_template = Path(self.perception_prompt_path).read_text(encoding="utf-8")
         full_prompt = f"{prompt_template.strip()}\n\n```json\n{json.dumps(perception_input, indent=2)}\n```"
 
         try:
-            response = self.client.models.generate_content(
+            raw_text, parser = generate_json_stream(
+                self.client,
                 model="gemini-2.0-flash",
-                contents=full_prompt
+                contents=full_prompt,
+                on_field=on_field
             )
         except ServerError as e:
             print(f"🚫 Perception LLM ServerError: {e}")
@@ -66,10 +73,10 @@ class Perception:
                 "raw_text": str(e)
             }
 
-        raw_text = response.text.strip()
+        raw_text = raw_text.strip()
 
         try:
-            json_block = raw_text.split("```json")[1].split("```")[0].strip()
+            json_block = parser.json_text() or raw_text.split("```json")[1].split("```")[0].strip()
 
             # Minimal sanitization — no unicode decoding
             output = json.loads(json_block)
@@ -3,7 +3,7 @@
 import numpy as np
 import faiss
 import requests
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal, Set
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -25,6 +25,10 @@ class MemoryManager:
         self.index = None
         self.data: List[MemoryItem] = []
         self.embeddings: List[np.ndarray] = []
+        # Inverted indexes: value → ids of the items that carry it (ids = FAISS ids = positions in self.data)
+        self.by_type: Dict[str, Set[int]] = {}
+        self.by_tag: Dict[str, Set[int]] = {}
+        self.by_session: Dict[str, Set[int]] = {}
 
     def _get_embedding(self, text: str) -> np.ndarray:
         response = requests.post(
@@ -44,6 +48,30 @@ class MemoryManager:
             self.index = faiss.IndexFlatL2(len(emb))
         self.index.add(np.stack([emb]))
 
+        item_id = len(self.data) - 1
+        self.by_type.setdefault(item.type, set()).add(item_id)
+        self.by_session.setdefault(item.session_id, set()).add(item_id)
+        for tag in item.tags:
+            self.by_tag.setdefault(tag, set()).add(item_id)
+
+    def _candidate_ids(
+        self,
+        type_filter: Optional[str],
+        tag_filter: Optional[List[str]],
+        session_filter: Optional[str]
+    ) -> Optional[Set[int]]:
+        """Ids passing every filter (any of the tags), or None when nothing is filtered"""
+        selected: List[Set[int]] = []
+        if type_filter:
+            selected.append(self.by_type.get(type_filter, set()))
+        if session_filter:
+            selected.append(self.by_session.get(session_filter, set()))
+        if tag_filter:
+            selected.append(set().union(*(self.by_tag.get(tag, set()) for tag in tag_filter)))
+        if not selected:
+            return None
+        return set.intersection(*sorted(selected, key=len))
+
     def retrieve(
         self,
         query: str,
@@ -55,32 +83,24 @@ class MemoryManager:
         if not self.index or len(self.data) == 0:
             return []
 
-        query_vec = self._get_embedding(query).reshape(1, -1)
-        D, I = self.index.search(query_vec, top_k)  # Overfetch to allow filtering
-
-        results = []
-        for idx in I[0]:
-            if idx >= len(self.data):
-                continue
-            item = self.data[idx]
-
-            # Filter by type
-            if type_filter and item.type != type_filter:
-                continue
-
-            # Filter by tags
-            if tag_filter and not any(tag in item.tags for tag in tag_filter):
-                continue
-
-            # Filter by session
-            if session_filter and item.session_id != session_filter:
-                continue
-
-            results.append(item)
-            if len(results) >= top_k:
-                break
+        candidates = self._candidate_ids(type_filter, tag_filter, session_filter)
+        if candidates is not None and not candidates:
+            return []
 
-        return results
+        query_vec = self._get_embedding(query).reshape(1, -1)
+        if candidates is None:
+            D, I = self.index.search(query_vec, min(top_k, len(self.data)))
+        elif len(candidates) * 4 < len(self.data):
+            # Few matches: rank just their vectors instead of touching the whole index
+            ids = np.fromiter(candidates, dtype=np.int64)
+            dist = ((np.stack([self.embeddings[i] for i in ids]) - query_vec) ** 2).sum(axis=1)
+            I = [ids[np.argsort(dist, kind="stable")[:top_k]]]
+        else:
+            # Search restricted to the matching ids, so the top_k are all valid hits
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(np.fromiter(candidates, dtype=np.int64)))
+            D, I = self.index.search(query_vec, min(top_k, len(candidates)), params=params)
+
+        return [self.data[idx] for idx in I[0] if 0 <= idx < len(self.data)]
 
     def bulk_add(self, items: List[MemoryItem]):
         for item in items:
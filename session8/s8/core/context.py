@@ -60,7 +60,8 @@ class AgentContext:
         self.step = 0
         self.memory = MemoryManager(
             embedding_model_url=self.agent_profile.memory_config["embedding_url"],
-            model_name=self.agent_profile.memory_config["embedding_model"]
+            model_name=self.agent_profile.memory_config["embedding_model"],
+            store_dir=self.agent_profile.memory_config.get("store_dir")
         )
         self.memory_trace: List[MemoryItem] = []
         self.tool_calls: List[ToolCallTrace] = []
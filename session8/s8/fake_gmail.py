@@ -0,0 +1,240 @@
+"""
+In-memory stand-in for the Gmail API service (googleapiclient Resource) for offline tests of
+gmail.py, mailbox_cache.py and mcp_server_gmail.py. It implements the calls those modules make:
+users().getProfile/messages().list/get/labels().list/history().list and new_batch_http_request.
+Every executed request counts as one API call, a whole batch as one round-trip.
+
+    service = FakeGmailService()
+    service.add_message(sender="alice@example.com", subject="Invoice", body="Q3 numbers")
+    cache = MailboxCache(service, ":memory:")
+
+Run directly it compares API usage of a cached mailbox against listing through the API:
+
+    python fake_gmail.py --messages 500
+"""
+import time
+import base64
+import argparse
+from typing import Any, Callable, Dict, List, Optional
+
+
+class FakeHttpError(Exception):
+    """Shaped like googleapiclient.errors.HttpError: the status is on .resp.status."""
+
+    def __init__(self, status: int, reason: str):
+        super().__init__(f"<HttpError {status}: {reason}>")
+        self.resp = type("Resp", (), {"status": status})()
+
+
+class _Request:
+    def __init__(self, service: "FakeGmailService", fn: Callable[[], Any]):
+        self._service = service
+        self._fn = fn
+
+    def execute(self):
+        self._service.calls += 1
+        self._service.round_trips += 1
+        return self._fn()
+
+
+class _Batch:
+    def __init__(self, service: "FakeGmailService", callback):
+        self._service = service
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request: _Request, request_id: Optional[str] = None):
+        self._requests.append((request_id or str(len(self._requests)), request))
+
+    def execute(self):
+        self._service.round_trips += 1
+        for request_id, request in self._requests:
+            self._service.calls += 1
+            try:
+                self._callback(request_id, request._fn(), None)
+            except FakeHttpError as e:
+                self._callback(request_id, None, e)
+
+
+class _Resource:
+    """users() and messages() resolve to the service itself; labels() and history() to small helpers."""
+
+    def __init__(self, service: "FakeGmailService"):
+        self._s = service
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def labels(self):
+        return _Labels(self._s)
+
+    def history(self):
+        return _History(self._s)
+
+    def getProfile(self, userId="me"):
+        return _Request(self._s, lambda: {"emailAddress": "me@example.com", "historyId": str(self._s.history_id)})
+
+    def list(self, userId="me", maxResults=100, q="", pageToken=None, fields=None):
+        def run():
+            ids = self._s.visible_ids()
+            start = int(pageToken or 0)
+            page = ids[start:start + maxResults]
+            response = {"messages": [{"id": i, "threadId": self._s.mailbox[i]["threadId"]} for i in page]}
+            if start + maxResults < len(ids):
+                response["nextPageToken"] = str(start + maxResults)
+            return response
+        return _Request(self._s, run)
+
+    def get(self, userId="me", id=None, format="full", metadataHeaders=None):
+        def run():
+            if id not in self._s.mailbox:
+                raise FakeHttpError(404, "Not Found")
+            message = dict(self._s.mailbox[id])
+            if format == "metadata":
+                headers = [h for h in message["payload"]["headers"]
+                           if not metadataHeaders or h["name"] in metadataHeaders]
+                message["payload"] = {"headers": headers}
+            return message
+        return _Request(self._s, run)
+
+
+class _Labels:
+    def __init__(self, service):
+        self._s = service
+
+    def list(self, userId="me"):
+        return _Request(self._s, lambda: {"labels": [{"id": i, "name": n} for i, n in self._s.label_names.items()]})
+
+
+class _History:
+    def __init__(self, service):
+        self._s = service
+
+    def list(self, userId="me", startHistoryId=None, maxResults=100, pageToken=None, historyTypes=None):
+        def run():
+            start = int(startHistoryId)
+            if start < self._s.oldest_history_id:
+                raise FakeHttpError(404, "Requested entity was not found.")
+            records = [r for r in self._s.history_log if r["id"] > start]
+            offset = int(pageToken or 0)
+            response = {"history": records[offset:offset + maxResults], "historyId": str(self._s.history_id)}
+            if offset + maxResults < len(records):
+                response["nextPageToken"] = str(offset + maxResults)
+            return response
+        return _Request(self._s, run)
+
+
+class FakeGmailService(_Resource):
+    def __init__(self):
+        super().__init__(self)
+        self.mailbox: Dict[str, Dict[str, Any]] = {}
+        self.label_names = {label: label for label in ("INBOX", "UNREAD", "STARRED", "IMPORTANT", "TRASH", "SPAM", "SENT")}
+        self.history_log: List[Dict[str, Any]] = []
+        self.history_id = 1000
+        self.oldest_history_id = 0
+        self.calls = 0
+        self.round_trips = 0
+        self._next_id = 1
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(self, callback)
+
+    # ── Mailbox changes (each one is recorded in the history) ──
+    def _record(self, kind: str, message_id: str, **extra):
+        self.history_id += 1
+        message = {"id": message_id, "threadId": message_id,
+                   "labelIds": self.mailbox.get(message_id, {}).get("labelIds", [])}
+        self.history_log.append({"id": self.history_id, kind: [{"message": message, **extra}]})
+
+    def add_message(self, sender: str, subject: str, body: str, to: str = "me@example.com",
+                    labels: Optional[List[str]] = None, date: Optional[float] = None,
+                    attachment: Optional[str] = None) -> str:
+        message_id = f"m{self._next_id:06d}"
+        self._next_id += 1
+        parts = [{"mimeType": "text/plain", "filename": "",
+                  "body": {"data": base64.urlsafe_b64encode(body.encode()).decode()}}]
+        if attachment:
+            parts.append({"mimeType": "application/pdf", "filename": attachment, "body": {"attachmentId": "a1"}})
+        internal_date = int((date or time.time()) * 1000)
+        self.mailbox[message_id] = {
+            "id": message_id,
+            "threadId": message_id,
+            "labelIds": labels if labels is not None else ["INBOX", "UNREAD"],
+            "snippet": body[:100],
+            "internalDate": str(internal_date),
+            "payload": {
+                "mimeType": "multipart/mixed",
+                "headers": [
+                    {"name": "From", "value": sender},
+                    {"name": "To", "value": to},
+                    {"name": "Subject", "value": subject},
+                    {"name": "Date", "value": time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime(internal_date / 1000))},
+                ],
+                "parts": parts,
+            },
+        }
+        self._record("messagesAdded", message_id)
+        return message_id
+
+    def delete_message(self, message_id: str):
+        self._record("messagesDeleted", message_id)
+        del self.mailbox[message_id]
+
+    def modify_labels(self, message_id: str, add: List[str] = (), remove: List[str] = ()):
+        labels = self.mailbox[message_id]["labelIds"]
+        self.mailbox[message_id]["labelIds"] = [l for l in labels if l not in remove] + [l for l in add if l not in labels]
+        if add:
+            self._record("labelsAdded", message_id, labelIds=list(add))
+        if remove:
+            self._record("labelsRemoved", message_id, labelIds=list(remove))
+
+    def expire_history(self):
+        """Make every history ID handed out so far invalid (Gmail keeps history for about a week)."""
+        self.oldest_history_id = self.history_id + 1
+
+    def visible_ids(self) -> List[str]:
+        """IDs messages.list returns: newest first, without trash and spam."""
+        visible = [m for m in self.mailbox.values() if not {"TRASH", "SPAM"} & set(m["labelIds"])]
+        return [m["id"] for m in sorted(visible, key=lambda m: -int(m["internalDate"]))]
+
+
+if __name__ == "__main__":
+    from gmail import get_messages_batch, list_messages
+    from mailbox_cache import MailboxCache
+
+    parser = argparse.ArgumentParser(description="API calls: mailbox cache vs direct Gmail API listing")
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--searches", type=int, default=20)
+    args = parser.parse_args()
+
+    service = FakeGmailService()
+    now = time.time()
+    for i in range(args.messages):
+        service.add_message(f"sender{i % 17}@example.com", f"Report {i}", f"quarterly numbers {i}", date=now - i * 60)
+
+    cache = MailboxCache(service, ":memory:")
+    cache.sync()
+    synced = service.calls
+
+    service.calls = service.round_trips = 0
+    start = time.perf_counter()
+    for i in range(args.searches):
+        service.add_message("new@example.com", f"Fresh {i}", "new mail")
+        cache.sync(force=True)
+        cache.query(f"from:sender{i % 17} quarterly", max_results=10)
+    cached = {"api_calls": service.calls, "round_trips": service.round_trips,
+              "seconds": round(time.perf_counter() - start, 3)}
+
+    service.calls = service.round_trips = 0
+    for i in range(args.searches):
+        ids = [m["id"] for m in list_messages(service, max_results=10)]
+        get_messages_batch(service, ids, format="metadata", metadata_headers=["From", "Subject", "Date"])
+    direct = {"api_calls": service.calls, "round_trips": service.round_trips}
+
+    print(f"initial sync: {synced} API calls for {args.messages} messages")
+    print(f"{args.searches} searches with cache (delta sync each): {cached}")
+    print(f"{args.searches} searches through the API: {direct}")
+    print(f"cache stats: {cache.stats}")
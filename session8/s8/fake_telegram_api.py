@@ -0,0 +1,178 @@
+"""
+Local fake of the Telegram Bot API (getMe, getUpdates long-poll, sendMessage) for testing
+telegram_ingest.py without a real bot.
+
+    api = FakeBotAPI().start()
+    api.inject_message(chat_id=-100, text="hello")
+    ingestor = TelegramIngestor(handler, api_base=api.base, token=api.token)
+
+Run directly it replays a burst through the ingestor and prints throughput:
+
+    python fake_telegram_api.py --messages 500 --chats 3 --workers 4 --handler-ms 20
+"""
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class FakeBotAPI:
+    def __init__(self, token: str = "test-token", port: int = 0):
+        self.token = token
+        self.updates: list[dict] = []
+        self.sent: list[dict] = []
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._cond = threading.Condition()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "FakeBotAPI":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        with self._cond:
+            self._cond.notify_all()
+
+    def inject_message(self, chat_id: int, text: str, sender: str = "Tester") -> int:
+        with self._cond:
+            update_id = self._next_update_id
+            self._next_update_id += 1
+            self.updates.append({
+                "update_id": update_id,
+                "message": {
+                    "message_id": self._new_message_id(),
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "group"},
+                    "from": {"id": 1, "first_name": sender},
+                    "text": text,
+                },
+            })
+            self._cond.notify_all()
+            return update_id
+
+    def _new_message_id(self) -> int:
+        message_id = self._next_message_id
+        self._next_message_id += 1
+        return message_id
+
+    # ── Bot API methods ────────────────────────────────────────
+    def get_updates(self, params: dict) -> list[dict]:
+        offset = int(params.get("offset", 0) or 0)
+        limit = int(params.get("limit", 100) or 100)
+        deadline = time.monotonic() + min(float(params.get("timeout", 0) or 0), 60)
+        with self._cond:
+            # Like Telegram: asking for `offset` confirms (drops) every earlier update
+            self.updates = [u for u in self.updates if u["update_id"] >= offset]
+            while not self.updates and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+            return self.updates[:limit]
+
+    def send_message(self, params: dict) -> dict:
+        with self._cond:
+            message = {
+                "message_id": self._new_message_id(),
+                "date": int(time.time()),
+                "chat": {"id": int(params["chat_id"])},
+                "text": params["text"],
+                "reply_to_message_id": params.get("reply_to_message_id"),
+            }
+            self.sent.append(message)
+            return message
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _params(self) -> dict:
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                length = int(self.headers.get("Content-Length", 0) or 0)
+                if length:
+                    params.update(json.loads(self.rfile.read(length) or b"{}"))
+                return params
+
+            def _reply(self, status: int, payload: dict):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _dispatch(self):
+                path = urlparse(self.path).path
+                prefix = f"/bot{api.token}/"
+                if not path.startswith(prefix):
+                    return self._reply(401, {"ok": False, "description": "Unauthorized"})
+                method, params = path[len(prefix):], self._params()
+                if method == "getMe":
+                    return self._reply(200, {"ok": True, "result": {"id": 42, "is_bot": True, "username": "fake_bot"}})
+                if method == "getUpdates":
+                    return self._reply(200, {"ok": True, "result": api.get_updates(params)})
+                if method == "sendMessage":
+                    return self._reply(200, {"ok": True, "result": api.send_message(params)})
+                return self._reply(404, {"ok": False, "description": f"Unknown method {method}"})
+
+            do_GET = do_POST = _dispatch
+
+        return Handler
+
+
+async def replay_burst(messages: int, chats: int, workers: int, handler_ms: float) -> dict:
+    from telegram_ingest import TelegramIngestor, OffsetStore
+
+    api = FakeBotAPI().start()
+    for i in range(messages):
+        api.inject_message(chat_id=-1000 - (i % chats), text=f"message {i}")
+
+    seen: dict[int, list[int]] = {}
+
+    async def handler(message: dict) -> str:
+        await asyncio.sleep(handler_ms / 1000)  # stands in for the agent
+        seen.setdefault(message['chat_id'], []).append(message['message_id'])
+        return f"echo: {message['text']}"
+
+    offset_file = tempfile.NamedTemporaryFile(suffix=".json", delete=False).name
+    ingestor = TelegramIngestor(handler, workers=workers, token=api.token, chat_id=0, api_base=api.base,
+                                offset_store=OffsetStore(offset_file), poll_timeout=1)
+    start = time.perf_counter()
+    run = asyncio.create_task(ingestor.run())
+    while len(api.sent) < messages:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    ingestor.stop()
+    await run
+    api.stop()
+
+    return {
+        "messages": messages,
+        "seconds": round(elapsed, 2),
+        "msgs_per_s": round(messages / elapsed, 1),
+        "in_order_per_chat": all(ids == sorted(ids) for ids in seen.values()),
+        "saved_offset": OffsetStore(offset_file).load(),
+        **ingestor.stats,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a message burst through TelegramIngestor against the fake Bot API")
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--chats", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--handler-ms", type=float, default=20)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(replay_burst(args.messages, args.chats, args.workers, args.handler_ms)), indent=2))
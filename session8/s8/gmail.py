@@ -7,7 +7,7 @@ import json
 import os
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -19,6 +19,11 @@ DEFAULT_CREDENTIALS_PATH = "credentials.json"
 DEFAULT_TOKEN_PATH = "token.json"
 DEFAULT_USER_ID = "me"
 
+# Gmail allows up to 100 calls per batch request but recommends staying at or below 50
+BATCH_SIZE = 50
+# messages.list returns at most this many IDs per page
+LIST_PAGE_SIZE = 500
+
 # Gmail API scopes
 GMAIL_SCOPES = [
     "https://www.googleapis.com/auth/gmail.readonly",
@@ -279,13 +284,29 @@ def list_messages(
         query: Search query (default: None)
 
     Returns:
-        List of message objects
-    """
-    response = (
-        service.users().messages().list(userId=user_id, maxResults=max_results, q=query or "").execute()
-    )
-    messages = response.get("messages", [])
-    return messages
+        List of message objects (id and threadId only; see get_messages_batch for content)
+    """
+    messages = []
+    page_token = None
+    # Page tokens chain, so pages are fetched in order; only IDs are requested
+    while len(messages) < max_results:
+        response = (
+            service.users()
+            .messages()
+            .list(
+                userId=user_id,
+                maxResults=min(LIST_PAGE_SIZE, max_results - len(messages)),
+                q=query or "",
+                pageToken=page_token,
+                fields="messages(id,threadId),nextPageToken",
+            )
+            .execute()
+        )
+        messages.extend(response.get("messages", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            break
+    return messages[:max_results]
 
 
 def search_messages(
@@ -374,7 +395,13 @@ def search_messages(
     return list_messages(service, user_id, max_results, query)
 
 
-def get_message(service: GmailService, message_id: str, user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
+def get_message(
+    service: GmailService,
+    message_id: str,
+    user_id: str = DEFAULT_USER_ID,
+    format: str = "full",
+    metadata_headers: Optional[List[str]] = None,
+) -> Dict[str, Any]:
     """
     Get a specific message by ID.
 
@@ -382,14 +409,64 @@ def get_message(service: GmailService, message_id: str, user_id: str = DEFAULT_U
         service: Gmail API service instance
         message_id: Gmail message ID
         user_id: Gmail user ID (default: 'me')
+        format: 'full', 'metadata', 'minimal' or 'raw' (default: 'full')
+        metadata_headers: Headers to return when format is 'metadata' (optional)
 
     Returns:
         Message object
     """
-    message = service.users().messages().get(userId=user_id, id=message_id).execute()
+    message = (
+        service.users()
+        .messages()
+        .get(userId=user_id, id=message_id, format=format, metadataHeaders=metadata_headers)
+        .execute()
+    )
     return message
 
 
+def get_messages_batch(
+    service: GmailService,
+    message_ids: List[str],
+    user_id: str = DEFAULT_USER_ID,
+    format: str = "full",
+    metadata_headers: Optional[List[str]] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    Get many messages with Gmail batch HTTP requests (one round-trip per BATCH_SIZE messages).
+
+    Args:
+        service: Gmail API service instance
+        message_ids: Gmail message IDs
+        user_id: Gmail user ID (default: 'me')
+        format: 'full', 'metadata', 'minimal' or 'raw' (default: 'full')
+        metadata_headers: Headers to return when format is 'metadata', e.g. ['From', 'Subject', 'Date']
+
+    Returns:
+        (messages by ID, error text by ID)
+    """
+    messages: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            errors[request_id] = str(exception)
+        else:
+            messages[request_id] = response
+
+    unique_ids = list(dict.fromkeys(message_ids))
+    for start in range(0, len(unique_ids), BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=on_response)
+        for message_id in unique_ids[start : start + BATCH_SIZE]:
+            batch.add(
+                service.users()
+                .messages()
+                .get(userId=user_id, id=message_id, format=format, metadataHeaders=metadata_headers),
+                request_id=message_id,
+            )
+        batch.execute()
+    return messages, errors
+
+
 def get_thread(service: GmailService, thread_id: str, user_id: str = DEFAULT_USER_ID) -> Dict[str, Any]:
     """
     Get a specific thread by ID.
@@ -644,7 +721,12 @@ def untrash_message(
 
 
 def get_message_history(
-    service: GmailService, history_id: str, user_id: str = DEFAULT_USER_ID, max_results: int = 100
+    service: GmailService,
+    history_id: str,
+    user_id: str = DEFAULT_USER_ID,
+    max_results: int = 100,
+    page_token: Optional[str] = None,
+    history_types: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
     """
     Get history of changes to the mailbox.
@@ -654,6 +736,8 @@ def get_message_history(
         history_id: Starting history ID
         user_id: Gmail user ID (default: 'me')
         max_results: Maximum number of history records to return
+        page_token: nextPageToken of the previous page (optional)
+        history_types: e.g. ['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved'] (optional)
 
     Returns:
         History object
@@ -661,6 +745,12 @@ def get_message_history(
     return (
         service.users()
         .history()
-        .list(userId=user_id, startHistoryId=history_id, maxResults=max_results)
+        .list(
+            userId=user_id,
+            startHistoryId=history_id,
+            maxResults=max_results,
+            pageToken=page_token,
+            historyTypes=history_types,
+        )
         .execute()
     )
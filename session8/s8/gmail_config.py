@@ -29,6 +29,8 @@ class Settings(BaseSettings):
     scopes: List[str] = GMAIL_SCOPES
     user_id: str = DEFAULT_USER_ID
     max_results: int = 10
+    # Local SQLite/FTS mailbox cache (mailbox_cache.py); empty path disables it
+    cache_path: str = "gmail_cache.sqlite3"
 
     # Configure environment variable settings
     model_config = SettingsConfigDict(
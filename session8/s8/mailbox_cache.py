@@ -0,0 +1,320 @@
+"""
+Local mailbox cache for the Gmail MCP server: SQLite + FTS5, kept current with the Gmail history API.
+
+    mailbox = MailboxCache(service, "gmail_cache.sqlite3")
+    mailbox.sync()                                   # full sync once, then history deltas only
+    rows = mailbox.search(from_email="alice@example.com", max_results=10)
+    rows = mailbox.query("from:alice subject:invoice is:unread quarterly")   # None = ask the API
+
+The first sync stores the newest INITIAL_SYNC_MESSAGES messages and the mailbox historyId. Later
+syncs page through users.history.list from that ID and only fetch added messages (batched), drop
+deleted ones and refresh label changes. An expired history ID (HTTP 404) triggers a full resync.
+Syncs run at most every SYNC_INTERVAL seconds, so back-to-back tool calls stay local.
+Messages a batch fails to return are fetched again with backoff; a sync that still can't store every
+message is rolled back, so the history ID only moves once the cache holds everything up to it.
+"""
+import re
+import sys
+import time
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from gmail import (
+    DEFAULT_USER_ID,
+    GmailService,
+    get_headers_dict,
+    get_labels,
+    get_message_history,
+    get_messages_batch,
+    list_messages,
+    parse_message_body,
+)
+
+INITIAL_SYNC_MESSAGES = 2000
+SYNC_INTERVAL = 30                   # seconds between history syncs
+HISTORY_PAGE_SIZE = 500
+HISTORY_TYPES = ["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"]
+HIDDEN_LABELS = {"TRASH", "SPAM"}    # not synced by messages.list; searches for them go to the API
+FETCH_RETRIES = 4                    # extra batch rounds for messages that failed (429, 5xx, ...)
+FETCH_BACKOFF = 1.0                  # seconds before the first retry, doubled each round
+MESSAGE_GONE = re.compile(r"HttpError 404\b")   # deleted since it was listed: nothing to retry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    thread_id TEXT,
+    internal_date INTEGER,
+    from_addr TEXT,
+    to_addr TEXT,
+    subject TEXT,
+    date_header TEXT,
+    snippet TEXT,
+    body TEXT,
+    label_ids TEXT,
+    has_attachment INTEGER
+);
+CREATE INDEX IF NOT EXISTS messages_by_date ON messages(internal_date DESC);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(id UNINDEXED, subject, from_addr, to_addr, body);
+CREATE TABLE IF NOT EXISTS labels (id TEXT PRIMARY KEY, name TEXT);
+CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Gmail query operators the cache can answer; anything else falls back to the API
+QUERY_TOKEN = re.compile(r'(\w+):("[^"]*"|\S+)|"([^"]*)"|(\S+)')
+QUERY_COLUMNS = {"from": "from_addr", "to": "to_addr", "subject": "subject"}
+IS_LABELS = {"unread": "UNREAD", "starred": "STARRED", "important": "IMPORTANT"}
+
+
+def _has_attachment(payload: Dict[str, Any]) -> bool:
+    if payload.get("filename"):
+        return True
+    return any(_has_attachment(part) for part in payload.get("parts", []))
+
+
+def _day_start_ms(date_str: str) -> int:
+    return int(datetime.strptime(date_str.replace("-", "/"), "%Y/%m/%d").timestamp() * 1000)
+
+
+class MailboxCache:
+    def __init__(self, service: GmailService, db_path: str, user_id: str = DEFAULT_USER_ID):
+        self.service = service
+        self.user_id = user_id
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        self.stats = {"full_syncs": 0, "delta_syncs": 0, "fetched": 0, "deleted": 0, "label_updates": 0,
+                      "fetch_retries": 0}
+
+    # ── State ──────────────────────────────────────────────────
+    def _get_state(self, key: str) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_state(self, key: str, value) -> None:
+        self.db.execute("INSERT OR REPLACE INTO state(key, value) VALUES (?, ?)", (key, str(value)))
+
+    @property
+    def complete(self) -> bool:
+        """True when the whole mailbox fitted in the initial sync."""
+        return self._get_state("complete") == "1"
+
+    # ── Storage ────────────────────────────────────────────────
+    def _store(self, messages: List[Dict[str, Any]]) -> None:
+        for message in messages:
+            headers = get_headers_dict(message)
+            row = (
+                message["id"],
+                message.get("threadId"),
+                int(message.get("internalDate", 0)),
+                headers.get("From", ""),
+                headers.get("To", ""),
+                headers.get("Subject", ""),
+                headers.get("Date", ""),
+                message.get("snippet", ""),
+                parse_message_body(message),
+                " ".join(message.get("labelIds", [])),
+                int(_has_attachment(message["payload"])),
+            )
+            self.db.execute("INSERT OR REPLACE INTO messages VALUES (?,?,?,?,?,?,?,?,?,?,?)", row)
+            self.db.execute("DELETE FROM messages_fts WHERE id = ?", (message["id"],))
+            self.db.execute(
+                "INSERT INTO messages_fts(id, subject, from_addr, to_addr, body) VALUES (?,?,?,?,?)",
+                (row[0], row[5], row[3], row[4], row[8]),
+            )
+        self.stats["fetched"] += len(messages)
+
+    def _delete(self, message_ids: List[str]) -> None:
+        for message_id in message_ids:
+            self.db.execute("DELETE FROM messages WHERE id = ?", (message_id,))
+            self.db.execute("DELETE FROM messages_fts WHERE id = ?", (message_id,))
+        self.stats["deleted"] += len(message_ids)
+
+    def _fetch_and_store(self, message_ids: List[str]) -> None:
+        """Store every message, retrying failed IDs with backoff; raises if some still can't be fetched."""
+        pending = list(dict.fromkeys(message_ids))
+        for attempt in range(FETCH_RETRIES + 1):
+            if not pending:
+                return
+            if attempt:
+                self.stats["fetch_retries"] += 1
+                time.sleep(FETCH_BACKOFF * 2 ** (attempt - 1))
+            fetched, errors = get_messages_batch(self.service, pending, user_id=self.user_id)
+            self._store(list(fetched.values()))
+            gone = [message_id for message_id, error in errors.items() if MESSAGE_GONE.search(error)]
+            self._delete(gone)
+            pending = [message_id for message_id in pending if message_id not in fetched and message_id not in gone]
+            if pending:
+                print(f"⚠️ {len(pending)} Gmail messages failed to fetch: {errors.get(pending[0], 'no response')}",
+                      file=sys.stderr)
+        raise RuntimeError(f"Could not fetch {len(pending)} Gmail messages after {FETCH_RETRIES} retries")
+
+    # ── Sync ───────────────────────────────────────────────────
+    def sync(self, force: bool = False) -> str:
+        """Bring the cache up to date; returns 'full', 'delta' or 'skipped'."""
+        history_id = self._get_state("history_id")
+        last_sync = float(self._get_state("synced_at") or 0)
+        if history_id and not force and time.time() - last_sync < SYNC_INTERVAL:
+            return "skipped"
+        try:
+            if history_id:
+                try:
+                    self._delta_sync(history_id)
+                    return "delta"
+                except Exception as e:
+                    if getattr(getattr(e, "resp", None), "status", None) != 404:
+                        raise
+                    print("⚠️ Gmail history ID expired, resyncing the mailbox cache", file=sys.stderr)
+            self._full_sync()
+            return "full"
+        except BaseException:
+            self.db.rollback()  # keep the previous history ID and rows; the next sync starts over
+            raise
+        finally:
+            self.db.commit()
+
+    def _full_sync(self) -> None:
+        # historyId before listing, so changes made while we list are replayed by the next delta
+        history_id = self.service.users().getProfile(userId=self.user_id).execute()["historyId"]
+        listed = list_messages(self.service, user_id=self.user_id, max_results=INITIAL_SYNC_MESSAGES)
+        self.db.execute("DELETE FROM messages")
+        self.db.execute("DELETE FROM messages_fts")
+        self._fetch_and_store([m["id"] for m in listed])
+        self._refresh_labels()
+        self._set_state("complete", int(len(listed) < INITIAL_SYNC_MESSAGES))
+        self._set_state("history_id", history_id)
+        self._set_state("synced_at", time.time())
+        self.stats["full_syncs"] += 1
+
+    def _refresh_labels(self) -> None:
+        self.db.execute("DELETE FROM labels")
+        self.db.executemany(
+            "INSERT INTO labels(id, name) VALUES (?, ?)",
+            [(label["id"], label["name"]) for label in get_labels(self.service, user_id=self.user_id)],
+        )
+
+    def _delta_sync(self, history_id: str) -> None:
+        added, deleted, relabeled = {}, set(), {}
+        page_token, latest = None, history_id
+        while True:
+            response = get_message_history(
+                self.service, history_id, user_id=self.user_id, max_results=HISTORY_PAGE_SIZE,
+                page_token=page_token, history_types=HISTORY_TYPES,
+            )
+            for record in response.get("history", []):
+                for item in record.get("messagesAdded", []):
+                    added[item["message"]["id"]] = True
+                    deleted.discard(item["message"]["id"])
+                for item in record.get("messagesDeleted", []):
+                    added.pop(item["message"]["id"], None)
+                    deleted.add(item["message"]["id"])
+                for item in record.get("labelsAdded", []) + record.get("labelsRemoved", []):
+                    relabeled[item["message"]["id"]] = item["message"].get("labelIds", [])
+            latest = response.get("historyId", latest)
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+
+        self._fetch_and_store(list(added))
+        self._delete(list(deleted))
+        for message_id, label_ids in relabeled.items():
+            if message_id not in added and message_id not in deleted:
+                self.db.execute("UPDATE messages SET label_ids = ? WHERE id = ?", (" ".join(label_ids), message_id))
+                self.stats["label_updates"] += 1
+        known = {row["id"] for row in self.db.execute("SELECT id FROM labels")}
+        if any(set(ids) - known for ids in relabeled.values()):
+            self._refresh_labels()
+        self._set_state("history_id", latest)
+        self._set_state("synced_at", time.time())
+        self.stats["delta_syncs"] += 1
+
+    # ── Search ─────────────────────────────────────────────────
+    def _label_id(self, name: str) -> Optional[str]:
+        row = self.db.execute(
+            "SELECT id FROM labels WHERE lower(name) = lower(?) OR lower(id) = lower(?)", (name, name)
+        ).fetchone()
+        return row["id"] if row else None
+
+    def _run(self, where: List[str], params: List[Any], terms: List[str], max_results: int) -> List[sqlite3.Row]:
+        for label in HIDDEN_LABELS:
+            where.append("(' ' || label_ids || ' ') NOT LIKE ?")
+            params.append(f"% {label} %")
+        if terms:
+            where.append("id IN (SELECT id FROM messages_fts WHERE messages_fts MATCH ?)")
+            params.append(" ".join('"' + term.replace('"', '""') + '"' for term in terms))
+        sql = "SELECT * FROM messages"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY internal_date DESC LIMIT ?"
+        return self.db.execute(sql, params + [max_results]).fetchall()
+
+    def search(
+        self,
+        from_email: Optional[str] = None,
+        to_email: Optional[str] = None,
+        subject: Optional[str] = None,
+        has_attachment: bool = False,
+        is_unread: bool = False,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        label: Optional[str] = None,
+        max_results: int = 10,
+    ) -> Optional[List[sqlite3.Row]]:
+        """search_emails criteria answered locally; None when the cache can't answer (unknown label)."""
+        where, params = [], []
+        for column, value in (("from_addr", from_email), ("to_addr", to_email), ("subject", subject)):
+            if value:
+                where.append(f"{column} LIKE ?")
+                params.append(f"%{value}%")
+        if has_attachment:
+            where.append("has_attachment = 1")
+        if is_unread:
+            where.append("(' ' || label_ids || ' ') LIKE ?")
+            params.append("% UNREAD %")
+        if after:
+            where.append("internal_date >= ?")
+            params.append(_day_start_ms(after))
+        if before:
+            where.append("internal_date < ?")
+            params.append(_day_start_ms(before))
+        if label:
+            label_id = self._label_id(label)
+            if label_id is None or label_id in HIDDEN_LABELS:
+                return None
+            where.append("(' ' || label_ids || ' ') LIKE ?")
+            params.append(f"% {label_id} %")
+        return self._run(where, params, [], max_results)
+
+    def query(self, query: str, max_results: int = 10) -> Optional[List[sqlite3.Row]]:
+        """A Gmail search-box query answered locally; None if it uses syntax the cache doesn't support."""
+        where, params, terms = [], [], []
+        for match in QUERY_TOKEN.finditer(query):
+            op, value, phrase, word = match.groups()
+            if op:
+                op, value = op.lower(), value.strip('"')
+                if op in QUERY_COLUMNS:
+                    where.append(f"{QUERY_COLUMNS[op]} LIKE ?")
+                    params.append(f"%{value}%")
+                elif op in ("after", "before") and re.fullmatch(r"\d{4}[/-]\d{1,2}[/-]\d{1,2}", value):
+                    where.append("internal_date >= ?" if op == "after" else "internal_date < ?")
+                    params.append(_day_start_ms(value))
+                elif op == "has" and value.lower() == "attachment":
+                    where.append("has_attachment = 1")
+                elif op == "is" and value.lower() == "read":
+                    where.append("(' ' || label_ids || ' ') NOT LIKE ?")
+                    params.append("% UNREAD %")
+                elif op in ("label", "in") or (op == "is" and value.lower() in IS_LABELS):
+                    label_id = self._label_id(IS_LABELS.get(value.lower(), value) if op == "is" else value)
+                    if label_id is None or label_id in HIDDEN_LABELS:
+                        return None
+                    where.append("(' ' || label_ids || ' ') LIKE ?")
+                    params.append(f"% {label_id} %")
+                else:
+                    return None
+            elif phrase is not None:
+                terms.append(phrase)
+            else:
+                if word in ("OR", "AND") or word.startswith(("-", "(", "{")) or word.endswith(")"):
+                    return None
+                terms.append(word)
+        return self._run(where, params, terms, max_results)
@@ -19,6 +19,7 @@ from gmail import (
     get_headers_dict,
     get_labels,
     get_message,
+    get_messages_batch,
     get_thread,
     list_messages,
     modify_message_labels,
@@ -26,18 +27,25 @@ from gmail import (
     search_messages,
 )
 from gmail import send_email as gmail_send_email
+from mailbox_cache import MailboxCache
+from spill import SpillWriter, register_spill_resource, read_spilled
 
 # Initialize the Gmail service
 service = get_gmail_service(
     credentials_path=settings.credentials_path, token_path=settings.token_path, scopes=settings.scopes
 )
 
+# Local mailbox cache: searches are answered from SQLite after an incremental history sync
+mailbox = MailboxCache(service, settings.cache_path, user_id=settings.user_id) if settings.cache_path else None
+
 mcp = FastMCP(
     "Gmail MCP Server",
     instructions="Access and interact with Gmail. You can get messages, threads, search emails, and send or compose new messages.",  # noqa: E501
 )
 
 EMAIL_PREVIEW_LENGTH = 200
+# Listing only needs these, so list views fetch format=metadata instead of full bodies
+LIST_HEADERS = ["From", "Subject", "Date"]
 
 
 # Helper functions
@@ -62,6 +70,54 @@ Date: {date}
 """
 
 
+def format_message_summaries(messages):
+    """Message ID/From/Subject/Date lines for listed messages, fetched in batched metadata requests."""
+    msg_ids = [msg_info.get("id") for msg_info in messages]
+    fetched, errors = get_messages_batch(
+        service, msg_ids, user_id=settings.user_id, format="metadata", metadata_headers=LIST_HEADERS
+    )
+
+    result = ""
+    for msg_id in msg_ids:
+        result += f"\nMessage ID: {msg_id}\n"
+        if msg_id not in fetched:
+            result += f"Error: {errors.get(msg_id, 'not returned')}\n"
+            continue
+        headers = get_headers_dict(fetched[msg_id])
+        result += f"From: {headers.get('From', 'Unknown')}\n"
+        result += f"Subject: {headers.get('Subject', 'No Subject')}\n"
+        result += f"Date: {headers.get('Date', 'Unknown Date')}\n"
+    return result
+
+
+def search_mailbox_cache(search, max_results):
+    """
+    Run `search(mailbox)` against the synced local cache.
+
+    Returns (count, formatted summaries), or None when the API has to answer instead: no cache, sync
+    failure, a query the cache can't express, or too few hits while the cache holds only the
+    newest part of the mailbox.
+    """
+    if mailbox is None:
+        return None
+    try:
+        mailbox.sync()
+        rows = search(mailbox)
+    except Exception as e:
+        print(f"Mailbox cache unavailable, using the Gmail API: {e}", file=sys.stderr)
+        return None
+    if rows is None or (len(rows) < max_results and not mailbox.complete):
+        return None
+
+    result = ""
+    for row in rows:
+        result += f"\nMessage ID: {row['id']}\n"
+        result += f"From: {row['from_addr'] or 'Unknown'}\n"
+        result += f"Subject: {row['subject'] or 'No Subject'}\n"
+        result += f"Date: {row['date_header'] or 'Unknown Date'}\n"
+    return len(rows), result
+
+
 def validate_date_format(date_str):
     """
     Validate that a date string is in the format YYYY/MM/DD.
@@ -229,6 +285,25 @@ def search_emails(
     if before_date and not validate_date_format(before_date):
         return f"Error: before_date '{before_date}' is not in the required format YYYY/MM/DD"
 
+    # Local cache first
+    cached = search_mailbox_cache(
+        lambda cache: cache.search(
+            from_email=from_email,
+            to_email=to_email,
+            subject=subject,
+            has_attachment=has_attachment,
+            is_unread=is_unread,
+            after=after_date,
+            before=before_date,
+            label=label,
+            max_results=max_results,
+        ),
+        max_results,
+    )
+    if cached is not None:
+        count, summaries = cached
+        return f"Found {count} messages matching criteria:\n" + summaries
+
     # Use search_messages to find matching emails
     messages = search_messages(
         service,
@@ -245,20 +320,7 @@ def search_emails(
     )
 
     result = f"Found {len(messages)} messages matching criteria:\n"
-
-    for msg_info in messages:
-        msg_id = msg_info.get("id")
-        message = get_message(service, msg_id, user_id=settings.user_id)
-        headers = get_headers_dict(message)
-
-        from_header = headers.get("From", "Unknown")
-        subject = headers.get("Subject", "No Subject")
-        date = headers.get("Date", "Unknown Date")
-
-        result += f"\nMessage ID: {msg_id}\n"
-        result += f"From: {from_header}\n"
-        result += f"Subject: {subject}\n"
-        result += f"Date: {date}\n"
+    result += format_message_summaries(messages)
 
     return result
 
@@ -275,23 +337,15 @@ def query_emails(query: str, max_results: int = 10) -> str:
     Returns:
         Formatted list of matching emails
     """
+    cached = search_mailbox_cache(lambda cache: cache.query(query, max_results), max_results)
+    if cached is not None:
+        count, summaries = cached
+        return f'Found {count} messages matching query: "{query}"\n' + summaries
+
     messages = list_messages(service, user_id=settings.user_id, max_results=max_results, query=query)
 
     result = f'Found {len(messages)} messages matching query: "{query}"\n'
-
-    for msg_info in messages:
-        msg_id = msg_info.get("id")
-        message = get_message(service, msg_id, user_id=settings.user_id)
-        headers = get_headers_dict(message)
-
-        from_header = headers.get("From", "Unknown")
-        subject = headers.get("Subject", "No Subject")
-        date = headers.get("Date", "Unknown Date")
-
-        result += f"\nMessage ID: {msg_id}\n"
-        result += f"From: {from_header}\n"
-        result += f"Subject: {subject}\n"
-        result += f"Date: {date}\n"
+    result += format_message_summaries(messages)
 
     return result
 
@@ -438,30 +492,61 @@ def get_emails(message_ids: list[str]) -> str:
     retrieved_emails = []
     error_emails = []
 
-    for msg_id in message_ids:
-        try:
-            message = get_message(service, msg_id, user_id=settings.user_id)
-            retrieved_emails.append((msg_id, message))
-        except Exception as e:
-            error_emails.append((msg_id, str(e)))
+    try:
+        fetched, errors = get_messages_batch(service, message_ids, user_id=settings.user_id)
+    except Exception as e:
+        fetched, errors = {}, {msg_id: str(e) for msg_id in message_ids}
+
+    for msg_id in dict.fromkeys(message_ids):
+        if msg_id in fetched:
+            retrieved_emails.append((msg_id, fetched[msg_id]))
+        else:
+            error_emails.append((msg_id, errors.get(msg_id, "not returned")))
 
-    # Build result string after fetching all emails
-    result = f"Retrieved {len(retrieved_emails)} emails:\n"
+    # Stream the result out one email at a time; large batches spill to disk (spill.py)
+    writer = SpillWriter("emails")
+    writer.write(f"Retrieved {len(retrieved_emails)} emails:\n")
 
     # Format all successfully retrieved emails
     for i, (msg_id, message) in enumerate(retrieved_emails, 1):
-        result += f"\n--- Email {i} (ID: {msg_id}) ---\n"
-        result += format_message(message)
+        writer.write(f"\n--- Email {i} (ID: {msg_id}) ---\n" + format_message(message))
 
     # Report any errors
     if error_emails:
-        result += f"\n\nFailed to retrieve {len(error_emails)} emails:\n"
+        writer.write(f"\n\nFailed to retrieve {len(error_emails)} emails:\n")
         for i, (msg_id, error) in enumerate(error_emails, 1):
-            result += f"\n--- Email {i} (ID: {msg_id}) ---\n"
-            result += f"Error: {error}\n"
-
+            writer.write(f"\n--- Email {i} (ID: {msg_id}) ---\nError: {error}\n")
+
+    result, handle = writer.finish()
+    if handle:
+        result += (
+            f"\n\n[… {handle['chars'] - len(result)} more characters ({handle['chars']} total). "
+            f"Call read_spill(name=\"{handle['name']}\", offset={len(result)}, length=8000) for the rest.]"
+        )
     return result
 
+
+@mcp.tool()
+def read_spill(name: str, offset: int = 0, length: int = 8000) -> str:
+    """
+    Read part of a large tool result that was saved to disk (e.g. a big get_emails batch).
+
+    Args:
+        name: The name given in the result's "[… more characters]" note
+        offset: Character offset to start from
+        length: Number of characters to return
+
+    Returns:
+        The requested slice of the saved result
+    """
+    try:
+        return read_spilled(name, offset, length)
+    except FileNotFoundError as e:
+        return str(e)
+
+
+register_spill_resource(mcp)
+
 if __name__ == "__main__":
     # Check if running with mcp dev command
     print("STARTING THE SERVER AT AMAZING LOCATION")
@@ -16,7 +16,7 @@ except ImportError:
         now = datetime.datetime.now().strftime("%H:%M:%S")
         print(f"[{now}] [{stage}] {msg}")
 
-model = ModelManager()
+model = ModelManager(role="decision")
 
 
 async def generate_plan(
@@ -11,7 +11,7 @@
 
 # Dependencies:
 
-# faiss, requests, pydantic
+# numpy, requests, pydantic, modules/vector_store.py (mmap'd embeddings + SQLite metadata)
 
 # Used by: context.py, loop.py
 
@@ -26,7 +26,7 @@ from pydantic import BaseModel
 from datetime import datetime
 import requests
 import numpy as np
-import faiss
+from modules.vector_store import VectorStore
 
 
 class MemoryItem(BaseModel):
@@ -40,12 +40,16 @@ class MemoryItem(BaseModel):
 
 
 class MemoryManager:
-    def __init__(self, embedding_model_url: str, model_name: str = "qwen3-embedding:0.6b"):
+    def __init__(
+        self,
+        embedding_model_url: str,
+        model_name: str = "qwen3-embedding:0.6b",
+        store_dir: Optional[str] = None
+    ):
         self.embedding_model_url = embedding_model_url
         self.model_name = model_name
-        self.index: Optional[faiss.IndexFlatL2] = None
-        self.data: List[MemoryItem] = []
-        self.embeddings: List[np.ndarray] = []
+        # store_dir persists embeddings across restarts (memory-mapped); None keeps them in memory
+        self.store = VectorStore(store_dir)
 
     def _get_embedding(self, text: str) -> np.ndarray:
         response = requests.post(
@@ -55,15 +59,22 @@ class MemoryManager:
         response.raise_for_status()
         return np.array(response.json()["embedding"], dtype=np.float32)
 
-    def add(self, item: MemoryItem):
-        embedding = self._get_embedding(item.text)
-        self.embeddings.append(embedding)
-        self.data.append(item)
+    def _get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """One request for many texts via Ollama's /api/embed; per-text requests if that isn't available."""
+        if self.embedding_model_url.endswith("/api/embeddings"):
+            try:
+                response = requests.post(
+                    self.embedding_model_url[: -len("embeddings")] + "embed",
+                    json={"model": self.model_name, "input": texts}
+                )
+                response.raise_for_status()
+                return np.array(response.json()["embeddings"], dtype=np.float32)
+            except (requests.RequestException, KeyError, ValueError):
+                pass
+        return np.stack([self._get_embedding(text) for text in texts])
 
-        # Init or add to index
-        if self.index is None:
-            self.index = faiss.IndexFlatL2(len(embedding))
-        self.index.add(np.stack([embedding]))
+    def add(self, item: MemoryItem):
+        self.bulk_add([item])
 
     def retrieve(
         self,
@@ -73,31 +84,24 @@ class MemoryManager:
         tag_filter: Optional[List[str]] = None,
         session_filter: Optional[str] = None
     ) -> List[MemoryItem]:
-        if not self.index or len(self.data) == 0:
+        if len(self.store) == 0:
             return []
 
-        query_vec = self._get_embedding(query).reshape(1, -1)
-        D, I = self.index.search(query_vec, top_k * 2)  # overfetch for filtering
-
-        results = []
-        for idx in I[0]:
-            if idx >= len(self.data):
-                continue
-            item = self.data[idx]
-
-            if type_filter and item.type != type_filter:
-                continue
-            if tag_filter and not any(tag in item.tags for tag in tag_filter):
-                continue
-            if session_filter and item.session_id != session_filter:
-                continue
-
-            results.append(item)
-            if len(results) >= top_k:
-                break
+        # Pre-filter through the type/session/tag indexes, then rank only the matching rows,
+        # so filtered lookups return complete result sets
+        if type_filter == "all":  # profiles.yaml option meaning "no type filter"
+            type_filter = None
+        rows = self.store.select_rows(type=type_filter, session_id=session_filter, tags=tag_filter)
+        if rows is not None and len(rows) == 0:
+            return []
 
-        return results
+        query_vec = self._get_embedding(query)
+        hits = self.store.search(query_vec, top_k, rows=rows)
+        stored = self.store.items([row for row, _ in hits])
+        return [MemoryItem(**stored[row]) for row, _ in hits]
 
     def bulk_add(self, items: List[MemoryItem]):
-        for item in items:
-            self.add(item)
+        if not items:
+            return
+        embeddings = self._get_embeddings([item.text for item in items])
+        self.store.add(embeddings, [item.model_dump() for item in items])
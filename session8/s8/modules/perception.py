@@ -7,7 +7,7 @@ from dotenv import load_dotenv
 from modules.model_manager import ModelManager
 from modules.tools import summarize_tools
 
-model = ModelManager()
+model = ModelManager(role="perception")
 tool_context = summarize_tools(model.get_all_tools()) if hasattr(model, "get_all_tools") else ""
 
 
@@ -0,0 +1,193 @@
+# modules/vector_store.py → Persistent vector store for MemoryManager
+# Role: Keep memory embeddings on disk so a restart doesn't re-embed anything.
+
+# Layout of a store directory:
+
+# vectors.f32 → all embeddings as one contiguous float32 matrix (row i = item i), append-only
+
+# meta.sqlite3 → items table: row → item_id, type, session_id, tool_name, tags, timestamp, JSON;
+#                item_tags: inverted tag index (tag → rows)
+
+# Opening a store memory-maps vectors.f32 (O(1), pages load on first search); adds append rows
+# to the file and insert the metadata in one transaction. SQLite is the source of truth for the
+# row count, so rows written to the vector file by an interrupted add are ignored and overwritten.
+
+# With path=None the store lives in memory only (same API, nothing persisted).
+
+# modules/vector_store.py
+
+import os
+import json
+import sqlite3
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+VECTOR_FILE = "vectors.f32"
+META_FILE = "meta.sqlite3"
+SEARCH_CHUNK_ROWS = 65536
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    row INTEGER PRIMARY KEY,
+    item_id TEXT UNIQUE,
+    type TEXT,
+    session_id TEXT,
+    tool_name TEXT,
+    tags TEXT,
+    timestamp TEXT,
+    json TEXT
+);
+CREATE INDEX IF NOT EXISTS items_by_type ON items(type);
+CREATE INDEX IF NOT EXISTS items_by_session ON items(session_id);
+CREATE TABLE IF NOT EXISTS item_tags (tag TEXT, row INTEGER, PRIMARY KEY (tag, row)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS store_info (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class VectorStore:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        if path:
+            os.makedirs(path, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(path, META_FILE) if path else ":memory:", check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        row = self.db.execute("SELECT value FROM store_info WHERE key = 'dim'").fetchone()
+        self.dim: Optional[int] = int(row[0]) if row else None
+        self.count = self.db.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        self._backfill_tags()
+        self._memory = np.empty((0, self.dim or 0), dtype=np.float32)  # path=None storage
+        self._vectors: Optional[np.ndarray] = None
+        self._map()
+
+    def _backfill_tags(self) -> None:
+        # Stores written before item_tags existed
+        if self.count and not self.db.execute("SELECT 1 FROM item_tags LIMIT 1").fetchone():
+            with self.db:
+                for row, tags in self.db.execute("SELECT row, tags FROM items").fetchall():
+                    self._index_tags(row, json.loads(tags or "[]"))
+
+    def _index_tags(self, row: int, tags: Sequence[str]) -> None:
+        self.db.executemany("INSERT OR IGNORE INTO item_tags(tag, row) VALUES (?, ?)", [(tag, row) for tag in tags])
+
+    # ── Vectors ────────────────────────────────────────────────
+    @property
+    def _vector_path(self) -> str:
+        return os.path.join(self.path, VECTOR_FILE)
+
+    def _map(self) -> None:
+        if not self.path:
+            self._vectors = self._memory[: self.count]
+        elif self.dim and self.count:
+            self._vectors = np.memmap(self._vector_path, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+        else:
+            self._vectors = None
+
+    @property
+    def vectors(self) -> np.ndarray:
+        if self._vectors is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._vectors
+
+    def add(self, embeddings: np.ndarray, items: Sequence[Dict[str, Any]]) -> List[int]:
+        """Append embeddings (n × dim) with their metadata; returns the new row numbers."""
+        embeddings = np.ascontiguousarray(np.atleast_2d(embeddings), dtype=np.float32)
+        if len(embeddings) != len(items):
+            raise ValueError(f"{len(embeddings)} embeddings for {len(items)} items")
+        if not len(items):
+            return []
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+            self.db.execute("INSERT INTO store_info(key, value) VALUES ('dim', ?)", (str(self.dim),))
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {embeddings.shape[1]} != store dimension {self.dim}")
+
+        start = self.count
+        if self.path:
+            mode = "r+b" if os.path.exists(self._vector_path) else "wb"
+            with open(self._vector_path, mode) as f:
+                f.seek(start * self.dim * 4)  # past the last committed row
+                f.write(embeddings.tobytes())
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            self._memory = np.concatenate([self._memory.reshape(-1, self.dim), embeddings])
+
+        rows = list(range(start, start + len(items)))
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO items(row, item_id, type, session_id, tool_name, tags, timestamp, json) VALUES (?,?,?,?,?,?,?,?)",
+                [
+                    (
+                        row,
+                        item.get("item_id") or uuid.uuid4().hex,
+                        item.get("type"),
+                        item.get("session_id"),
+                        item.get("tool_name"),
+                        json.dumps(item.get("tags") or []),
+                        item.get("timestamp"),
+                        json.dumps(item),
+                    )
+                    for row, item in zip(rows, items)
+                ],
+            )
+            for row, item in zip(rows, items):
+                self._index_tags(row, item.get("tags") or [])
+        self.count += len(items)
+        self._map()
+        return rows
+
+    # ── Queries ────────────────────────────────────────────────
+    def search(self, query: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """k nearest rows by squared L2 distance, optionally only among `rows`; [(row, distance), ...]"""
+        vectors = self.vectors
+        if not len(vectors) or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        best_rows, best_dist = [], []
+        candidates = np.arange(len(vectors)) if rows is None else np.asarray(rows, dtype=np.int64)
+        for start in range(0, len(candidates), SEARCH_CHUNK_ROWS):
+            chunk_rows = candidates[start : start + SEARCH_CHUNK_ROWS]
+            chunk = vectors[chunk_rows] if rows is not None else vectors[start : start + len(chunk_rows)]
+            dist = np.einsum("ij,ij->i", chunk - query, chunk - query)
+            top = np.argpartition(dist, min(k, len(dist)) - 1)[:k]
+            best_rows.append(chunk_rows[top])
+            best_dist.append(dist[top])
+        all_rows, all_dist = np.concatenate(best_rows), np.concatenate(best_dist)
+        order = np.argsort(all_dist, kind="stable")[:k]
+        return [(int(all_rows[i]), float(all_dist[i])) for i in order]
+
+    def select_rows(
+        self,
+        type: Optional[str] = None,
+        session_id: Optional[str] = None,
+        tags: Optional[Sequence[str]] = None,
+    ) -> Optional[np.ndarray]:
+        """Rows matching every given filter (tags: any of them), from the indexes; None if no filter is set."""
+        where, params = [], []
+        if type:
+            where.append("type = ?")
+            params.append(type)
+        if session_id:
+            where.append("session_id = ?")
+            params.append(session_id)
+        if tags:
+            where.append(f"row IN (SELECT row FROM item_tags WHERE tag IN ({','.join('?' * len(tags))}))")
+            params.extend(tags)
+        if not where:
+            return None
+        result = self.db.execute(f"SELECT row FROM items WHERE {' AND '.join(where)} ORDER BY row", params)
+        return np.fromiter((row for row, in result), dtype=np.int64)
+
+    def items(self, rows: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+        """Metadata for rows, keyed by row."""
+        if not rows:
+            return {}
+        placeholders = ",".join("?" * len(rows))
+        result = self.db.execute(f"SELECT row, json FROM items WHERE row IN ({placeholders})", list(rows))
+        return {row: json.loads(data) for row, data in result}
+
+    def __len__(self) -> int:
+        return self.count
@@ -0,0 +1,132 @@
+"""
+Large tool results: spilled to disk by the server, read in slices by the client.
+
+Server side only here (the session10 copy also has the client-side LargeResult):
+
+    writer = SpillWriter("emails")
+    for email in emails:
+        writer.write(email)                     # streamed to disk once the result passes LARGE_RESULT_CHARS
+    text, handle = writer.finish()              # full text if small, else (preview, handle)
+
+A handle carries the spill file's `name` and `uri` = spill://{name}/0/{chars} (the whole result).
+register_spill_resource(mcp) serves slices as MCP resources: replace the last two URI segments
+with spill://{name}/{offset}/{length}. Agents that only call tools read the same slices through
+read_spilled(name, offset, length), which servers expose as a read_spill tool.
+"""
+import os
+import time
+import uuid
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+SPILL_DIR = Path(os.environ.get("MCP_SPILL_DIR", Path(tempfile.gettempdir()) / "mcp_spill"))
+LARGE_RESULT_CHARS = 32_000
+PREVIEW_CHARS = 2_000
+CHECKPOINT_CHARS = 64_000     # char → byte offsets recorded this often, so reads can seek
+SPILL_TTL_SECONDS = 24 * 3600
+READ_BLOCK_CHARS = 64_000
+
+
+# ───────────────────────────────────────────────────────────────
+# SERVER SIDE
+# ───────────────────────────────────────────────────────────────
+def _cleanup_old_spills() -> None:
+    cutoff = time.time() - SPILL_TTL_SECONDS
+    for file in SPILL_DIR.glob("*.md"):
+        try:
+            if file.stat().st_mtime < cutoff:
+                file.unlink()
+        except OSError:
+            pass
+
+
+class SpillWriter:
+    def __init__(self, name: str):
+        self.name = name
+        self._parts: list[str] = []   # held in memory until the result turns out to be large
+        self._chars = 0
+        self._bytes = 0
+        self._preview = ""
+        self._checkpoints: list[list[int]] = [[0, 0]]
+        self._file = None
+        self.path: Optional[Path] = None
+
+    def _open(self) -> None:
+        SPILL_DIR.mkdir(parents=True, exist_ok=True)
+        _cleanup_old_spills()
+        self.path = SPILL_DIR / f"{self.name}-{uuid.uuid4().hex[:12]}.md"
+        self._file = open(self.path, "w", encoding="utf-8", newline="")
+        parts, self._parts = self._parts, []
+        self._chars = self._bytes = 0
+        for part in parts:
+            self._append(part)
+
+    def _append(self, text: str) -> None:
+        if self._chars - self._checkpoints[-1][0] >= CHECKPOINT_CHARS:
+            self._checkpoints.append([self._chars, self._bytes])
+        self._file.write(text)
+        self._chars += len(text)
+        self._bytes += len(text.encode("utf-8"))
+
+    def write(self, text: str) -> None:
+        if not text:
+            return
+        if len(self._preview) < PREVIEW_CHARS:
+            self._preview += text[:PREVIEW_CHARS - len(self._preview)]
+        if self._file is not None:
+            self._append(text)
+            return
+        self._parts.append(text)
+        self._chars += len(text)
+        if self._chars > LARGE_RESULT_CHARS:
+            self._open()
+
+    def finish(self) -> tuple[str, Optional[dict]]:
+        """(full text, None) for small results, else (preview, handle)."""
+        if self._file is None:
+            return "".join(self._parts), None
+        self._file.close()
+        return self._preview, {
+            "path": str(self.path),
+            "name": self.path.name,
+            "uri": f"spill://{self.path.name}/0/{self._chars}",  # matches the resource template
+            "chars": self._chars,
+            "checkpoints": self._checkpoints,
+        }
+
+
+def spill_text(name: str, text: str) -> tuple[str, Optional[dict]]:
+    writer = SpillWriter(name)
+    for start in range(0, len(text), CHECKPOINT_CHARS):
+        writer.write(text[start:start + CHECKPOINT_CHARS])
+    return writer.finish()
+
+
+def read_spilled(name: str, offset: int = 0, length: int = PREVIEW_CHARS) -> str:
+    """A slice of a spilled tool result, by the `name` in its handle."""
+    path = SPILL_DIR / Path(name).name  # no path traversal out of SPILL_DIR
+    if not path.exists():
+        raise FileNotFoundError(f"No spilled result named {name!r} (expired after {SPILL_TTL_SECONDS // 3600}h?)")
+    return read_slice(path, int(offset), int(length))
+
+
+def register_spill_resource(mcp) -> None:
+    @mcp.resource("spill://{name}/{offset}/{length}")
+    def read_spilled_result(name: str, offset: str, length: str) -> str:
+        """A slice of a spilled tool result."""
+        return read_spilled(name, offset, length)
+
+
+def read_slice(path, start: int, length: int, checkpoints=((0, 0),)) -> str:
+    """Read `length` chars from char offset `start` without loading the file."""
+    char_pos, byte_pos = max((cp for cp in checkpoints if cp[0] <= start), default=(0, 0))
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        f.seek(byte_pos)
+        to_skip = start - char_pos
+        while to_skip > 0:
+            skipped = len(f.read(min(to_skip, READ_BLOCK_CHARS)))
+            if not skipped:
+                return ""
+            to_skip -= skipped
+        return f.read(max(0, length))
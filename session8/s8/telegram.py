@@ -1,8 +1,10 @@
 import asyncio
 import requests
 import os
+import sys
 from dotenv import load_dotenv
 from agent import CortexAgent
+from telegram_ingest import TelegramIngestor
 
 load_dotenv()
 
@@ -85,5 +87,28 @@ async def main():
     else:
         print("❌ Failed to send to Telegram")
     
+async def serve(workers: int = 4):
+    """Answer every new message in the chat: long-poll, queue, concurrent agent workers"""
+    print("🤖 Telegram-Agent Bridge serving (Ctrl+C to stop)...")
+
+    if not BOT_TOKEN or TARGET_CHAT_ID == 0:
+        print("❌ Please set TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID in .env")
+        return
+
+    agent = CortexAgent()
+
+    async def answer(message):
+        print(f"📨 Processing message from {message['from']}: {message['text'][:50]}...")
+        response = await agent.process_input(message['text'])
+        print(f"🧠 Agent response: {response[:100]}...")
+        return response
+
+    ingestor = TelegramIngestor(answer, workers=workers)
+    try:
+        await ingestor.run()
+    finally:
+        print(f"📊 {ingestor.stats}")
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    # --once: answer only the latest message (previous behaviour)
+    asyncio.run(main() if "--once" in sys.argv else serve())
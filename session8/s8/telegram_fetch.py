@@ -1,8 +1,9 @@
+import asyncio
 import requests
-import time
 import urllib3
 from dotenv import load_dotenv
 import os
+from telegram_ingest import TelegramIngestor
 
 # Suppress the warning for unverified HTTPS requests
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -61,10 +62,6 @@ TARGET_CHAT_ID = int(os.getenv('TELEGRAM_CHAT_ID', 0))
 # This is the URL for all Bot API actions
 BASE_URL = f"https://api.telegram.org/bot{BOT_TOKEN}"
 
-# This ID is used to tell Telegram which messages we've already seen.
-# We start at 0, and the API will send us the first unread message.
-last_update_id = 0
-
 # Timeout for the long poll (in seconds)
 # The server will wait up to this long for a new message.
 POLL_TIMEOUT = 60
@@ -87,78 +84,12 @@ def get_bot_info():
         print(f"Error connecting to Telegram API: {e}")
         return False
 
-def poll_for_messages():
-    """
-    Performs a single long poll request to the Telegram API.
-    """
-    global last_update_id
-    
-    # Parameters for the getUpdates API call
-    params = {
-        'offset': last_update_id,      # Start from the message after the last one we processed
-        'timeout': POLL_TIMEOUT,       # Tell Telegram to wait up to 60s
-        'allowed_updates': ['message', 'channel_post'] # We only care about new messages
-    }
-    
-    url = f"{BASE_URL}/getUpdates"
-    
-    try:
-        response = requests.get(url, params=params, timeout=POLL_TIMEOUT + 5, verify=False)
-        response.raise_for_status()
-        data = response.json()
-
-        if not data.get("ok"):
-            print(f"API Error: {data.get('description')}")
-            return
-
-        updates = data.get("result", [])
-        if not updates:
-            # This just means the poll timed out, no new messages.
-            # print("No new messages, polling again...")
-            return
-
-        for update in updates:
-            # IMPORTANT: We must increment the update_id to avoid processing
-            # the same message again in the next poll.
-            last_update_id = update['update_id'] + 1
-
-            # Check for a regular group message
-            if 'message' in update:
-                message = update['message']
-                chat_id = message['chat']['id']
-                
-                # Check if this message is from our target group
-                if chat_id == TARGET_CHAT_ID:
-                    sender_name = message.get('from', {}).get('first_name', 'Unknown')
-                    message_text = message.get('text', '[Media or non-text content]')
-                    
-                    print("\n--- NEW MESSAGE ---")
-                    print(f"From: {sender_name}")
-                    print(f"Message: {message_text}")
-                    print("-------------------")
-            
-            # This handles posts in a "Channel" (which groups can be)
-            elif 'channel_post' in update:
-                message = update['channel_post']
-                chat_id = message['chat']['id']
-
-                if chat_id == TARGET_CHAT_ID:
-                    sender_name = message.get('author_signature', 'Channel Post')
-                    message_text = message.get('text', '[Media or non-text content]')
-
-                    print("\n--- NEW CHANNEL POST ---")
-                    print(f"From: {sender_name}")
-                    print(f"Message: {message_text}")
-                    print("------------------------")
-
-
-    except requests.exceptions.RequestException as e:
-        print(f"Network error during poll: {e}")
-        # Wait a bit before retrying to avoid spamming on network failure
-        time.sleep(5)
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        time.sleep(5)
+async def print_message(message):
+    """Ingestor handler: print each new message (no reply)."""
+    print("\n--- NEW MESSAGE ---")
+    print(f"From: {message['from']}")
+    print(f"Message: {message['text']}")
+    print("-------------------")
 
 
 def main():
@@ -180,16 +111,8 @@ def main():
     print("Press Ctrl+C to stop.")
 
     try:
-        while True:
-            # This function will run, wait for messages,
-            # process them, and then return.
-            # The loop immediately calls it again to start the
-            # next long poll.
-            poll_for_messages()
-            
-            # No 'time.sleep()' is needed here because the
-            # 'timeout' in the request already provides the "wait".
-            
+        # Async long poll; the update offset is kept in telegram_offset.json across restarts
+        asyncio.run(TelegramIngestor(print_message, workers=1, poll_timeout=POLL_TIMEOUT).run())
     except KeyboardInterrupt:
         print("\nStopping bot...")
 
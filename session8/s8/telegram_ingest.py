@@ -0,0 +1,257 @@
+"""
+Async Telegram ingestion: long-poll getUpdates, queue messages, answer them with concurrent workers.
+
+    ingestor = TelegramIngestor(handler, workers=4)
+    await ingestor.run()          # until Ctrl+C / ingestor.stop()
+
+- One poller long-polls getUpdates and appends each message to the backlog of its conversation,
+  keyed by (chat id, thread id or sender id). It never waits on a single conversation: only when
+  `queue_size` messages are unfinished across all conversations does polling pause (backpressure).
+- `workers` workers take whichever conversation has a message ready and answer its oldest one; a
+  conversation is held by one worker at a time, so it keeps its message order while other chats,
+  threads and senders are answered concurrently. A slow handler ties up one worker, not a shard of
+  chats. With TELEGRAM_CHAT_ID set every message comes from one chat, so it's the thread/sender part
+  of the key that spreads work; a private chat (one sender) is answered serially.
+- Delivery is at-least-once: OFFSET_FILE (atomic replace) holds the next update_id to poll for and
+  every dispatched message not yet handled, rewritten as each one finishes. Polling then confirms
+  everything dispatched to Telegram, so one slow update doesn't pin the getUpdates window. After a
+  crash or a stop without drain, the saved unfinished messages are delivered again before polling.
+- `handler(message) -> str | None` gets {'update_id', 'chat_id', 'message_id', 'user_id', 'thread_id',
+  'from', 'text'}; a returned string is sent back as a reply.
+
+TELEGRAM_API_BASE points the client at another Bot API server, e.g. fake_telegram_api.py for tests.
+"""
+import os
+import json
+import time
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+TARGET_CHAT_ID = int(os.getenv('TELEGRAM_CHAT_ID', 0))   # 0 = accept every chat the bot is in
+API_BASE = os.getenv('TELEGRAM_API_BASE', "https://api.telegram.org")
+OFFSET_FILE = os.getenv('TELEGRAM_OFFSET_FILE', "telegram_offset.json")
+
+POLL_TIMEOUT = 50          # seconds Telegram holds a getUpdates request open
+POLL_LIMIT = 100           # updates per getUpdates call (Bot API maximum)
+RETRY_DELAY = 5            # seconds to wait after a failed poll
+QUEUE_SIZE = 200           # unfinished messages across all conversations before polling pauses
+MAX_MESSAGE_CHARS = 4096   # Bot API limit for sendMessage
+
+Handler = Callable[[dict], Awaitable[Optional[str]]]
+
+
+class OffsetStore:
+    """The next getUpdates offset and the dispatched-but-unfinished messages, kept in a small JSON file."""
+
+    def __init__(self, path: str = OFFSET_FILE):
+        self.path = path
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def load(self) -> int:
+        try:
+            return int(self._read().get("offset", 0))
+        except (TypeError, ValueError):
+            return 0
+
+    def load_pending(self) -> list[dict]:
+        pending = self._read().get("pending", [])
+        return [m for m in pending if isinstance(m, dict) and "update_id" in m] if isinstance(pending, list) else []
+
+    def save(self, offset: int, pending: Optional[list[dict]] = None):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"offset": offset, "pending": pending or [], "saved_at": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+def extract_message(update: dict) -> Optional[dict]:
+    """Text message or channel post from an update, in the shape handlers receive."""
+    message = update.get('message') or update.get('channel_post')
+    if not message or not message.get('text'):
+        return None
+    sender = message.get('from', {}).get('first_name') or message.get('author_signature', 'Channel Post')
+    return {
+        'update_id': update['update_id'],
+        'chat_id': message['chat']['id'],
+        'message_id': message['message_id'],
+        'user_id': message.get('from', {}).get('id', 0),
+        'thread_id': message.get('message_thread_id', 0),
+        'date': message.get('date', 0),
+        'from': sender,
+        'text': message['text'],
+    }
+
+
+def shard_key(message: dict) -> tuple:
+    """Messages with the same key are answered in order: one reply thread, else one sender, per chat."""
+    return message['chat_id'], ('thread', message['thread_id']) if message['thread_id'] else ('user', message['user_id'])
+
+
+class TelegramIngestor:
+    def __init__(
+        self,
+        handler: Handler,
+        workers: int = 4,
+        queue_size: int = QUEUE_SIZE,
+        token: Optional[str] = BOT_TOKEN,
+        chat_id: int = TARGET_CHAT_ID,
+        api_base: str = API_BASE,
+        offset_store: Optional[OffsetStore] = None,
+        poll_timeout: int = POLL_TIMEOUT,
+    ):
+        self.handler = handler
+        self.chat_id = chat_id
+        self.base_url = f"{api_base}/bot{token}"
+        self.poll_timeout = poll_timeout
+        self.offsets = offset_store or OffsetStore()
+        self.workers = workers
+        self.queue_size = max(1, queue_size)
+        self.client: Optional[httpx.AsyncClient] = None
+        self._stopping = asyncio.Event()
+        self._backlog: dict[tuple, deque] = {}   # conversation -> its unhandled messages, oldest first
+        self._ready: asyncio.Queue = asyncio.Queue()  # conversations with a message and no worker on it
+        self._pending: dict[int, dict] = {}     # update_id -> message, dispatched and not yet handled
+        self._next_update = 0                   # first update_id not yet dispatched
+        self._saved = None                      # (offset, pending ids) last written to OFFSET_FILE
+        self._progress = asyncio.Event()        # set whenever a worker finishes an update
+        self.stats = {"polls": 0, "received": 0, "processed": 0, "failed": 0, "replies": 0,
+                      "backpressure_waits": 0, "max_lag_s": 0.0}
+
+    # ── Bot API ────────────────────────────────────────────────
+    async def call(self, method: str, params: dict, http_timeout: float = 10) -> dict:
+        response = await self.client.post(f"{self.base_url}/{method}", json=params, timeout=http_timeout)
+        response.raise_for_status()
+        data = response.json()
+        if not data.get("ok"):
+            raise RuntimeError(f"Telegram {method} failed: {data.get('description')}")
+        return data
+
+    async def send_message(self, chat_id: int, text: str, reply_to: Optional[int] = None) -> bool:
+        params = {'chat_id': chat_id, 'text': text[:MAX_MESSAGE_CHARS]}
+        if reply_to:
+            params['reply_to_message_id'] = reply_to
+        try:
+            await self.call("sendMessage", params)
+            return True
+        except Exception as e:
+            print(f"❌ Error sending telegram message: {e}")
+            return False
+
+    # ── Polling ────────────────────────────────────────────────
+    def _commit(self):
+        """Save the next offset and the unfinished messages if either changed."""
+        state = (self._next_update, tuple(self._pending))
+        if state != self._saved:
+            self.offsets.save(self._next_update, list(self._pending.values()))
+            self._saved = state
+
+    def _dispatch(self, message: dict):
+        """Append to the conversation's backlog; a conversation nobody is working on becomes ready."""
+        self._pending[message['update_id']] = message
+        key = shard_key(message)
+        backlog = self._backlog.get(key)
+        if backlog is None:
+            self._backlog[key] = deque([message])
+            self._ready.put_nowait(key)
+        else:
+            backlog.append(message)
+        self.stats["received"] += 1
+
+    async def _poll_loop(self):
+        self._next_update = self.offsets.load()
+        for message in sorted(self.offsets.load_pending(), key=lambda m: m['update_id']):
+            self._dispatch(message)  # left unfinished by the previous run
+        self._commit()
+        params = {'limit': POLL_LIMIT, 'timeout': self.poll_timeout, 'allowed_updates': ['message', 'channel_post']}
+        while not self._stopping.is_set():
+            if len(self._pending) >= self.queue_size:
+                self.stats["backpressure_waits"] += 1
+                while len(self._pending) >= self.queue_size:
+                    self._progress.clear()
+                    await self._progress.wait()
+            try:
+                data = await self.call("getUpdates", {**params, 'offset': self._next_update}, http_timeout=self.poll_timeout + 10)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Network error during poll: {e}")
+                await asyncio.sleep(RETRY_DELAY)
+                continue
+
+            self.stats["polls"] += 1
+            for update in data.get("result", []):
+                if update['update_id'] < self._next_update:
+                    continue
+                self._next_update = update['update_id'] + 1
+                message = extract_message(update)
+                if message is None or (self.chat_id and message['chat_id'] != self.chat_id):
+                    continue
+                self._dispatch(message)
+            self._commit()  # before the next poll confirms these updates to Telegram
+
+    # ── Workers ────────────────────────────────────────────────
+    async def _worker(self):
+        while True:
+            key = await self._ready.get()
+            backlog = self._backlog[key]
+            message = backlog[0]
+            try:
+                if message['date']:
+                    self.stats["max_lag_s"] = max(self.stats["max_lag_s"], time.time() - message['date'])
+                reply = await self.handler(message)
+                self.stats["processed"] += 1
+                if reply:
+                    if await self.send_message(message['chat_id'], reply, reply_to=message['message_id']):
+                        self.stats["replies"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                print(f"❌ Handler failed for message {message['message_id']}: {e}")
+            except BaseException:
+                self._ready.task_done()  # cancelled mid-handler: stays pending, so it is delivered again
+                raise
+            backlog.popleft()
+            if backlog:
+                self._ready.put_nowait(key)
+            else:
+                del self._backlog[key]
+            self._pending.pop(message['update_id'], None)
+            self._commit()
+            self._progress.set()
+            self._ready.task_done()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self, drain: bool = True):
+        """Poll and dispatch until stop(); with drain, queued messages are finished before returning."""
+        async with httpx.AsyncClient(verify=False) as client:
+            self.client = client
+            workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+            poller = asyncio.create_task(self._poll_loop())
+            try:
+                await self._stopping.wait()
+            finally:
+                poller.cancel()
+                await asyncio.gather(poller, return_exceptions=True)
+                if drain:
+                    await self._ready.join()
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                self.client = None
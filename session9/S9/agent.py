@@ -5,10 +5,13 @@ import yaml
 from core.loop import AgentLoop
 from core.session import MultiMCP
 from core.context import MemoryItem, AgentContext
+from modules.action import set_sandbox_pool
+from modules.sandbox_pool import SandboxPool
 import datetime
 from pathlib import Path
 import json
 import re
+import os
 
 def log(stage: str, msg: str):
     """Simple timestamped console logger."""
@@ -27,6 +30,11 @@ async def main():
     multi_mcp = MultiMCP(server_configs=list(mcp_servers.values()))
     await multi_mcp.initialize()
 
+    # solve() plans run in pre-warmed worker processes instead of this one
+    sandbox_pool = SandboxPool("modules.sandbox_worker", cwd=os.path.dirname(os.path.abspath(__file__)))
+    await sandbox_pool.start()
+    set_sandbox_pool(sandbox_pool)
+
     try:
         while True:
             user_input = input("🧑 What do you want to solve today? → ")
@@ -66,6 +74,8 @@ async def main():
                     break
     except KeyboardInterrupt:
         print("\n👋 Received exit signal. Shutting down...")
+    finally:
+        await sandbox_pool.shutdown()
 
 if __name__ == "__main__":
     asyncio.run(main())
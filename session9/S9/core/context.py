@@ -54,7 +54,12 @@ class AgentContext:
 
         self.user_input = user_input
         self.agent_profile = AgentProfile()
-        self.memory = MemoryManager(session_id=session_id)
+        storage = self.agent_profile.memory_config.get("storage", {})
+        self.memory = MemoryManager(
+            session_id=session_id,
+            fsync=storage.get("fsync", "flush"),
+            max_buffered=storage.get("max_buffered", 64),
+        )
         self.session_id = self.memory.session_id
         self.dispatcher = dispatcher  # 🆕 Added formally
         self.mcp_server_descriptions = mcp_server_descriptions  # 🆕 Added formally
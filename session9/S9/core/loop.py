@@ -26,9 +26,16 @@ class AgentLoop:
         self.model = ModelManager()
 
     async def run(self):
+        try:
+            return await self._run_steps()
+        finally:
+            self.context.memory.flush()  # whatever the last step buffered
+
+    async def _run_steps(self):
         max_steps = self.context.agent_profile.strategy.max_steps
 
         for step in range(max_steps):
+            self.context.memory.flush()  # step boundary: persist the previous step's items
             print(f"🔁 Step {step+1}/{max_steps} starting...")
             self.context.step = step
             lifelines_left = self.context.agent_profile.strategy.max_lifelines_per_step
@@ -10,6 +10,8 @@ import asyncio
 from datetime import datetime, timedelta
 import time
 import re
+from web_cache import ResponseCache, SEARCH_TTL_SECONDS
+from html_text import html_to_text, MAX_TEXT_CHARS
 from pydantic import BaseModel, Field
 from models import SearchInput, UrlInput
 from models import PythonCodeOutput  # Import the models we need
@@ -24,24 +26,41 @@ class SearchResult:
 
 
 class RateLimiter:
-    def __init__(self, requests_per_minute: int = 30):
+    """Token bucket per host: up to `burst` requests at once, refilled at requests_per_minute.
+
+    A caller takes its token under the lock (tokens may go negative, which queues callers in
+    arrival order) and sleeps outside it, so concurrent fetches can't all slip past the limit
+    and one slow host never blocks the others.
+    """
+
+    def __init__(self, requests_per_minute: int = 30, burst: Optional[int] = None):
         self.requests_per_minute = requests_per_minute
-        self.requests = []
-
-    async def acquire(self):
-        now = datetime.now()
-        # Remove requests older than 1 minute
-        self.requests = [
-            req for req in self.requests if now - req < timedelta(minutes=1)
-        ]
-
-        if len(self.requests) >= self.requests_per_minute:
-            # Wait until we can make another request
-            wait_time = 60 - (now - self.requests[0]).total_seconds()
+        self.rate = requests_per_minute / 60.0
+        self.burst = float(burst or max(1, requests_per_minute // 6))
+        self._buckets: Dict[str, List[float]] = {}  # host -> [tokens, last refill time]
+        self._lock = asyncio.Lock()
+        self.stats: Dict[str, Dict[str, float]] = {}  # host -> requests / waited / wait_seconds
+
+    async def acquire(self, host: str = ""):
+        async with self._lock:
+            now = time.monotonic()
+            bucket = self._buckets.setdefault(host, [self.burst, now])
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate) - 1
+            bucket[1] = now
+            wait_time = -bucket[0] / self.rate if bucket[0] < 0 else 0.0
+
+            stats = self.stats.setdefault(host, {"requests": 0, "waited": 0, "wait_seconds": 0.0})
+            stats["requests"] += 1
             if wait_time > 0:
-                await asyncio.sleep(wait_time)
+                stats["waited"] += 1
+                stats["wait_seconds"] += wait_time
+
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+        return wait_time
 
-        self.requests.append(now)
+
+http_cache = ResponseCache()
 
 
 class DuckDuckGoSearcher:
@@ -53,6 +72,11 @@ class DuckDuckGoSearcher:
     def __init__(self):
         self.rate_limiter = RateLimiter()
 
+    @staticmethod
+    def has_results(html: str) -> bool:
+        """Only pages with result markup are cached; bot-detection and empty pages are re-fetched."""
+        return "result__title" in html
+
     def format_results_for_llm(self, results: List[SearchResult]) -> str:
         """Format results in a natural language style that's easier for LLMs to process"""
         if not results:
@@ -73,9 +97,6 @@ class DuckDuckGoSearcher:
         self, query: str, ctx: Context, max_results: int = 10
     ) -> List[SearchResult]:
         try:
-            # Apply rate limiting
-            await self.rate_limiter.acquire()
-
             # Create form data for POST request
             data = {
                 "q": query,
@@ -85,11 +106,12 @@ class DuckDuckGoSearcher:
 
             await ctx.info(f"Searching DuckDuckGo for: {query}")
 
-            async with httpx.AsyncClient() as client:
-                result = await client.post(
-                    self.BASE_URL, data=data, headers=self.HEADERS, timeout=30.0
-                )
-                result.raise_for_status()
+            # Pooled client + disk cache; rate limiting applies only when the network is hit
+            result = await http_cache.request(
+                "POST", self.BASE_URL, data=data, headers=self.HEADERS,
+                ttl=SEARCH_TTL_SECONDS, rate_limiter=self.rate_limiter,
+                cacheable=self.has_results,
+            )
 
             # Parse HTML result
             soup = BeautifulSoup(result.text, "html.parser")
@@ -155,42 +177,23 @@ class WebContentFetcher:
     async def fetch_and_parse(self, url: str, ctx: Context) -> str:
         """Fetch and parse content from a webpage"""
         try:
-            await self.rate_limiter.acquire()
-
             await ctx.info(f"Fetching content from: {url}")
 
-            async with httpx.AsyncClient() as client:
-                result = await client.get(
-                    url,
-                    headers={
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                    },
-                    follow_redirects=True,
-                    timeout=30.0,
-                )
-                result.raise_for_status()
-
-            # Parse the HTML
-            soup = BeautifulSoup(result.text, "html.parser")
-
-            # Remove script and style elements
-            for element in soup(["script", "style", "nav", "header", "footer"]):
-                element.decompose()
-
-            # Get the text content
-            text = soup.get_text()
-
-            # Clean up the text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = " ".join(chunk for chunk in chunks if chunk)
-
-            # Remove extra whitespace
-            text = re.sub(r"\s+", " ", text).strip()
+            result = await http_cache.request(
+                "GET",
+                url,
+                headers={
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+                },
+                rate_limiter=self.rate_limiter,
+            )
+            if result.source != "network":
+                await ctx.info(f"Served {url} from the HTTP cache ({result.source})")
 
-            # Truncate if too long
-            if len(text) > 8000:
-                text = text[:8000] + "... [content truncated]"
+            # Streamed extraction that stops once the text budget is reached
+            text, truncated = html_to_text(result.text, MAX_TEXT_CHARS)
+            if truncated:
+                text += "... [content truncated]"
 
             await ctx.info(
                 f"Successfully fetched and parsed content ({len(text)} characters)"
@@ -24,60 +24,78 @@ class ToolCallResult(BaseModel):
 
 MAX_TOOL_CALLS_PER_PLAN = 5
 
-async def run_python_sandbox(code: str, dispatcher: Any) -> str:
-    print("[action] 🔍 Entered run_python_sandbox()")
+class SandboxMCP:
+    """The `mcp` object a solve() plan sees: real tool calls, capped per plan."""
+
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+        self.call_count = 0
+
+    async def call_tool(self, tool_name: str, input_dict: dict):
+        self.call_count += 1
+        if self.call_count > MAX_TOOL_CALLS_PER_PLAN:
+            raise RuntimeError(f"Exceeded max tool calls ({MAX_TOOL_CALLS_PER_PLAN}) in solve() plan.")
+        # REAL tool call now
+        result = await self.dispatcher.call_tool(tool_name, input_dict)
+        return result
+
 
+async def execute_plan(code: str, dispatcher: Any) -> str:
+    """exec the plan and run its solve(); raises on any failure. Used in-process and by modules/sandbox_worker.py."""
     # Create a fresh module scope
     sandbox = types.ModuleType("sandbox")
+    sandbox.mcp = SandboxMCP(dispatcher)
 
-    try:
-        # Patch MCP client with real dispatcher
-        class SandboxMCP:
-            def __init__(self, dispatcher):
-                self.dispatcher = dispatcher
-                self.call_count = 0
+    # Preload safe built-ins into the sandbox
+    import json, re
+    sandbox.__dict__["json"] = json
+    sandbox.__dict__["re"] = re
 
-            async def call_tool(self, tool_name: str, input_dict: dict):
-                self.call_count += 1
-                if self.call_count > MAX_TOOL_CALLS_PER_PLAN:
-                    raise RuntimeError(f"Exceeded max tool calls ({MAX_TOOL_CALLS_PER_PLAN}) in solve() plan.")
-                # REAL tool call now
-                result = await self.dispatcher.call_tool(tool_name, input_dict)
-                return result
+    # Execute solve fn dynamically
+    exec(compile(code, "<solve_plan>", "exec"), sandbox.__dict__)
 
-        sandbox.mcp = SandboxMCP(dispatcher)
+    solve_fn = sandbox.__dict__.get("solve")
+    if solve_fn is None:
+        raise ValueError("No solve() function found in plan.")
 
-        # Preload safe built-ins into the sandbox
-        import json, re
-        sandbox.__dict__["json"] = json
-        sandbox.__dict__["re"] = re
+    if asyncio.iscoroutinefunction(solve_fn):
+        result = await solve_fn()
+    else:
+        result = solve_fn()
 
-        # Execute solve fn dynamically
-        exec(compile(code, "<solve_plan>", "exec"), sandbox.__dict__)
+    # Clean result formatting
+    if isinstance(result, dict) and "result" in result:
+        return f"{result['result']}"
+    elif isinstance(result, dict):
+        return f"{json.dumps(result)}"
+    elif isinstance(result, list):
+        return f"{' '.join(str(r) for r in result)}"
+    else:
+        return f"{result}"
 
-        solve_fn = sandbox.__dict__.get("solve")
-        if solve_fn is None:
-            raise ValueError("No solve() function found in plan.")
 
-        if asyncio.iscoroutinefunction(solve_fn):
-            result = await solve_fn()
-        else:
-            result = solve_fn()
+# Optional process isolation: set_sandbox_pool(SandboxPool("modules.sandbox_worker", ...)) from agent.py
+SANDBOX_TIMEOUT = 120  # seconds of wall clock per plan before the worker is killed
+_SANDBOX_POOL = None
 
-        # Clean result formatting
-        if isinstance(result, dict) and "result" in result:
-            return f"{result['result']}"
-        elif isinstance(result, dict):
-            return f"{json.dumps(result)}"
-        elif isinstance(result, list):
-            return f"{' '.join(str(r) for r in result)}"
-        else:
-            return f"{result}"
 
+def set_sandbox_pool(pool) -> None:
+    global _SANDBOX_POOL
+    _SANDBOX_POOL = pool
 
 
+async def run_python_sandbox(code: str, dispatcher: Any) -> str:
+    print("[action] 🔍 Entered run_python_sandbox()")
 
+    async def on_tool_call(tool_name: str, input_dict: dict):
+        # CallToolResult crosses the pipe as JSON; the worker rebuilds it
+        result = await dispatcher.call_tool(tool_name, input_dict)
+        return result.model_dump(mode="json")
 
+    try:
+        if _SANDBOX_POOL is not None:
+            return await _SANDBOX_POOL.run({"code": code}, on_tool_call, timeout=SANDBOX_TIMEOUT)
+        return await execute_plan(code, dispatcher)
 
     except Exception as e:
         log("sandbox", f"⚠️ Execution error: {e}")
@@ -14,7 +14,7 @@ except ImportError:
         now = datetime.datetime.now().strftime("%H:%M:%S")
         print(f"[{now}] [{stage}] {msg}")
 
-model = ModelManager()
+model = ModelManager(role="decision")
 
 
 # prompt_path = "prompts/decision_prompt.txt"
@@ -2,7 +2,8 @@ from mcp.server.fastmcp import FastMCP, Context
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import yaml
-from memory import MemoryManager  # Import MemoryManager to use its path structure
+from memory import MemoryManager, read_records  # Import MemoryManager to use its path structure
+from memory_index import MemoryIndex, SEARCH_WORD_LIMIT
 import json
 import os
 import sys
@@ -12,6 +13,7 @@ from pydantic import BaseModel  # Add this import
 # Define input model here
 class SearchInput(BaseModel):
     query: str
+    word_limit: int = SEARCH_WORD_LIMIT
 
 BASE_MEMORY_DIR = "memory"
 
@@ -37,43 +39,52 @@ class MemoryStore:
         self.memory_dir = BASE_MEMORY_DIR
         # self.memory_manager = None
         self.current_session = None  # Track current session
+        self.current_path = None
         os.makedirs(self.memory_dir, exist_ok=True)
+        # Full-text index, kept current by MemoryManager on every flush
+        self.index = MemoryIndex(self.memory_dir)
+        if not self.index.scanned:
+            print(f"Indexed {self.index.rebuild()} memories from existing sessions")
 
     def load_session(self, session_id: str):
         """Load memory manager for a specific session."""
         # self.memory_manager = MemoryManager(session_id=session_id, memory_dir=self.memory_dir)
         self.current_session = session_id
 
-    def _list_all_memories(self) -> List[Dict]:
-        """Load all memory files using MemoryManager's date-based structure"""
-        all_memories = []
-        base_path = self.memory_dir  # Use the simple memory_dir path
-        
-        for year_dir in os.listdir(base_path):
-            year_path = os.path.join(base_path, year_dir)
-            if not os.path.isdir(year_path):
+    def _active_session(self) -> Optional[Dict[str, str]]:
+        """Pointer to the session the agent is writing (MemoryManager records it in the index)."""
+        active = self.index.active()
+        if active:
+            self.load_session(active["session_id"])
+            self.current_path = active["path"]
+        return active
+
+    def read_current(self, cursor: str = "") -> Dict[str, Any]:
+        """Items of the active session appended after `cursor` ("offset:count:session_id"; "" = from the start)."""
+        active = self._active_session()
+        if not active:
+            return {"error": "No active session"}
+        offset, count, session_id = 0, 0, active["session_id"]
+        if cursor:
+            cursor_offset, cursor_count, cursor_session = cursor.split(":", 2)
+            if cursor_session == session_id:  # otherwise the session changed: start over
+                offset, count = int(cursor_offset), int(cursor_count)
+
+        records, end = read_records(self.current_path, offset) if os.path.exists(self.current_path) else ([], offset)
+        interactions, updates = [], []
+        for record in records:
+            if "_patch" in record:
+                updates.append(record)  # field changes to an item returned earlier
                 continue
-                
-            for month_dir in os.listdir(year_path):
-                month_path = os.path.join(year_path, month_dir)
-                if not os.path.isdir(month_path):
-                    continue
-                    
-                for day_dir in os.listdir(month_path):
-                    day_path = os.path.join(month_path, day_dir)
-                    if not os.path.isdir(day_path):
-                        continue
-                        
-                    for file in os.listdir(day_path):
-                        if file.endswith('.json'):
-                            try:
-                                with open(os.path.join(day_path, file), 'r') as f:
-                                    session_memories = json.load(f)
-                                    all_memories.extend(session_memories)  # Extend instead of append
-                            except Exception as e:
-                                print(f"Failed to load {file}: {e}")
-        
-        return all_memories
+            if record.get("type") != "run_metadata":
+                interactions.append({"index": count, **record})
+            count += 1
+        return {
+            "session_id": session_id,
+            "interactions": interactions,
+            "updates": updates,
+            "cursor": f"{end}:{count}:{session_id}",
+        }
 
     def _get_conversation_flow(self, conversation_id: str = None) -> Dict:
         """Get sequence of interactions in a conversation"""
@@ -122,42 +133,12 @@ def handle_shutdown(signum, frame):
 
 @mcp.tool()
 async def get_current_conversations(input: Dict) -> Dict[str, Any]:
-    """Get current session interactions. Usage: input={"input":{}} result = await mcp.call_tool('get_current_conversations', input)"""
+    """Get current session interactions; pass the returned cursor to get only newer ones. Usage: input={"input":{}} or input={"input":{"cursor": "<cursor>"}} result = await mcp.call_tool('get_current_conversations', input)"""
     try:
-        # Use absolute paths
-        memory_root = os.path.join(ROOT_DIR, "memory")  # ROOT_DIR is already defined at top
-        dt = datetime.now()
-        
-        # List all files in today's directory
-        day_path = os.path.join(
-            memory_root,
-            str(dt.year),
-            f"{dt.month:02d}",
-            f"{dt.day:02d}"
-        )
-        
-        if not os.path.exists(day_path):
-            return {"error": "No sessions found for today"}
-            
-        # Get most recent session file
-        session_files = [f for f in os.listdir(day_path) if f.endswith('.json')]
-        if not session_files:
-            return {"error": "No session files found"}
-            
-        latest_file = sorted(session_files)[-1]  # Get most recent
-        file_path = os.path.join(day_path, latest_file)
-        
-        # Read and return contents
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-            
-        return {"result": {
-                    "session_id": latest_file.replace(".json", ""),
-                    "interactions": [
-                        item for item in data 
-                        if item.get("type") != "run_metadata"
-                    ]
-                }}
+        current = memory_store.read_current(input.get("cursor", ""))
+        if "error" in current:
+            return current
+        return {"result": current}
     except Exception as e:
         print(f"[memory] Error: {str(e)}")  # Debug print
         return {"error": str(e)}
@@ -166,51 +147,14 @@ async def get_current_conversations(input: Dict) -> Dict[str, Any]:
 async def search_historical_conversations(input: SearchInput) -> Dict[str, Any]:
     """Search conversation memory between user and YOU. Usage: input={"input": {"query": "anmol singh"}} result = await mcp.call_tool('search_historical_conversations', input)"""
     try:
-        all_memories = memory_store._list_all_memories()
-        search_terms = input.query.lower().split()
-        
-        matches = []
-        for memory in all_memories:
-            # Only search in user query, final answer, and intent
-            memory_content = " ".join([
-                str(memory.get("user_query", "")),
-                str(memory.get("final_answer", "")),
-                str(memory.get("intent", ""))
-            ]).lower()
-            
-            if all(term in memory_content for term in search_terms):
-                # Only keep fields we want to return
-                matches.append({
-                    "user_query": memory.get("user_query", ""),
-                    "final_answer": memory.get("final_answer", ""),
-                    "timestamp": memory.get("timestamp", ""),
-                    "intent": memory.get("intent", "")
-                })
-
-        # Sort by timestamp (most recent last)
-        matches.sort(key=lambda x: x.get("timestamp", ""), reverse=False)
-        
-        # Count total words in matches
-        total_words = 0
-        filtered_matches = []
-        WORD_LIMIT = 10000
-        
-        for match in matches:
-            match_text = " ".join([
-                str(match.get("user_query", "")),
-                str(match.get("final_answer", ""))
-            ])
-            words_in_match = len(match_text.split())
-            
-            if total_words + words_in_match <= WORD_LIMIT:
-                filtered_matches.append(match)
-                total_words += words_in_match
-            else:
-                break
-        
+        # Ranking and the word budget are applied inside the index query
+        matches = memory_store.index.search(input.query, word_limit=input.word_limit)
         return {"result": {
-                    "status": "error",
-                    "message": str(e)
+                    "status": "success",
+                    "matches": matches,
+                    "total_words": sum(
+                        len(f"{match['user_query']} {match['final_answer']}".split()) for match in matches
+                    )
                 }}
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -1,11 +1,30 @@
 # modules/memory.py
 
+# Session files are JSONL: one MemoryItem per line, appended as the session grows. Items are
+# buffered and written at step boundaries (flush()), so a step costs one append instead of a
+# rewrite of the whole session. A later change to an already written item (add_tool_success)
+# is appended as a patch line {"_patch": index, ...fields} and applied on load.
+
+# fsync policy (memory.storage.fsync in profiles.yaml):
+#   always → every item is written and fsynced immediately (no buffering)
+#   flush  → buffered; each flush is fsynced (default)
+#   never  → buffered; flushes are left to the OS page cache
+
+# A crash mid-write leaves at most one unterminated last line; the loader drops it and
+# truncates the file back to the last complete line. Legacy session-*.json files are still
+# read and are converted to JSONL on their first flush.
+
 import json
 import os
 import time
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from pydantic import BaseModel
 
+try:
+    from modules.memory_index import MemoryIndex
+except ImportError:
+    from memory_index import MemoryIndex
+
 # Optional fallback logger
 try:
     from agent import log
@@ -15,11 +34,55 @@ except ImportError:
         now = datetime.datetime.now().strftime("%H:%M:%S")
         print(f"[{now}] [{stage}] {msg}")
 
+FSYNC_POLICIES = ("always", "flush", "never")
+MAX_BUFFERED_ITEMS = 64  # flush early if a step buffers this many items
+
+
+def read_records(path: str, offset: int = 0) -> Tuple[List[dict], int]:
+    """JSON records of a JSONL session file from byte `offset` on, and the offset after the last complete line."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1  # an unterminated tail is a torn (or in-progress) write
+    records = []
+    for number, line in enumerate(data[:end].splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            log("memory", f"⚠️ Skipping unreadable line {number} of {path}")
+    return records, offset + end
+
+
+def apply_records(records: List[dict]) -> List[dict]:
+    """Fold patch lines into the items they refer to."""
+    items = []
+    for record in records:
+        if "_patch" in record:
+            index = record.pop("_patch")
+            if 0 <= index < len(items):
+                items[index].update(record)
+        else:
+            items.append(record)
+    return items
+
+
+def load_session_items(path: str) -> List[dict]:
+    """Raw memory items of a session file, JSONL or legacy JSON."""
+    if path.endswith(".jsonl"):
+        return apply_records(read_records(path)[0])
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
 class MemoryItem(BaseModel):
     """Represents a single memory entry for a session."""
     timestamp: float
     type: str  # run_metadata, tool_call, tool_output, final_answer
     text: str
+    session_id: Optional[str] = None
+    user_query: Optional[str] = None
     tool_name: Optional[str] = None
     tool_args: Optional[dict] = None
     tool_result: Optional[dict] = None
@@ -32,35 +95,81 @@ class MemoryItem(BaseModel):
 class MemoryManager:
     """Manages session memory (read/write/append)."""
 
-    def __init__(self, session_id: str, memory_dir: str = "memory"):
+    def __init__(
+        self,
+        session_id: str,
+        memory_dir: str = "memory",
+        fsync: str = "flush",
+        max_buffered: int = MAX_BUFFERED_ITEMS,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
         self.session_id = session_id
         self.memory_dir = memory_dir
-        self.memory_path = os.path.join('memory', session_id.split('-')[0], session_id.split('-')[1], session_id.split('-')[2], f'session-{session_id}.json')
+        self.fsync = fsync
+        self.max_buffered = max_buffered
+        base_path = os.path.join('memory', session_id.split('-')[0], session_id.split('-')[1], session_id.split('-')[2], f'session-{session_id}')
+        self.memory_path = f"{base_path}.jsonl"
+        self.legacy_path = f"{base_path}.json"
         self.items: List[MemoryItem] = []
+        self._written = 0            # items[:_written] are on disk
+        self._patches: List[Dict[str, Any]] = []  # changes to written items, not yet on disk
+        self._size = 0               # bytes of complete lines in memory_path
 
         if not os.path.exists(self.memory_dir):
             os.makedirs(self.memory_dir)
 
+        self.index = MemoryIndex(self.memory_dir)
         self.load()
+        try:
+            self.index.set_active(self.session_id, self.memory_path)  # tells the memory server
+        except Exception as e:
+            log("memory", f"⚠️ Active session not recorded: {e}")
 
     def load(self):
+        self.items, self._patches, self._written, self._size = [], [], 0, 0
         if os.path.exists(self.memory_path):
-            with open(self.memory_path, "r", encoding="utf-8") as f:
-                raw = json.load(f)
-                self.items = [MemoryItem(**item) for item in raw]
-        else:
-            self.items = []
+            records, self._size = read_records(self.memory_path)
+            self.items = [MemoryItem(**item) for item in apply_records(records)]
+            self._written = len(self.items)
+            if self._size < os.path.getsize(self.memory_path):
+                log("memory", f"⚠️ Dropping partially written tail of {self.memory_path}")
+                with open(self.memory_path, "r+b") as f:
+                    f.truncate(self._size)
+        elif os.path.exists(self.legacy_path):
+            self.items = [MemoryItem(**item) for item in load_session_items(self.legacy_path)]
+            # _written stays 0: the first flush writes everything as JSONL
+
+    def flush(self):
+        """Append buffered items and patches to the session file (one write per call)."""
+        pending = self._patches + [item.dict() for item in self.items[self._written:]]
+        if not pending:
+            return
+        os.makedirs(os.path.dirname(self.memory_path), exist_ok=True)
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in pending).encode("utf-8")
+        with open(self.memory_path, "ab") as f:
+            f.write(data)
+            f.flush()
+            if self.fsync != "never":
+                os.fsync(f.fileno())
+        self._size += len(data)
+        self._written = len(self.items)
+        self._patches = []
+        if os.path.exists(self.legacy_path):
+            os.remove(self.legacy_path)  # converted
+            self.index.forget(self.legacy_path)
+        try:
+            self.index.index_file(self.memory_path, session_id=self.session_id)
+        except Exception as e:
+            log("memory", f"⚠️ Search index not updated: {e}")
 
     def save(self):
-        # Before opening the file for writing
-        os.makedirs(os.path.dirname(self.memory_path), exist_ok=True)
-        with open(self.memory_path, "w", encoding="utf-8") as f:
-            raw = [item.dict() for item in self.items]
-            json.dump(raw, f, indent=2)
+        self.flush()
 
     def add(self, item: MemoryItem):
         self.items.append(item)
-        self.save()
+        if self.fsync == "always" or len(self.items) - self._written >= self.max_buffered:
+            self.flush()
 
     def add_tool_call(
         self, tool_name: str, tool_args: dict, tags: Optional[List[str]] = None
@@ -117,11 +226,15 @@ class MemoryManager:
         """Patch last tool call or output for a given tool with success=True/False."""
 
         # Search backwards for latest matching tool call/output
-        for item in reversed(self.items):
+        for index in range(len(self.items) - 1, -1, -1):
+            item = self.items[index]
             if item.tool_name == tool_name and item.type in {"tool_call", "tool_output"}:
                 item.success = success
                 log("memory", f"✅ Marked {tool_name} as success={success}")
-                self.save()
+                if index < self._written:
+                    self._patches.append({"_patch": index, "success": success})
+                if self.fsync == "always":
+                    self.flush()
                 return
 
         log("memory", f"⚠️ Tried to mark {tool_name} as success={success} but no matching memory found.")
@@ -0,0 +1,179 @@
+# modules/memory_index.py → Full-text index over session memory files
+# Role: Answer search_historical_conversations from SQLite FTS5 instead of loading every session.
+
+# Layout (memory/index.sqlite3):
+
+# files   → one row per session file: path (relative to the memory dir), session_id, bytes indexed,
+#           and the session's latest user_query (carried onto its final answers)
+# entries → FTS5 table over user_query / final_answer / intent of every item that has one,
+#           with the word count used for the search word budget
+
+# Session JSONL files only grow, so index_file() reads just the bytes past the stored offset.
+# MemoryManager calls it after every flush; rebuild() walks the memory dir once for files
+# written before the index existed (legacy .json sessions are re-read whole when they change);
+# the memory server runs it on startup until it has completed once.
+
+# modules/memory_index.py
+
+import os
+import re
+import json
+import time
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+INDEX_FILE = "index.sqlite3"
+SEARCH_WORD_LIMIT = 10000
+SEARCH_FIELDS = ("user_query", "final_answer", "intent")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    session_id TEXT,
+    size INTEGER,
+    user_query TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries USING fts5(
+    user_query, final_answer, intent,
+    path UNINDEXED, session_id UNINDEXED, timestamp UNINDEXED, words UNINDEXED,
+    tokenize = 'unicode61'
+);
+CREATE TABLE IF NOT EXISTS index_info (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class MemoryIndex:
+    def __init__(self, memory_dir: str = "memory"):
+        self.memory_dir = memory_dir
+        os.makedirs(memory_dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(memory_dir, INDEX_FILE), timeout=10, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")  # the agent writes while the memory server reads
+        self.db.executescript(SCHEMA)
+
+    def _key(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.memory_dir))
+
+    @property
+    def scanned(self) -> bool:
+        """Whether rebuild() has picked up the files written before the index existed."""
+        return self.db.execute("SELECT 1 FROM index_info WHERE key = 'scanned_at'").fetchone() is not None
+
+    # ── Indexing ───────────────────────────────────────────────
+    def index_file(self, path: str, session_id: Optional[str] = None) -> int:
+        """Index what was appended to a session file since the last call; returns new entries."""
+        key = self._key(path)
+        row = self.db.execute("SELECT size, user_query FROM files WHERE path = ?", (key,)).fetchone()
+        size, user_query = row if row else (0, None)
+        # MemoryManager names files session-{session_id}.jsonl
+        session_id = session_id or os.path.splitext(os.path.basename(path))[0].removeprefix("session-")
+
+        if path.endswith(".jsonl"):
+            with open(path, "rb") as f:
+                f.seek(size)
+                data = f.read()
+            data = data[: data.rfind(b"\n") + 1]  # complete lines only
+            records = []
+            for line in data.splitlines():
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+            new_size = size + len(data)
+        else:
+            new_size = os.path.getsize(path)
+            if new_size == size:
+                return 0
+            with open(path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            self.db.execute("DELETE FROM entries WHERE path = ?", (key,))
+            user_query = None
+
+        rows = []
+        for record in records:
+            if "_patch" in record:
+                continue
+            user_query = record.get("user_query") or user_query
+            row = self._entry(record, user_query)
+            if row:
+                rows.append((*row, key, record.get("session_id") or session_id, record.get("timestamp")))
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO entries(user_query, final_answer, intent, words, path, session_id, timestamp) "
+                "VALUES (?,?,?,?,?,?,?)",
+                rows,
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO files(path, session_id, size, user_query) VALUES (?,?,?,?)",
+                (key, session_id, new_size, user_query),
+            )
+        return len(rows)
+
+    @staticmethod
+    def _entry(record: Dict[str, Any], session_query: Optional[str]):
+        if not any(record.get(field) for field in SEARCH_FIELDS):
+            return None
+        user_query = str(record.get("user_query") or session_query or "")
+        final_answer = str(record.get("final_answer") or "")
+        words = len(f"{user_query} {final_answer}".split())
+        return user_query, final_answer, str(record.get("intent") or ""), words
+
+    # ── Active session ─────────────────────────────────────────
+    def set_active(self, session_id: str, path: str):
+        """Record the session the agent is writing, for get_current_conversations."""
+        value = json.dumps({"session_id": session_id, "path": self._key(path)})
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO index_info(key, value) VALUES ('active_session', ?)", (value,))
+
+    def active(self) -> Optional[Dict[str, str]]:
+        """{'session_id', 'path'} of the session last opened by a MemoryManager, or None."""
+        row = self.db.execute("SELECT value FROM index_info WHERE key = 'active_session'").fetchone()
+        if not row:
+            return None
+        active = json.loads(row[0])
+        active["path"] = os.path.join(self.memory_dir, active["path"])
+        return active
+
+    def forget(self, path: str):
+        key = self._key(path)
+        with self.db:
+            self.db.execute("DELETE FROM entries WHERE path = ?", (key,))
+            self.db.execute("DELETE FROM files WHERE path = ?", (key,))
+
+    def rebuild(self) -> int:
+        """Index every session file under the memory dir that isn't indexed yet (or has grown)."""
+        total = 0
+        for root, _, files in os.walk(self.memory_dir):
+            for file in files:
+                if file.endswith((".json", ".jsonl")):
+                    try:
+                        total += self.index_file(os.path.join(root, file))
+                    except Exception as e:
+                        print(f"Failed to index {file}: {e}")
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO index_info(key, value) VALUES ('scanned_at', ?)", (str(time.time()),))
+        return total
+
+    # ── Search ─────────────────────────────────────────────────
+    def search(self, query: str, word_limit: int = SEARCH_WORD_LIMIT, limit: int = 100) -> List[Dict[str, Any]]:
+        """Best-ranked (bm25) entries containing every term as a word prefix, until word_limit words."""
+        terms = re.findall(r"\w+", query.lower())
+        if not terms:
+            return []
+        match = " ".join('"{}"*'.format(term) for term in terms)
+        result = self.db.execute(
+            """
+            SELECT user_query, final_answer, intent, timestamp, session_id, score FROM (
+                SELECT *, SUM(words) OVER (ORDER BY score, id ROWS UNBOUNDED PRECEDING) AS running FROM (
+                    SELECT rowid AS id, user_query, final_answer, intent, timestamp, session_id, words,
+                           bm25(entries) AS score
+                    FROM entries WHERE entries MATCH ?
+                )
+            )
+            WHERE running <= ? ORDER BY score, id LIMIT ?
+            """,
+            (match, word_limit, limit),
+        )
+        return [
+            {"user_query": q, "final_answer": a, "intent": i, "timestamp": t, "session_id": s, "score": round(-score, 3)}
+            for q, a, i, t, s, score in result
+        ]
@@ -18,7 +18,7 @@ except ImportError:
         now = datetime.datetime.now().strftime("%H:%M:%S")
         print(f"[{now}] [{stage}] {msg}")
 
-model = ModelManager()
+model = ModelManager(role="perception")
 
 
 prompt_path = "prompts/perception_prompt.txt"
@@ -0,0 +1,328 @@
+"""
+Pre-warmed worker processes for running LLM-generated code out of the agent's process.
+
+Parent side: SandboxPool keeps `size` workers alive, hands each job to an idle one and answers
+the worker's tool-call requests (the workers never talk to MCP servers themselves). A worker is
+killed and replaced when it overruns its wall-clock budget or dies (CPU/memory limit), and is
+recycled after `max_runs` jobs so leaked state never outlives a few plans.
+
+Worker side: run_worker(execute) is the whole main() of a worker module. It applies the rlimits,
+then serves jobs over JSON lines on stdin/stdout:
+
+    parent → worker   {"type": "run", "job_id", ...job}      {"type": "tool_result", "call_id", "value" | "error"}
+    worker → parent   {"type": "ready"}   {"type": "tool_call", "call_id", "tool", "args"}   {"type": "done", "job_id", "result" | "error"}
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+import itertools
+import threading
+from typing import Any, Awaitable, Callable, Optional
+
+try:
+    import resource  # POSIX only; elsewhere the workers run without CPU/memory limits
+except ImportError:
+    resource = None
+
+POOL_SIZE = 2
+MAX_RUNS_PER_WORKER = 50
+CPU_SECONDS_PER_JOB = 30
+MEMORY_LIMIT_MB = 1024
+STREAM_LIMIT = 16 * 1024 * 1024  # tool results travel as single JSON lines
+RESPAWN_BACKOFF = 0.5       # seconds before retrying a failed respawn, doubled per failure
+RESPAWN_BACKOFF_MAX = 30.0
+
+ToolHandler = Callable[[str, Any], Awaitable[Any]]
+
+
+class SandboxError(RuntimeError):
+    """The worker could not produce a result (timeout, crash, resource limit)."""
+
+
+def _dumps(message: dict) -> str:
+    return json.dumps(message, default=str) + "\n"
+
+
+# ───────────────────────────────────────────────────────────────
+# PARENT SIDE
+# ───────────────────────────────────────────────────────────────
+class _Worker:
+    def __init__(self, proc: asyncio.subprocess.Process):
+        self.proc = proc
+        self.runs = 0
+        self.ready = asyncio.get_running_loop().create_future()
+        self.done: Optional[asyncio.Future] = None
+        self.on_tool_call: Optional[ToolHandler] = None
+        self.reader: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.returncode is None
+
+    async def send(self, message: dict) -> None:
+        self.proc.stdin.write(_dumps(message).encode("utf-8"))
+        await self.proc.stdin.drain()
+
+    def kill(self) -> None:
+        if self.alive:
+            self.proc.kill()
+
+
+class SandboxPool:
+    def __init__(
+        self,
+        worker_module: str,
+        cwd: str,
+        size: int = POOL_SIZE,
+        max_runs: int = MAX_RUNS_PER_WORKER,
+        cpu_seconds: int = CPU_SECONDS_PER_JOB,
+        memory_mb: int = MEMORY_LIMIT_MB,
+    ):
+        self.worker_module = worker_module
+        self.cwd = cwd
+        self.size = size
+        self.max_runs = max_runs
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: set[_Worker] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._job_ids = itertools.count(1)
+        self.stats = {"jobs": 0, "timeouts": 0, "crashes": 0, "recycled": 0, "respawn_failures": 0, "no_worker": 0, "bad_lines": 0}
+
+    async def start(self) -> None:
+        self._idle = asyncio.Queue()
+        workers = await asyncio.gather(*(self._spawn() for _ in range(self.size)))
+        for worker in workers:
+            self._idle.put_nowait(worker)
+        print(f"🧪 Sandbox pool ready: {self.size} worker(s) ({self.worker_module})")
+
+    async def _spawn(self) -> _Worker:
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", self.worker_module,
+            "--cpu-seconds", str(self.cpu_seconds),
+            "--memory-mb", str(self.memory_mb),
+            cwd=self.cwd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=STREAM_LIMIT,
+        )
+        worker = _Worker(proc)
+        worker.reader = asyncio.create_task(self._read(worker))
+        self._workers.add(worker)
+        try:
+            await worker.ready  # modules imported, limits applied
+        except BaseException:
+            worker.kill()
+            self._workers.discard(worker)
+            raise
+        return worker
+
+    def _replace(self, worker: _Worker) -> None:
+        """Retire a worker and start its successor in the background."""
+        worker.kill()
+        self._workers.discard(worker)
+
+        async def respawn():
+            # Keep trying: a lost worker that is never replaced shrinks the pool for good
+            delay = RESPAWN_BACKOFF
+            while True:
+                try:
+                    self._idle.put_nowait(await self._spawn())
+                    return
+                except Exception as e:
+                    self.stats["respawn_failures"] += 1
+                    print(f"⚠️ Sandbox worker failed to start ({e}); retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, RESPAWN_BACKOFF_MAX)
+
+        task = asyncio.create_task(respawn())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _read(self, worker: _Worker) -> None:
+        while True:
+            line = await worker.proc.stdout.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+                kind = message.get("type")
+            except (ValueError, AttributeError):
+                # Not ours (e.g. C-level output that slipped onto the pipe); the channel itself is fine
+                self.stats["bad_lines"] += 1
+                print(f"⚠️ Ignoring non-protocol output from sandbox worker: {line[:200]!r}")
+                continue
+            if kind == "ready" and not worker.ready.done():
+                worker.ready.set_result(True)
+            elif kind == "tool_call":
+                task = asyncio.create_task(self._answer_tool_call(worker, message))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            elif kind == "done" and worker.done and not worker.done.done():
+                worker.done.set_result(message)
+
+        code = await worker.proc.wait()
+        error = SandboxError(f"sandbox worker exited with code {code}" + (" (CPU/memory limit?)" if code else ""))
+        for future in (worker.ready, worker.done):
+            if future is not None and not future.done():
+                future.set_exception(error)
+
+    async def _answer_tool_call(self, worker: _Worker, message: dict) -> None:
+        reply = {"type": "tool_result", "call_id": message["call_id"]}
+        try:
+            reply["value"] = await worker.on_tool_call(message["tool"], message["args"])
+        except Exception as e:
+            reply["error"] = f"{type(e).__name__}: {e}"
+        if worker.alive:
+            await worker.send(reply)
+
+    async def run(self, job: dict, on_tool_call: ToolHandler, timeout: float) -> Any:
+        """Run one job on an idle worker; `on_tool_call(tool, args)` serves its tool requests."""
+        if self._idle is None:
+            raise SandboxError("SandboxPool.start() was not awaited")
+
+        try:
+            # Bounded: if respawns keep failing there may be no worker to wait for
+            worker = await asyncio.wait_for(self._idle.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.stats["no_worker"] += 1
+            raise SandboxError(f"No sandbox worker became available within {timeout} seconds "
+                               f"({len(self._workers)} alive, {self.stats['respawn_failures']} failed respawns)")
+        worker.on_tool_call = on_tool_call
+        worker.done = asyncio.get_running_loop().create_future()
+        self.stats["jobs"] += 1
+        keep = False
+        try:
+            await worker.send({"type": "run", "job_id": next(self._job_ids), **job})
+            message = await asyncio.wait_for(worker.done, timeout=timeout)
+            keep = True
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise SandboxError(f"Execution timed out after {timeout} seconds")
+        except (SandboxError, ConnectionError) as e:
+            self.stats["crashes"] += 1
+            raise SandboxError(str(e))
+        finally:
+            worker.runs += 1
+            worker.done = None
+            if keep and worker.runs < self.max_runs:
+                self._idle.put_nowait(worker)
+            else:
+                if keep:
+                    self.stats["recycled"] += 1
+                self._replace(worker)
+
+        if "error" in message:
+            raise SandboxError(message["error"])
+        return message["result"]
+
+    async def shutdown(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        for worker in list(self._workers):
+            if worker.alive:
+                worker.proc.stdin.close()
+                try:
+                    await asyncio.wait_for(worker.proc.wait(), timeout=2)
+                except asyncio.TimeoutError:
+                    worker.kill()
+        self._workers.clear()
+
+
+# ───────────────────────────────────────────────────────────────
+# WORKER SIDE
+# ───────────────────────────────────────────────────────────────
+def _apply_memory_limit(memory_mb: int) -> None:
+    if resource and memory_mb:
+        limit = memory_mb * 1024 * 1024
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _arm_cpu_limit(cpu_seconds: int) -> None:
+    """RLIMIT_CPU counts the whole process lifetime, so each job gets `cpu_seconds` on top of what is used."""
+    if resource and cpu_seconds:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def run_worker(execute: Callable[[dict, ToolHandler], Awaitable[Any]], warm_up: Callable[[], Any] = None) -> None:
+    """
+    main() of a worker module. `execute(job, call_tool)` runs one job and returns its JSON-able result;
+    `call_tool(tool, args)` is answered by the parent's on_tool_call.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cpu-seconds", type=int, default=CPU_SECONDS_PER_JOB)
+    parser.add_argument("--memory-mb", type=int, default=MEMORY_LIMIT_MB)
+    args = parser.parse_args()
+
+    # Generated code may print or write to fd 1 directly (os.write, C extensions); keep a private
+    # copy of the protocol pipe and point both sys.stdout and fd 1 at stderr
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), 1)
+    sys.stdout = sys.stderr
+
+    if warm_up:
+        warm_up()
+    _apply_memory_limit(args.memory_mb)
+    asyncio.run(_serve(execute, channel, args.cpu_seconds))
+
+
+async def _serve(execute, channel, cpu_seconds: int) -> None:
+    loop = asyncio.get_running_loop()
+    inbox: asyncio.Queue = asyncio.Queue()
+
+    def read_stdin():
+        for line in sys.stdin:
+            loop.call_soon_threadsafe(inbox.put_nowait, json.loads(line))
+        loop.call_soon_threadsafe(inbox.put_nowait, None)  # parent closed the pipe
+
+    threading.Thread(target=read_stdin, daemon=True).start()
+
+    def send(message: dict) -> None:
+        channel.write(_dumps(message))
+        channel.flush()
+
+    pending: dict[int, asyncio.Future] = {}
+    call_ids = itertools.count(1)
+
+    async def call_tool(tool: str, args: Any) -> Any:
+        call_id = next(call_ids)
+        pending[call_id] = loop.create_future()
+        send({"type": "tool_call", "call_id": call_id, "tool": tool, "args": args})
+        try:
+            reply = await pending[call_id]
+        finally:
+            del pending[call_id]
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply["value"]
+
+    async def run_job(job: dict) -> None:
+        try:
+            send({"type": "done", "job_id": job["job_id"], "result": await execute(job, call_tool)})
+        except Exception as e:
+            send({"type": "done", "job_id": job["job_id"], "error": f"{type(e).__name__}: {e}"})
+
+    jobs: set[asyncio.Task] = set()
+    send({"type": "ready"})
+    while (message := await inbox.get()) is not None:
+        if message["type"] == "run":
+            _arm_cpu_limit(cpu_seconds)
+            task = asyncio.create_task(run_job(message))
+            jobs.add(task)
+            task.add_done_callback(jobs.discard)
+        elif message["type"] == "tool_result":
+            future = pending.get(message["call_id"])
+            if future and not future.done():
+                future.set_result(message)
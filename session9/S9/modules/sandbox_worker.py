@@ -0,0 +1,24 @@
+# modules/sandbox_worker.py
+# Worker process for modules/action.py, started by SandboxPool as `python -m modules.sandbox_worker`.
+# Runs the same execute_plan() as the in-process path; mcp.call_tool is answered by the parent's dispatcher.
+
+from mcp.types import CallToolResult
+
+from modules.action import execute_plan
+from modules.sandbox_pool import run_worker
+
+
+class RemoteDispatcher:
+    def __init__(self, call_tool):
+        self._call_tool = call_tool
+
+    async def call_tool(self, tool_name: str, input_dict: dict) -> CallToolResult:
+        return CallToolResult.model_validate(await self._call_tool(tool_name, input_dict))
+
+
+async def execute(job: dict, call_tool) -> str:
+    return await execute_plan(job["code"], RemoteDispatcher(call_tool))
+
+
+if __name__ == "__main__":
+    run_worker(execute)